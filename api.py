@@ -0,0 +1,372 @@
+import functools
+import hashlib
+import io
+import json
+import math
+
+import flask
+import numpy as np
+import pandas as pd
+
+import indicadores
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    # Sem o pyarrow, as rotas de dados respondem só em JSON
+    pyarrow = None
+
+# Máximo de pontos aceitos em uma única requisição de localização em lote
+LIMITE_PONTOS = 100_000
+
+# Países mais próximos retornados por /api/vizinhos quando nem k nem raio_km são informados
+VIZINHOS_PADRAO = 5
+
+# Linhas por página nas rotas de dados: padrão e máximo do parâmetro limite
+LIMITE_LINHAS_PADRAO = 10_000
+LIMITE_LINHAS = 100_000
+
+TIPO_ARROW = 'application/vnd.apache.arrow.stream'
+
+# Nomes aceitos para as colunas de latitude e longitude no CSV enviado
+COLUNAS_LATITUDE = ('lat', 'latitude')
+COLUNAS_LONGITUDE = ('lon', 'lng', 'long', 'longitude')
+
+
+class ErroRequisicao(Exception):
+    pass
+
+
+def _coordenada(valor, nome, limite):
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        raise ErroRequisicao(f'{nome} inválida: {valor!r}')
+    if not math.isfinite(numero) or abs(numero) > limite:
+        raise ErroRequisicao(f'{nome} fora do intervalo: {valor!r}')
+    return numero
+
+def _nome_pais(estado, indice):
+    # Nome do país no dataset; os territórios que só existem no GeoJSON (ex.: Groenlândia, Porto Rico) ficam com o nome de lá
+    if indice < 0:
+        return None
+    pais = estado.registro.por_iso3.get(estado.indice_paises.ids[indice])
+    return pais.nome if pais is not None else estado.indice_paises.nomes[indice]
+
+def _coluna_csv(df, nomes):
+    for coluna in df.columns:
+        if str(coluna).strip().lower() in nomes:
+            return coluna
+    raise ErroRequisicao(f'o CSV precisa de uma coluna {" ou ".join(nomes)}')
+
+def _inteiro(valor, nome, padrao):
+    if valor is None:
+        return padrao
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise ErroRequisicao(f'{nome} inválido: {valor!r}')
+    if numero < 0:
+        raise ErroRequisicao(f'{nome} deve ser positivo: {valor!r}')
+    return numero
+
+def _pais(estado, pais):
+    # Aceita o nome do país no dataset ou o ISO3
+    encontrado = estado.registro.por_nome.get(pais) or estado.registro.por_iso3.get(pais.upper())
+    if encontrado is None:
+        raise ErroRequisicao(f'país desconhecido: {pais!r}')
+    return encontrado
+
+def _pontos_csv(texto):
+    try:
+        df = pd.read_csv(io.StringIO(texto))
+    except (ValueError, pd.errors.ParserError) as erro:
+        raise ErroRequisicao(f'CSV inválido: {erro}')
+    lats = pd.to_numeric(df[_coluna_csv(df, COLUNAS_LATITUDE)], errors='coerce').to_numpy(dtype=float)
+    lons = pd.to_numeric(df[_coluna_csv(df, COLUNAS_LONGITUDE)], errors='coerce').to_numpy(dtype=float)
+    return df, lats, lons
+
+def _pontos_json(corpo):
+    pontos = corpo.get('pontos') if isinstance(corpo, dict) else None
+    if not isinstance(pontos, list):
+        raise ErroRequisicao('o corpo deve ser {"pontos": [[lat, lon], ...]}')
+    try:
+        coordenadas = np.array(pontos, dtype=float).reshape(-1, 2) if pontos else np.empty((0, 2))
+    except (TypeError, ValueError):
+        raise ErroRequisicao('cada ponto deve ser [lat, lon], com números')
+    if len(coordenadas) != len(pontos):
+        raise ErroRequisicao('cada ponto deve ser [lat, lon], com números')
+    return coordenadas[:, 0], coordenadas[:, 1]
+
+def _posicoes_paises(estado, argumentos):
+    """Posições (no registro e no cubo) dos países pedidos com pais=<nome ou ISO3> (repetido) e regiao=<região da ONU>."""
+    registro = estado.registro
+    nomes = argumentos.getlist('pais')
+    posicoes = [_pais(estado, nome).posicao for nome in nomes] if nomes else list(range(len(registro.paises)))
+    regiao = argumentos.get('regiao')
+    if regiao is not None:
+        if regiao not in registro.membros['UN Region']:
+            raise ErroRequisicao(f'região desconhecida: {regiao!r}')
+        posicoes = [posicao for posicao in posicoes if registro.paises[posicao].grupos['UN Region'] == regiao]
+    return np.array(posicoes, dtype=np.int64)
+
+def _anos(argumentos, anos):
+    # Sem ano_inicio/ano_fim, todos os anos da tabela
+    ano_inicio = _inteiro(argumentos.get('ano_inicio'), 'ano_inicio', int(anos[0]))
+    ano_fim = _inteiro(argumentos.get('ano_fim'), 'ano_fim', int(anos[-1]))
+    return ano_inicio, ano_fim
+
+def _pagina(argumentos, total):
+    inicio = _inteiro(argumentos.get('inicio'), 'inicio', 0)
+    limite = _inteiro(argumentos.get('limite'), 'limite', LIMITE_LINHAS_PADRAO)
+    # Com limite 0 a página seria vazia e a 'proxima' apontaria para a mesma página, sem fim
+    if not 1 <= limite <= LIMITE_LINHAS:
+        raise ErroRequisicao(f'limite deve estar entre 1 e {LIMITE_LINHAS}')
+    return min(inicio, total), min(inicio + limite, total)
+
+def _url_proxima(fim, total):
+    # Mesma consulta, a partir da primeira linha que ficou de fora desta página
+    if fim >= total:
+        return None
+    argumentos = flask.request.args.to_dict(flat=False)
+    argumentos['inicio'] = [str(fim)]
+    return flask.url_for(flask.request.endpoint, **flask.request.view_args, **argumentos)
+
+def _lista_json(coluna):
+    return [None if isinstance(valor, float) and math.isnan(valor) else valor for valor in coluna.tolist()]
+
+def _serializar_json(corpo):
+    # O orjson serializa as colunas numéricas direto do array (NaN vira null); as de texto (dtype object) vão como lista
+    if orjson is not None:
+        colunas = {nome: _lista_json(coluna) if coluna.dtype == object else coluna for nome, coluna in corpo['colunas'].items()}
+        return orjson.dumps({**corpo, 'colunas': colunas}, option=orjson.OPT_SERIALIZE_NUMPY)
+    colunas = {nome: _lista_json(coluna) for nome, coluna in corpo['colunas'].items()}
+    return json.dumps({**corpo, 'colunas': colunas}, ensure_ascii=False).encode()
+
+def _responder_tabela(colunas, total, inicio, fim):
+    """Página [inicio, fim) de uma tabela em colunas, em JSON ou, com formato=arrow, no formato IPC do Apache Arrow.
+
+    Nos dois formatos, o total de linhas vai no cabeçalho X-Total-Count e a próxima página no Link (rel="next")."""
+    formato = flask.request.args.get('formato', 'json')
+    proxima = _url_proxima(fim, total)
+    if formato == 'arrow':
+        if pyarrow is None:
+            return flask.jsonify({'erro': 'o formato arrow precisa do pyarrow instalado no servidor'}), 406
+        # from_pandas converte os NaN em valores nulos do Arrow. As colunas de texto se repetem a cada linha
+        # (país, indicador) e vão como dicionário
+        tabela = pyarrow.table({
+            nome: pyarrow.array(coluna, from_pandas=True).dictionary_encode() if coluna.dtype == object else pyarrow.array(coluna, from_pandas=True)
+            for nome, coluna in colunas.items()
+        })
+        saida = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(saida, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        resposta = flask.Response(saida.getvalue().to_pybytes(), mimetype=TIPO_ARROW)
+    elif formato == 'json':
+        corpo = {'total': total, 'inicio': inicio, 'quantidade': fim - inicio, 'proxima': proxima, 'colunas': colunas}
+        resposta = flask.Response(_serializar_json(corpo), mimetype='application/json')
+    else:
+        raise ErroRequisicao(f'formato desconhecido: {formato!r} (json ou arrow)')
+    resposta.headers['X-Total-Count'] = str(total)
+    if proxima is not None:
+        resposta.headers['Link'] = f'<{proxima}>; rel="next"'
+    return resposta
+
+@functools.lru_cache(maxsize=2)
+def _tabelas_estaticas(estado):
+    """Colunas do recorte_mundo e a população por ano como arrays, montados uma vez por versão dos dados."""
+    recorte = estado.recorte_mundo
+    colunas_populacao = [coluna for coluna in recorte.columns if coluna.endswith(' Population')]
+    return {
+        'paises': {coluna: recorte[coluna].to_numpy() for coluna in recorte.columns},
+        'anos_populacao': np.array([int(coluna.split()[0]) for coluna in colunas_populacao]),
+        'populacao': recorte[colunas_populacao].to_numpy(),
+        'nomes': np.array([pais.nome for pais in estado.registro.paises], dtype=object),
+        'iso3': np.array([pais.iso3 for pais in estado.registro.paises], dtype=object),
+        'indicadores': np.array(estado.cubo_indicadores.indicadores, dtype=object),
+    }
+
+def localizar_varios(estado, lats, lons):
+    """ISO3 e nome do país de cada ponto (None para os pontos no mar, fora de todos os países ou inválidos)."""
+    # Coordenadas fora do intervalo não são levadas para a borda da grade: ficam sem país
+    validos = (np.abs(lats) <= 90) & (np.abs(lons) <= 180)
+    indices = estado.indice_paises.localizar_varios(np.where(validos, lats, np.nan), np.where(validos, lons, np.nan)).tolist()
+    ids = estado.indice_paises.ids
+    # Os nomes são buscados uma vez por país encontrado, não uma vez por ponto
+    nomes = {indice: _nome_pais(estado, indice) for indice in set(indices)}
+    return [ids[indice] if indice >= 0 else None for indice in indices], [nomes[indice] for indice in indices]
+
+
+def configurar(server, estado_atual, prefixo='/api'):
+    """Registra as rotas da API no servidor Flask. estado_atual retorna o EstadoApp da versão atual dos dados."""
+
+    @server.errorhandler(ErroRequisicao)
+    def erro_requisicao(erro):
+        return flask.jsonify({'erro': str(erro)}), 400
+
+    def com_etag(rota):
+        # O ETag sai da assinatura dos dados e da URL, antes de montar a resposta: quando o cliente já tem a
+        # versão atual, responde 304 sem consultar os dados. O ETag é fraco porque o corpo pode ir comprimido
+        @functools.wraps(rota)
+        def rota_com_etag(**argumentos):
+            estado = estado_atual()
+            etag = hashlib.sha256(f'{estado.assinatura}|{flask.request.full_path}'.encode()).hexdigest()[:32]
+            if flask.request.if_none_match.contains_weak(etag):
+                resposta = flask.Response(status=304)
+            else:
+                resposta = flask.make_response(rota(estado, **argumentos))
+            if resposta.status_code in (200, 304):
+                resposta.set_etag(etag, weak=True)
+                # Os dados podem mudar com a recarga: o cliente guarda a resposta, mas confirma o ETag a cada uso
+                resposta.headers['Cache-Control'] = 'no-cache'
+            return resposta
+        return rota_com_etag
+
+    @server.route(f'{prefixo}/indicadores', methods=['GET'])
+    @com_etag
+    def listar_indicadores(estado):
+        """Indicadores do cubo com o primeiro e o último ano com dados."""
+        cubo = estado.cubo_indicadores
+        return flask.jsonify([
+            {'indicador': indicador, 'ano_inicio': int(cubo.anos_indicador(indicador)[0]), 'ano_fim': int(cubo.anos_indicador(indicador)[-1]),
+             'menor_melhor': indicador in indicadores.MENOR_MELHOR}
+            for indicador in cubo.indicadores
+        ])
+
+    @server.route(f'{prefixo}/paises', methods=['GET'])
+    @com_etag
+    def dados_paises(estado):
+        """Colunas do recorte_mundo (dados dos cards e do mapa) dos países filtrados por pais e regiao.
+
+        coluna (repetido) escolhe as colunas; sem ela vêm todas."""
+        tabelas = _tabelas_estaticas(estado)
+        nomes_colunas = flask.request.args.getlist('coluna') or list(tabelas['paises'])
+        desconhecidas = [coluna for coluna in nomes_colunas if coluna not in tabelas['paises']]
+        if desconhecidas:
+            raise ErroRequisicao(f'colunas desconhecidas: {desconhecidas}')
+        posicoes = _posicoes_paises(estado, flask.request.args)
+        inicio, fim = _pagina(flask.request.args, len(posicoes))
+        linhas = posicoes[inicio:fim]
+        return _responder_tabela({coluna: tabelas['paises'][coluna][linhas] for coluna in nomes_colunas}, len(posicoes), inicio, fim)
+
+    @server.route(f'{prefixo}/series', methods=['GET'])
+    @com_etag
+    def series(estado):
+        """Séries dos indicadores em formato longo (uma linha por país, indicador e ano), sem os anos sem valor.
+
+        Filtros: indicador (repetido), pais (repetido, nome ou ISO3), regiao, ano_inicio e ano_fim. Com ranking=1,
+        também a posição e o percentil do país no ranking mundial de cada ano."""
+        cubo = estado.cubo_indicadores
+        tabelas = _tabelas_estaticas(estado)
+        nomes_indicadores = flask.request.args.getlist('indicador') or cubo.indicadores
+        desconhecidos = [indicador for indicador in nomes_indicadores if indicador not in cubo.indice_indicador]
+        if desconhecidos:
+            raise ErroRequisicao(f'indicadores desconhecidos: {desconhecidos}')
+        posicoes = _posicoes_paises(estado, flask.request.args)
+        ano_inicio, ano_fim = _anos(flask.request.args, cubo.anos)
+
+        # Um único recorte do cubo (indicador × país × ano), e as linhas com valor na ordem indicador, país, ano
+        indices = np.array([cubo.indice_indicador[indicador] for indicador in nomes_indicadores])
+        anos = np.arange(max(ano_inicio, int(cubo.anos[0])), min(ano_fim, int(cubo.anos[-1])) + 1)
+        colunas_anos = anos - int(cubo.anos[0])
+        recorte = cubo.valores[np.ix_(indices, posicoes, colunas_anos)]
+        com_valor = np.flatnonzero(~np.isnan(recorte.ravel()))
+        inicio, fim = _pagina(flask.request.args, len(com_valor))
+        pagina = com_valor[inicio:fim]
+        indicador, pais, ano = np.unravel_index(pagina, recorte.shape)
+
+        colunas = {
+            'pais': tabelas['nomes'][posicoes[pais]],
+            'iso3': tabelas['iso3'][posicoes[pais]],
+            'indicador': tabelas['indicadores'][indices[indicador]],
+            'ano': anos[ano],
+            'valor': recorte.ravel()[pagina],
+        }
+        if flask.request.args.get('ranking') == '1':
+            ranking = estado.ranking
+            colunas['posicao'] = ranking.posicao[indices[indicador], posicoes[pais], colunas_anos[ano]]
+            colunas['percentil'] = ranking.percentil[indices[indicador], posicoes[pais], colunas_anos[ano]]
+        return _responder_tabela(colunas, len(com_valor), inicio, fim)
+
+    @server.route(f'{prefixo}/populacao', methods=['GET'])
+    @com_etag
+    def populacao(estado):
+        """População de cada país nos anos do world_population.csv, em formato longo. Filtros: pais, regiao, ano_inicio, ano_fim."""
+        tabelas = _tabelas_estaticas(estado)
+        posicoes = _posicoes_paises(estado, flask.request.args)
+        anos = tabelas['anos_populacao']
+        ano_inicio, ano_fim = _anos(flask.request.args, anos)
+        colunas_anos = np.flatnonzero((anos >= ano_inicio) & (anos <= ano_fim))
+        total = len(posicoes) * len(colunas_anos)
+        inicio, fim = _pagina(flask.request.args, total)
+        pais, ano = np.unravel_index(np.arange(inicio, fim), (len(posicoes), len(colunas_anos)))
+        return _responder_tabela({
+            'pais': tabelas['nomes'][posicoes[pais]],
+            'iso3': tabelas['iso3'][posicoes[pais]],
+            'ano': anos[colunas_anos[ano]],
+            'populacao': tabelas['populacao'][posicoes[pais], colunas_anos[ano]],
+        }, total, inicio, fim)
+
+    @server.route(f'{prefixo}/localizar', methods=['GET'])
+    def localizar():
+        """País que contém o ponto: /api/localizar?lat=-15.79&lon=-47.88"""
+        lat = _coordenada(flask.request.args.get('lat'), 'lat', 90)
+        lon = _coordenada(flask.request.args.get('lon'), 'lon', 180)
+        estado = estado_atual()
+        indice = estado.indice_paises.indice(lat, lon)
+        iso3 = estado.indice_paises.ids[indice] if indice >= 0 else None
+        return flask.jsonify({'lat': lat, 'lon': lon, 'iso3': iso3, 'pais': _nome_pais(estado, indice)})
+
+    @server.route(f'{prefixo}/localizar', methods=['POST'])
+    def localizar_lote():
+        """Vários pontos de uma vez, em JSON ({"pontos": [[lat, lon], ...]}) ou em CSV com colunas lat e lon.
+
+        Em JSON, a resposta traz as listas iso3 e paises na ordem dos pontos; em CSV, o próprio CSV com as colunas
+        iso3 e pais acrescentadas. Pontos inválidos ou fora de todos os países ficam sem país."""
+        requisicao = flask.request
+        if requisicao.content_length is not None and requisicao.content_length > LIMITE_PONTOS * 64:
+            return flask.jsonify({'erro': f'no máximo {LIMITE_PONTOS} pontos por requisição'}), 413
+
+        csv = requisicao.mimetype == 'text/csv'
+        if csv:
+            df, lats, lons = _pontos_csv(requisicao.get_data(as_text=True))
+        else:
+            lats, lons = _pontos_json(requisicao.get_json(silent=True))
+        if len(lats) > LIMITE_PONTOS:
+            return flask.jsonify({'erro': f'no máximo {LIMITE_PONTOS} pontos por requisição'}), 413
+
+        iso3, paises = localizar_varios(estado_atual(), lats, lons)
+        if csv:
+            df['iso3'] = iso3
+            df['pais'] = paises
+            return flask.Response(df.to_csv(index=False), mimetype='text/csv')
+        return flask.jsonify({'iso3': iso3, 'paises': paises})
+
+    @server.route(f'{prefixo}/vizinhos/<pais>', methods=['GET'])
+    def vizinhos_pais(pais):
+        """Fronteiras terrestres e países mais próximos: /api/vizinhos/Brazil?k=5 ou /api/vizinhos/BRA?raio_km=2000
+
+        k limita os mais próximos (padrão 5); com raio_km, vêm os que estão dentro do raio, limitados por k só se ele for informado."""
+        estado = estado_atual()
+        grafo = estado.grafo_vizinhos
+        encontrado = _pais(estado, pais)
+        raio = flask.request.args.get('raio_km')
+        raio_km = None if raio is None else _coordenada(raio, 'raio_km', math.inf)
+        if raio_km is not None and raio_km < 0:
+            raise ErroRequisicao(f'raio_km deve ser positivo: {raio!r}')
+        k = _inteiro(flask.request.args.get('k'), 'k', None if raio_km is not None else VIZINHOS_PADRAO)
+        por_nome = estado.registro.por_nome
+        return flask.jsonify({
+            'pais': encontrado.nome,
+            'iso3': encontrado.iso3,
+            'fronteiras': [{'pais': nome, 'iso3': por_nome[nome].iso3, 'extensao_km': round(extensao, 1)}
+                           for nome, extensao in grafo.fronteiras(encontrado.nome)],
+            'proximos': [{'pais': nome, 'iso3': por_nome[nome].iso3, 'distancia_km': round(distancia, 1)}
+                         for nome, distancia in grafo.proximos(encontrado.nome, k, raio_km)],
+        })
@@ -1,18 +1,36 @@
-import pandas as pd
-import numpy as np
-import geojson
+import time
+inicio_importacoes = time.perf_counter()
+
+import functools
 import os
+import sys
+import uuid
 
-import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 
 import dash 
-from dash import Dash, dcc, html, Input, Output, State
+import flask
+from dash import Dash, dcc, html, Input, Output, State, ClientsideFunction
 
 import dash_bootstrap_components as dbc
 
 import utils
-
+import dados
+import geometria
+import indicadores
+import snapshot
+import compressao
+import metricas
+import recarga
+import prefetch
+import api
+from cache_figuras import CacheFiguras
+from cronometro import Cronometro
+
+# Tempo de cada etapa da inicialização, exibido com INFO_MUNDO_TEMPOS=1
+cronometro = Cronometro()
+cronometro.registrar('importações', time.perf_counter() - inicio_importacoes)
 
 # Obtém o caminho absoluto para a pasta "assets"
 assets_folder = "static"
@@ -30,63 +48,35 @@ app.title='Info Mundo'
 if os.path.exists(path_favicon):
     app._favicon = path_favicon
 
+# Tempo e tamanho das respostas de cada callback em /metrics, com INFO_MUNDO_METRICAS=1
+if metricas.ativo:
+    metricas.configurar(app)
+
+# Compressão das respostas e cache HTTP dos assets. INFO_MUNDO_COMPRESSAO=0 desativa (ex.: quando um proxy já comprime)
+compressao_ativa = os.environ.get('INFO_MUNDO_COMPRESSAO', '1') != '0'
+if compressao_ativa:
+    compressao.configurar(server)
+
 # ===================================================================
-# Leitura dos datasets
-info_mundo = pd.read_csv(os.path.join(server.static_folder, 'data', 'hdi_info.csv'))
-regioes = pd.read_excel(os.path.join(server.static_folder, 'data', 'regioes.xlsx'))
-df_populacao = pd.read_csv(os.path.join(server.static_folder, 'data', 'world_population.csv'))
-
-# ====================================================================
-# Operações com o GeoJSON
-with open(os.path.join(server.static_folder, 'data', 'custom.geo.json'), "r", encoding="utf-8") as f:
-    json_paises = geojson.load(f)
-paises_locations = json_paises['features']
-
-# Cria a key 'id' para cada pais
-paises_iso3_excecao = ['MDV', 'MUS', 'NOR', 'FRA', 'SYC']
-for pais in json_paises['features']:
-    iso_a3 = pais['properties']['iso_a3']
-    iso_a3_eh = pais['properties']['iso_a3_eh']
-    if iso_a3_eh in paises_iso3_excecao:
-        iso_a3 = iso_a3_eh
-    pais['id'] = iso_a3
-
-# Código para criar uma nova propriedade 'sigla' em todos os paises no GeoJSON, que será utilizada para buscar a imagem da bandeira no diretório
-excecoes_iso_a2 = ['N. Cyprus', 'Siachen Glacier', 'Somaliland']
-for i, pais in enumerate(json_paises['features']):
-  sigla = pais['properties']['iso_a2']
-  if(pais['properties']['iso_a2'] == '-99'):
-    sigla = pais['properties']['iso_a2_eh']
-    if(pais['properties']['name'] in excecoes_iso_a2):
-      sigla = pais['properties']['postal']
-  sigla = sigla.lower()
-  pais['properties']['sigla'] = sigla
-
-
-# ======================================================
-# Operações nos Datasets
-# Merge no dataset de regiões para plot de comparação entre o país e a região que ele pertence
-info_mundo['UNDP Developing Regions'] = info_mundo['ISO3'].map(regioes.set_index('ISO Code')['UN Region'])
-info_mundo.rename(columns = {'UNDP Developing Regions': 'UN Region'}, inplace=True)
-
-# Recorte no dataset principal e dataset de população para projeção nos cards e no mapa
-recorte_mundo = info_mundo.iloc[:, :5]
-recorte_mundo['Gross National Income Per Capita (2021)'] = info_mundo['Gross National Income Per Capita (2021)']
-recorte_mundo['Life Expectancy at Birth (2021)'] = info_mundo['Life Expectancy at Birth (2021)']
-
-merged_df = pd.merge(recorte_mundo, df_populacao, left_on='ISO3', right_on='CCA3')
-
-novas_colunas = ['1970 Population', '1980 Population', '1990 Population', '2000 Population', '2010 Population', '2015 Population', '2020 Population', '2022 Population', 'Capital', 'World Population Percentage', 'Area (km²)']
-recorte_mundo[novas_colunas] = merged_df[novas_colunas]
-
-recorte_mundo['Human Development Index (2021)'] = info_mundo['Human Development Index (2021)']
-
-
-# =======================================================
 # Definição de listas para dropdowns
-# Lista dos países para ser utilizado no Dropdown de Países
-dropdown_paises = [{'label': country, 'value': country} for country in info_mundo['Country']]
-dropdown_paises.insert(0, {'label': 'Mundo', 'value': 'Mundo'})
+# Opções de gráfico do Mundo e de um país, enviadas junto com os textos dos cards
+opcoes_graficos = {
+    'mundo': [
+        {'label': 'Distribuição da População Mundial por Região', 'value': 'mundo-populacao'},
+        {'label': 'Correlação entre o IDH e a expectativa de vida', 'value': 'mundo-idh-expectativa'},
+        {'label': 'Correlação entre a renda e a expectativa de vida', 'value': 'mundo-renda-expectativa'},
+    ],
+    'pais': [
+        {'label': 'Evolução da População', 'value': 'evolucao_populacao'},
+        {'label': 'Evolução do IDH', 'value': 'evolucao_idh'},
+        {'label': 'Comparação da evolução do IDH pela região', 'value': 'comparacao_idh'},
+        {'label': 'Comparação da evolução do IDH pelo grupo de renda', 'value': 'comparacao_idh_renda'},
+        {'label': 'Comparação da evolução do IDH com os países vizinhos', 'value': 'comparacao_idh_vizinhos'},
+        {'label': 'Evolução da posição no ranking do IDH', 'value': 'ranking_idh'},
+        {'label': 'Evolução da Expectativa de Vida', 'value': 'evolucao_expectativa_vida'},
+        {'label': 'Evolução da Renda', 'value': 'evolucao_renda'},
+    ],
+}
 
 dropdown_opcoes_mapa = [
     {'label': ' IDH', 'value': 'idh'},
@@ -95,146 +85,373 @@ dropdown_opcoes_mapa = [
     {'label': ' Expectativa de Vida', 'value': 'expectativa_vida'}
 ]
 
-# ======================================================
-# Criação do mapa
-fig_mapa = px.choropleth_mapbox(info_mundo, locations='ISO3', geojson=json_paises, color="Human Development Index (2021)",
-                            center={"lat": 14.778986, "lon": -15.723305}, zoom=2,
-                            color_continuous_scale='ylgn', opacity=0.4,
-                            hover_data={"Country": True,"Human Development Groups": True}
-                            )
-fig_mapa.update_layout(
-    paper_bgcolor="#d4dadc",
-    autosize=True, # Preenche o tamanho inteiro da tela, ou ROW em que está inserido
-    margin=go.Margin(l=0, r=0, t=0, b=0), # Define a margem do mapa
-    showlegend=False,
-    mapbox_style='carto-positron'
-)
-fig_mapa.update_coloraxes(colorbar=dict(len=0.5, yanchor='bottom', y=0))
-fig_mapa.update_layout(
-    coloraxis_colorbar=dict(
-        xanchor="left",  # Ancora a escala de cores à esquerda
-        yanchor="top",  # Ancora a escala de cores no topo
-        x=0.02,  # Define a posição horizontal da escala de cores em relação ao mapa
-        y=0.98  # Define a posição vertical da escala de cores em relação ao mapa
-    )
-)
+# Medidas do gráfico de comparação entre países: o valor do indicador ou a posição/percentil no ranking de cada ano
+opcoes_medida_comparacao = [
+    {'label': ' Valor', 'value': 'valor'},
+    {'label': ' Posição no ranking', 'value': 'posicao'},
+    {'label': ' Percentil', 'value': 'percentil'},
+]
+
+# Coluna usada para agrupar os países em cada gráfico de comparação do IDH
+agrupamentos_comparacao = {
+    'comparacao_idh': 'UN Region',
+    'comparacao_idh_renda': 'World Bank Income Groups',
+}
+
+def graficos_indisponiveis(registro, nome_pais):
+    # Gráficos de comparação pelo grupo que não existem para o país: sem região da ONU ou grupo de renda no
+    # dataset (ex.: Hong Kong), não há com quem comparar
+    grupos = registro.por_nome[nome_pais].grupos
+    return [tipo_grafico for tipo_grafico, agrupamento in agrupamentos_comparacao.items() if grupos[agrupamento] is None]
+
+# Figuras dos gráficos já serializadas, por (versão dos dados, tipo do gráfico, país). INFO_MUNDO_CACHE_MB define o limite de memória
+cache_figuras = CacheFiguras(int(float(os.environ.get('INFO_MUNDO_CACHE_MB', '64')) * 1024 * 1024))
+metricas.metricas.registrar_coletor(cache_figuras.coletar_metricas)
+
+# Com INFO_MUNDO_PREFETCH=1, a escolha de um país agenda em segundo plano a construção dos gráficos dele, que já
+# estão no cache quando o usuário abre um deles. INFO_MUNDO_PREFETCH_THREADS limita as threads (padrão 1).
+# A fila comporta os gráficos de dois países: o que ainda roda do anterior e o novo, numa troca de país
+agendador_prefetch = None
+if prefetch.ativo:
+    agendador_prefetch = prefetch.Agendador(int(os.environ.get('INFO_MUNDO_PREFETCH_THREADS', '1')),
+                                            limite_fila=2 * max(len(opcoes) for opcoes in opcoes_graficos.values()))
+    metricas.metricas.registrar_coletor(agendador_prefetch.coletar_metricas)
+# Figura mostrada enquanto nenhum gráfico está selecionado, criada uma única vez
+figura_vazia = utils.padronizar_grafico(go.Figure()).to_dict()
+
+# Por padrão a troca de métrica é feita no navegador (static/clientside.js). Com INFO_MUNDO_MAPA=servidor,
+# a troca passa pelo servidor, que responde apenas com as propriedades alteradas da figura
+modo_mapa = os.environ.get('INFO_MUNDO_MAPA', 'cliente')
+
+# Tempo de cada ano na animação do mapa, em ms
+intervalo_animacao_ms = 400
+
+# Largura aproximada do card da bandeira: coluna estreita na barra lateral, ou a tela inteira no celular
+tamanho_bandeira = '(min-width: 768px) 160px, 100vw'
+
+
+def niveis_geometria_mapa():
+    # URL versionada de cada nível da geometria já gerado em static/data, do mais grosseiro ao mais detalhado, com o
+    # maior zoom em que ele é usado
+    niveis = []
+    for nivel in geometria.NIVEIS:
+        caminho = geometria.caminho_nivel(nivel)
+        if os.path.exists(caminho):
+            url = compressao.url_versionada(app, os.path.relpath(caminho, assets_path).replace(os.sep, '/'))
+            niveis.append({'nivel': nivel, 'zoom_maximo': geometria.zoom_maximo(nivel), 'url': url})
+    return niveis
+
+
+class EstadoApp:
+    """Dados preparados de uma versão dos arquivos de static/data, mais o que é derivado deles para a página.
+
+    Cada callback lê o estado atual uma única vez, então uma requisição nunca mistura duas versões dos dados."""
+
+    def __init__(self, dados_app, versao, snapshot_carregado):
+        self.versao = versao
+        self.snapshot_carregado = snapshot_carregado
+        self.info_mundo = dados_app.info_mundo
+        self.recorte_mundo = dados_app.recorte_mundo
+        self.cubo_indicadores = dados_app.cubo_indicadores
+        self.registro = dados_app.registro
+        self.ranking = dados_app.ranking
+        self.indice_paises = dados_app.indice_paises
+        self.grafo_vizinhos = dados_app.grafo_vizinhos
+        self.json_mapa = dados_app.json_mapa
+        self.valores_mapa = dados_app.valores_mapa
+
+        # A geometria vai para o navegador por URL, e não dentro da figura: cada nível é baixado uma vez, já comprimido,
+        # e fica em cache entre as sessões, as trocas de métrica e as recargas dos dados. Sem os níveis gerados em disco
+        # (`python geometria.py`), continua embutida na figura
+        self.niveis_mapa = niveis_geometria_mapa()
+        nivel_inicial = geometria.escolher_nivel(dados.zoom_mapa)
+        url_inicial = next((nivel['url'] for nivel in self.niveis_mapa if nivel['nivel'] == nivel_inicial), None)
+        self.fig_mapa = dados_app.fig_mapa
+        if url_inicial is not None:
+            trace = dict(self.fig_mapa['data'][0], geojson=url_inicial)
+            self.fig_mapa = dict(self.fig_mapa, data=[trace] + self.fig_mapa['data'][1:])
+        self.assinatura = dados_app.assinatura
+
+        # Textos dos cards de todos os países e opções de gráfico, enviados uma única vez ao navegador
+        self.dados_cards = {
+            'cards': utils.dados_cards(self.recorte_mundo, self.registro, lambda caminho: compressao.url_versionada(app, caminho)),
+            'opcoes_graficos': opcoes_graficos,
+            'graficos_indisponiveis': {
+                pais.nome: indisponiveis for pais in self.registro.paises
+                if (indisponiveis := graficos_indisponiveis(self.registro, pais.nome))
+            },
+        }
+
+        # Lista dos países para ser utilizado no Dropdown de Países
+        self.dropdown_paises = [{'label': country, 'value': country} for country in self.info_mundo['Country']]
+        self.dropdown_paises.insert(0, {'label': 'Mundo', 'value': 'Mundo'})
+
+        # Indicadores com série histórica (mais de um ano), para o gráfico de comparação entre países
+        self.dropdown_indicadores = [
+            {'label': indicador, 'value': indicador}
+            for indicador in self.cubo_indicadores.indicadores if len(self.cubo_indicadores.anos_indicador(indicador)) > 1
+        ]
+        self.ano_minimo, self.ano_maximo = int(self.cubo_indicadores.anos[0]), int(self.cubo_indicadores.anos[-1])
+        self._layout = None
+        self._layout_json = None
+
+    def layout(self):
+        # Montado na primeira página servida com esta versão dos dados e reaproveitado nas seguintes
+        if self._layout is None:
+            self._layout = montar_layout(self)
+        return self._layout
+
+    def layout_json(self):
+        # Resposta do /_dash-layout, serializada uma única vez: a árvore do layout, com a geometria do mapa, não é
+        # percorrida a cada página, e com INFO_MUNDO_PRELOAD o texto pronto é compartilhado entre os workers
+        if self._layout_json is None:
+            self._layout_json = pio.json.to_json_plotly(self.layout()).encode()
+        return self._layout_json
+
+
+# ===================================================================
+# Leitura e preparação dos datasets
+# O estado preparado fica salvo em um snapshot e só é montado de novo quando algum arquivo de origem muda.
+# INFO_MUNDO_SNAPSHOT define outro caminho para o snapshot, ou o desativa se estiver vazia
+caminho_snapshot = os.environ.get('INFO_MUNDO_SNAPSHOT', os.path.join(project_root, 'cache', 'dados.pickle'))
+
+def preparar_estado(cronometro_preparacao):
+    dados_app = dados.preparar_dados(cronometro_preparacao)
+    # Os níveis da geometria são servidos por send_file, que a compressão das respostas não alcança. As versões
+    # .gz/.br são gravadas pelo `python geometria.py`; se faltarem (ex.: um deploy que não rodou essa etapa), são
+    # geradas aqui, junto com o snapshot: um único processo faz isso, dentro da trava, e os outros carregam o snapshot
+    if compressao_ativa:
+        with cronometro_preparacao.etapa('pré-compressão da geometria'):
+            for nivel in geometria.NIVEIS:
+                if os.path.exists(geometria.caminho_nivel(nivel)):
+                    compressao.garantir_precomprimidos(geometria.caminho_nivel(nivel))
+    return dados_app
+
+def carregar_estado(versao):
+    # As etapas da inicialização entram no relatório do INFO_MUNDO_TEMPOS; as das recargas são descartadas
+    cronometro_preparacao = cronometro if versao == 1 else Cronometro()
+    dados_app, snapshot_carregado = snapshot.carregar_ou_preparar(
+        caminho_snapshot, dados.arquivos_fonte(), lambda: preparar_estado(cronometro_preparacao))
+    return EstadoApp(dados_app, versao, snapshot_carregado)
+
+# Com INFO_MUNDO_RECARGA=<segundos>, cada processo verifica os arquivos de dados nesse intervalo e, quando
+# eles mudam, prepara os dados de novo em segundo plano e troca o estado sem reiniciar o app
+intervalo_recarga = float(os.environ.get('INFO_MUNDO_RECARGA', '0') or 0)
+with cronometro.etapa('snapshot'):
+    recarregador = recarga.Recarregador(dados.arquivos_dados, carregar_estado, intervalo_recarga, ao_trocar=[cache_figuras.limpar])
+metricas.metricas.registrar_coletor(recarregador.coletar_metricas)
+
+def estado_atual():
+    return recarregador.atual
+
+if intervalo_recarga > 0:
+    @server.before_request
+    def iniciar_recarga():
+        # A thread é iniciada na primeira requisição de cada worker, depois do fork do gunicorn
+        recarregador.iniciar()
+
+# Rotas da API (/api/localizar: país que contém um ponto ou uma lista de pontos), respondidas com os dados da versão atual
+api.configurar(server, estado_atual)
 
 # ==================================================================================
 # App Layout
 
-app.layout = dbc.Container(
-    dbc.Row([
-        dbc.Col([
-            dbc.Row([
-                html.Img(id='logo', src=app.get_asset_url("icons/header.png"))
-            ], className='header'),
+def montar_layout(estado):
+    return dbc.Container(
+        dbc.Row([
+            dbc.Col([
+                dbc.Row([
+                    html.Img(id='logo', src=compressao.url_versionada(app, "icons/header.png"))
+                ], className='header'),
+
+                dbc.Row([
+                    html.Div([
+                        dbc.Button('Mundo', color="primary", id="location-button", size='lg', className='align-items-center'),
+                    ], className='d-flex justify-content-center align-items-center')
+                ], className='d-flex justify-content-center'),
+    
+                html.P('Informe o país desejado:', className="input-label", style={'margin-top': '0px'}),
+                html.Div(id='div-test', children=[
+                    dcc.Dropdown(
+                        id='paises-dropdown',
+                        options=estado.dropdown_paises,
+                        value='Mundo',
+                        placeholder='Selecione um país',
+                        className="dropdown"
+                    ),
+                ]),
+
+                dcc.Store(id='dados-cards', data=estado.dados_cards),
+                # País cujos gráficos foram agendados no prefetch, para cancelar os que faltam quando ele muda
+                dcc.Store(id='prefetch-pais'),
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardBody([
+                                html.Span('Bandeira'),
+                                html.H3(style={'color': '#adfc92'}, id='bandeira-text'),
+                                # O navegador escolhe a variante da bandeira (WebP quando suportado) pela largura do card
+                                html.Picture([
+                                    html.Source(id='bandeira-pais-webp', type='image/webp', sizes=tamanho_bandeira),
+                                    html.Img(id='bandeira-pais', sizes=tamanho_bandeira, style={'max-width': '100%', 'height': 'auto', 'box-shadow': '4px 4px 4px 4px rgba(66, 65, 65, 0.15)'})
+                                ])
+                            ])
+                        ], color='light', outline=True, className="info-card")
+                    ], md=4),                
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardBody([
+                                html.Span('População'),
+                                html.H3(id='populacao-text', className="info-destaque"),
+                                html.Span("% da População Mundial"),
+                                html.H5(id='porcentagem-populacao-text', className='info-menor'),
+                            ])
+                        ], color='light', outline=True, className="info-card")
+                    ], md=5),
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardBody([
+                                html.Span('Ranking IDH'),
+                                html.H3(id='idh-rank-text', className="info-destaque"),
+                                html.Span('IDH'),
+                                html.H5(id='idh-text', className='info-menor'),
+                            ])
+                        ], color='light', outline=True, className="info-card")
+                    ], md=3),
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardBody([
+                                html.Div([
+                                    html.Span('Capital:', className='tipo-info-adicional'),
+                                    html.Span(id='capital-text', className='info-adicional-text'),                            
+                                ], className='card-info-adicional'),                            
+                                html.Div([
+                                    html.Span('Renda Média (ano):', className='tipo-info-adicional'),
+                                    html.Span(id='renda-text', className='info-adicional-text'),                            
+                                ], className='card-info-adicional'),                            
+                                html.Div([
+                                    html.Span('Exp. Vida:', className='tipo-info-adicional'),
+                                    html.Span(id='expectativa-text', className='info-adicional-text'),    
+                                ], className='card-info-adicional'),                            
+                                html.Div([
+                                    html.Span('Área:', className='tipo-info-adicional'),
+                                    html.Span(id='area-text', className='info-adicional-text'),    
+                                ], className='card-info-adicional'),
+                            ], className='info-adicional')
+                        ], color='light', outline=True, className="info-card")
+                    ], md=12),              
+                ], className="info-row"),
 
-            dbc.Row([
                 html.Div([
-                    dbc.Button('Mundo', color="primary", id="location-button", size='lg', className='align-items-center'),
-                ], className='d-flex justify-content-center align-items-center')
-            ], className='d-flex justify-content-center'),
-    
-            html.P('Informe o país desejado:', className="input-label", style={'margin-top': '0px'}),
-            html.Div(id='div-test', children=[
-                dcc.Dropdown(
-                    id='paises-dropdown',
-                    options=dropdown_paises,
-                    value='Mundo',
-                    placeholder='Selecione um país',
-                    className="dropdown"
-                ),
-            ]),
-
-            dbc.Row([
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardBody([
-                            html.Span('Bandeira'),
-                            html.H3(style={'color': '#adfc92'}, id='bandeira-text'),
-                            html.Img(id='bandeira-pais', style={'max-width': '100%', 'height': 'auto', 'box-shadow': '4px 4px 4px 4px rgba(66, 65, 65, 0.15)'})
-                        ])
-                    ], color='light', outline=True, className="info-card")
-                ], md=4),                
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardBody([
-                            html.Span('População'),
-                            html.H3(id='populacao-text', className="info-destaque"),
-                            html.Span("% da População Mundial"),
-                            html.H5(id='porcentagem-populacao-text', className='info-menor'),
-                        ])
-                    ], color='light', outline=True, className="info-card")
-                ], md=5),
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardBody([
-                            html.Span('Ranking IDH'),
-                            html.H3(id='idh-rank-text', className="info-destaque"),
-                            html.Span('IDH'),
-                            html.H5(id='idh-text', className='info-menor'),
-                        ])
-                    ], color='light', outline=True, className="info-card")
-                ], md=3),
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardBody([
-                            html.Div([
-                                html.Span('Capital:', className='tipo-info-adicional'),
-                                html.Span(id='capital-text', className='info-adicional-text'),                            
-                            ], className='card-info-adicional'),                            
-                            html.Div([
-                                html.Span('Renda Média (ano):', className='tipo-info-adicional'),
-                                html.Span(id='renda-text', className='info-adicional-text'),                            
-                            ], className='card-info-adicional'),                            
-                            html.Div([
-                                html.Span('Exp. Vida:', className='tipo-info-adicional'),
-                                html.Span(id='expectativa-text', className='info-adicional-text'),    
-                            ], className='card-info-adicional'),                            
-                            html.Div([
-                                html.Span('Área:', className='tipo-info-adicional'),
-                                html.Span(id='area-text', className='info-adicional-text'),    
-                            ], className='card-info-adicional'),
-                        ], className='info-adicional')
-                    ], color='light', outline=True, className="info-card")
-                ], md=12),              
-            ], className="info-row"),
-
-            html.Div([
-                html.P('Selecione o tipo de dado que deseja visualizar', className="input-label", style={'margin-top': '10px'}),
-                dcc.Dropdown(
-                    id='graficos-dropdown',
-                    value="",
-                    placeholder='Escolha o gráfico',
-                    className="dropdown"
-                ),
-
-                html.Br(),
+                    html.P('Selecione o tipo de dado que deseja visualizar', className="input-label", style={'margin-top': '10px'}),
+                    dcc.Dropdown(
+                        id='graficos-dropdown',
+                        value="",
+                        placeholder='Escolha o gráfico',
+                        className="dropdown"
+                    ),
+
+                    html.Br(),
+
+                    html.Div([
+                        dcc.Graph(id='grafico-selecionado', figure={})
+                    ], className='grafico-container')
+                ], className="chart-container"),
 
                 html.Div([
-                    dcc.Graph(id='grafico-selecionado', figure={})
-                ], className='grafico-container')
-            ], className="chart-container")
-        ], md=5, className="sidebar"),
-
-        dbc.Col([
-            html.Div([
-                dcc.RadioItems(
-                        id='radio-items',
-                        options=dropdown_opcoes_mapa,
-                        value='idh',   
+                    html.P('Compare países', className="input-label", style={'margin-top': '10px'}),
+                    dcc.Dropdown(
+                        id='comparacao-paises',
+                        options=estado.dropdown_paises[1:],
+                        value=[],
+                        multi=True,
+                        placeholder='Escolha os países',
+                        className="dropdown"
+                    ),
+                    dcc.Dropdown(
+                        id='comparacao-indicador',
+                        options=estado.dropdown_indicadores,
+                        value='Human Development Index',
+                        clearable=False,
+                        className="dropdown"
+                    ),
+                    dcc.RadioItems(
+                        id='comparacao-medida',
+                        options=opcoes_medida_comparacao,
+                        value='valor',
                         labelStyle={'display': 'inline-block', 'margin-right': '10px'}
-                ),
-            ], className='radio-container'),
-            dcc.Loading(id='loading', type='default', children=[dcc.Graph(id='choropleth-map', figure=fig_mapa, className='mapa')])        
-        ], md=7, className='map-col')
-    ], className="main-row"),
-    fluid=True, style={'width': '100%', 'height': '100vh', 'padding-right': '0px'}
-)
+                    ),
+                    dcc.RangeSlider(
+                        id='comparacao-anos',
+                        min=estado.ano_minimo,
+                        max=estado.ano_maximo,
+                        step=1,
+                        value=[estado.ano_minimo, estado.ano_maximo],
+                        marks={ano: str(ano) for ano in range(estado.ano_minimo, estado.ano_maximo + 1, 5)},
+                    ),
+
+                    html.Div([
+                        dcc.Graph(id='grafico-comparacao', figure=figura_vazia)
+                    ], className='grafico-container')
+                ], className="chart-container")
+            ], md=5, className="sidebar"),
+
+            dbc.Col([
+                html.Div([
+                    dcc.RadioItems(
+                            id='radio-items',
+                            options=dropdown_opcoes_mapa,
+                            value='idh',   
+                            labelStyle={'display': 'inline-block', 'margin-right': '10px'}
+                    ),
+                ], className='radio-container'),
+                html.Div([
+                    html.Button('▶', id='animar-mapa', className='botao-animar', title='Animar os anos'),
+                    html.Div([
+                        dcc.Slider(
+                            id='ano-mapa',
+                            min=estado.valores_mapa['idh']['anos'][0],
+                            max=estado.valores_mapa['idh']['anos'][-1],
+                            step=estado.valores_mapa['idh']['passo'],
+                            value=estado.valores_mapa['idh']['ano_padrao'],
+                            marks=estado.valores_mapa['idh']['marcas'],
+                            tooltip={'placement': 'top'},
+                            updatemode='drag',
+                        ),
+                    ], className='slider-anos'),
+                    dcc.Interval(id='intervalo-animacao', interval=intervalo_animacao_ms, disabled=True),
+                ], className='anos-container'),
+                dcc.Store(id='valores-mapa', data=estado.valores_mapa),
+                dcc.Store(id='niveis-mapa', data=estado.niveis_mapa),
+                dcc.Loading(id='loading', type='default', children=[dcc.Graph(id='choropleth-map', figure=estado.fig_mapa, className='mapa')])        
+            ], md=7, className='map-col')
+        ], className="main-row"),
+        fluid=True, style={'width': '100%', 'height': '100vh', 'padding-right': '0px'}
+    )
+
+def layout_atual():
+    # Com o layout em função, cada carregamento da página recebe a versão atual dos dados
+    return estado_atual().layout()
+
+def servir_layout():
+    return flask.Response(estado_atual().layout_json(), mimetype='application/json')
+
+inicio_layout = time.perf_counter()
+app.layout = layout_atual
+estado_atual().layout_json()
+# Substitui a rota do Dash, que serializaria o layout de novo a cada carregamento da página
+server.view_functions[app.config.routes_pathname_prefix + '_dash-layout'] = servir_layout
+cronometro.registrar('layout', time.perf_counter() - inicio_layout)
+
+if os.environ.get('INFO_MUNDO_TEMPOS'):
+    origem = 'snapshot' if estado_atual().snapshot_carregado else 'arquivos de origem'
+    print(f"Inicialização do Info Mundo (dados carregados de {origem}):\n{cronometro.relatorio()}", file=sys.stderr)
 
 # ================================================================
 # Conexão dos componentes com a geração dos gráficos
-@app.callback(
+# Troca de país feita no navegador, a partir dos textos dos cards calculados na inicialização
+app.clientside_callback(
+    ClientsideFunction(namespace='cards', function_name='selecionar_pais'),
     [
         Output(component_id='location-button', component_property='children'),
         Output(component_id='populacao-text', component_property='children'),
@@ -244,88 +461,19 @@ app.layout = dbc.Container(
         Output(component_id='graficos-dropdown', component_property='value'),
         Output(component_id='graficos-dropdown', component_property='options'),
         Output(component_id='bandeira-pais', component_property='src'),
+        Output(component_id='bandeira-pais', component_property='srcSet'),
+        Output(component_id='bandeira-pais-webp', component_property='srcSet'),
         Output(component_id='capital-text', component_property='children'),
         Output(component_id='renda-text', component_property='children'),
         Output(component_id='expectativa-text', component_property='children'),
         Output(component_id='area-text', component_property='children')
     ],
     [Input(component_id='paises-dropdown', component_property='value')],
+    [
+        State(component_id='dados-cards', component_property='data'),
+        State(component_id='graficos-dropdown', component_property='value'),
+    ],
 )
-def selecionar_pais(pais):
-    global pais_atual
-    global grafico
-
-    if pais is not None:
-        if pais == 'Mundo':
-            populacao_total = recorte_mundo['2022 Population'].sum()
-            populacao_formatada = '{:,}'.format(populacao_total).replace(',', '.')
-            porcentagem_populacao = '100%'
-            idh_rank = ' '
-            idh = ' '
-            grafico_atual = ''
-            caminho_bandeira = app.get_asset_url('bandeiras/world.png')
-            capital = ''
-
-            renda_valor = recorte_mundo['Gross National Income Per Capita (2021)'].sum()/len(info_mundo)
-            renda = "${:,.2f} USD".format(renda_valor)
-
-            expectativa_vida_valor = recorte_mundo['Life Expectancy at Birth (2021)'].sum()/len(info_mundo)
-            expectativa_vida = "{} anos".format(int(expectativa_vida_valor))
-
-            area = utils.formatar_area(510100000)
-
-            opcoes_dropdown_mundo = [
-                {'label': 'Distribuição da População Mundial por Região', 'value': 'mundo-populacao'},
-                {'label': 'Correlação entre o IDH e a expectativa de vida', 'value': 'mundo-idh-expectativa'},
-                {'label': 'Correlação entre a renda e a expectativa de vida', 'value': 'mundo-renda-expectativa'},
-            ]
-            return (pais, populacao_formatada, porcentagem_populacao, idh_rank, idh, grafico_atual,opcoes_dropdown_mundo, caminho_bandeira, capital,  renda, expectativa_vida, area) 
-        else:
-            if grafico.startswith('mundo'):
-                grafico = ''         
-            pais_atual = pais
-        
-            pais_selecionado = recorte_mundo[recorte_mundo['Country'] == pais]
-
-            populacao_total = f'{pais_selecionado["2022 Population"].values[0]:,}'.replace(",", ".")
-
-            porcentagem_populacao = f'{pais_selecionado["World Population Percentage"].values[0]:.2f}%'
-            idh_rank = pais_selecionado['HDI Rank (2021)'].values[0]
-            idh = pais_selecionado['Human Development Index (2021)'].values[0]
-
-            capital = pais_selecionado['Capital'].values[0]
-
-            renda_valor = pais_selecionado['Gross National Income Per Capita (2021)'].values[0]
-            renda = "${:,.2f} USD".format(renda_valor)
-
-            expectativa_vida_valor = pais_selecionado['Life Expectancy at Birth (2021)'].values[0]
-            expectativa_vida = "{} anos".format(int(expectativa_vida_valor))
-
-            area_valor = pais_selecionado['Area (km²)'].values[0]
-            area =  utils.formatar_area(area_valor)         
-
-            # Criação de uma variável global para renderizar o mesmo gráfico quando o pais for trocado
-            grafico_atual = grafico
-
-            # Busca a sigla do país para retornar o path da sua bandeira
-            nome_pais = pais_selecionado['Country'].values[0]
-            iso3_pais_selecionado = utils.buscar_pais_pelo_nome(recorte_mundo, nome_pais)
-            filtro_json = [feature for feature in json_paises['features'] if feature['id'] == iso3_pais_selecionado]
-            sigla_pais = filtro_json[0]['properties']['sigla']
-            bandeira_pais = utils.obter_caminho_bandeira(sigla_pais)
-            caminho_bandeira = app.get_asset_url(bandeira_pais)
-
-            opcoes_dropdown_pais = [
-                                        {'label': 'Evolução da População', 'value': 'evolucao_populacao'},
-                                        {'label': 'Evolução do IDH', 'value': 'evolucao_idh'},
-                                        {'label': 'Comparação da evolução do IDH pela região', 'value': 'comparacao_idh'},    
-                                        {'label': 'Evolução da Expectativa de Vida', 'value': 'evolucao_expectativa_vida'},
-                                        {'label': 'Evolução da Renda', 'value': 'evolucao_renda'},
-                                        ]
-
-            return (pais, populacao_total, porcentagem_populacao, idh_rank, idh, grafico_atual, opcoes_dropdown_pais, caminho_bandeira, capital, renda, expectativa_vida, area)
-    else:
-        return dash.no_update
 
 @app.callback(
     Output(component_id="grafico-selecionado", component_property="figure"),
@@ -334,57 +482,82 @@ def selecionar_pais(pais):
     ],
 )
 def mostrar_grafico_selecionado(tipo_grafico, pais):
-    global pais_atual
-    global grafico
+    # O callback não guarda estado entre requisições: o gráfico e o país vêm da própria página de cada usuário,
+    # então o resultado é o mesmo em qualquer worker/processo
+    estado = estado_atual()
 
     # Define uma figura vazia como valor padrão, caso contrário ao compilar o código, um erro será gerado, pois estamos tentando renderizar uma figura que não foi plotada, além disso, ao carregar a página, já plota um gráfico vazio padronizado.
-    fig=go.Figure()
-
-    grafico = tipo_grafico
-
-    pais_atual = pais
     if tipo_grafico == "":
-        fig = utils.padronizar_grafico(fig)
+        return figura_vazia
+    if pais is None:
+        return dash.no_update
+
+    # Os gráficos do mundo não dependem do país, então ficam em uma única entrada do cache
+    if tipo_grafico.startswith('mundo'):
+        pais = None
+    elif pais not in estado.registro.por_nome:
+        # País que saiu dos dados em uma recarga, pedido por uma página aberta antes dela
+        return figura_vazia
+    # A versão na chave impede que uma figura montada com os dados antigos, terminada depois da troca, seja servida com os novos
+    return cache_figuras.obter((estado.versao, tipo_grafico, pais), lambda: construir_grafico(estado, tipo_grafico, pais))
+
+def construir_grafico(estado, tipo_grafico, pais_atual):
+    cubo_indicadores = estado.cubo_indicadores
+    registro = estado.registro
+    if tipo_grafico == 'evolucao_idh':
+        fig = utils.plot_idh_pais(cubo_indicadores, pais_atual)
+    elif tipo_grafico == 'evolucao_expectativa_vida':
+        fig = utils.plot_expectativa_vida_pais(cubo_indicadores, pais_atual)
+    elif tipo_grafico in agrupamentos_comparacao:
+        agrupamento = agrupamentos_comparacao[tipo_grafico]
+        nome_regiao = registro.por_nome[pais_atual].grupos[agrupamento]
+        if nome_regiao is None:
+            # A opção não aparece para países sem grupo; uma requisição antiga recebe a figura vazia
+            return figura_vazia
+        paises_regiao = utils.obter_paises_vizinhos(registro, pais_atual, agrupamento)
+        fig = utils.plot_idh_por_regiao(cubo_indicadores, paises_regiao, nome_regiao, pais_atual)
+    elif tipo_grafico == 'comparacao_idh_vizinhos':
+        # Países com fronteira terrestre, completados com os mais próximos (ex.: ilhas)
+        paises_vizinhos = estado.grafo_vizinhos.vizinhos(pais_atual)
+        fig = utils.plot_idh_por_regiao(cubo_indicadores, paises_vizinhos, 'com os países vizinhos', pais_atual)
+    elif tipo_grafico == 'ranking_idh':
+        nome_regiao = registro.por_nome[pais_atual].grupos[estado.ranking.agrupamento]
+        fig = utils.plot_ranking_pais(estado.ranking, 'Human Development Index', pais_atual, nome_regiao, 'da posição no ranking do IDH')
+    elif tipo_grafico == 'evolucao_populacao':
+        fig = utils.evolucao_populacao(estado.recorte_mundo, registro, pais_atual)
+    elif tipo_grafico == 'evolucao_renda':
+        fig = utils.evolucao_renda(cubo_indicadores, pais_atual)
+    elif tipo_grafico == 'mundo-populacao':
+        fig = utils.distribuicao_populacao_mundo(estado.recorte_mundo)
+    elif tipo_grafico == 'mundo-idh-expectativa':
+        fig = utils.correlacao_idh_expectativa(estado.info_mundo)
+    elif tipo_grafico == 'mundo-renda-expectativa':
+        fig = utils.correlacao_renda_expectativa(estado.info_mundo)
     else:
-        fig = utils.padronizar_grafico(fig)
-        if pais_atual is not None:
-            copia_info_mundo = info_mundo.copy()
-
-            if tipo_grafico == 'evolucao_idh':
-                recorte_idh = copia_info_mundo.iloc[:,:37]
-                fig_idh = utils.plot_idh_pais(recorte_idh, pais_atual)
-                fig = fig_idh
-            elif tipo_grafico == 'evolucao_expectativa_vida':
-                recorte_expectativa_vida = copia_info_mundo.iloc[:, list(range(2)) + list(range(36,69))]
-                fig_expectativa_vida = utils.plot_expectativa_vida_pais(recorte_expectativa_vida, pais_atual)
-                fig = fig_expectativa_vida
-            elif tipo_grafico == 'comparacao_idh':
-                nome_regiao = recorte_mundo.loc[recorte_mundo['Country'] == pais_atual, 'UN Region'].values[0]
-                recorte_idh = copia_info_mundo.iloc[:,:37]
-                df_regiao = utils.obter_paises_vizinhos(recorte_idh, pais_atual)
-                fig = utils.plot_idh_por_regiao(df_regiao, nome_regiao, pais_atual)
-            elif tipo_grafico == 'evolucao_populacao':
-                copia_info_populacao = recorte_mundo.copy()
-                fig_populacao = utils.evolucao_populacao(copia_info_populacao, pais_atual)
-                fig = fig_populacao
-            elif tipo_grafico == 'evolucao_renda':
-                fig_renda = utils.evolucao_renda(info_mundo, pais_atual)
-                fig = fig_renda
-            elif tipo_grafico == 'mundo-populacao':
-                copia_info_populacao = recorte_mundo.copy()
-                fig_populacao_mundo = utils.distribuicao_populacao_mundo(recorte_mundo)
-                fig = fig_populacao_mundo
-            elif tipo_grafico == 'mundo-idh-expectativa':
-                fig_idh_expectativa = utils.correlacao_idh_expectativa(copia_info_mundo)
-                fig = fig_idh_expectativa
-            elif tipo_grafico == 'mundo-renda-expectativa':
-                fig_renda_expectativa = utils.correlacao_renda_expectativa(copia_info_mundo)
-                fig = fig_renda_expectativa
-        else:
-            return dash.no_update
-        
+        # A figura vazia só é criada para um tipo de gráfico desconhecido
+        fig = utils.padronizar_grafico(go.Figure())
+
     return fig
 
+@app.callback(
+    Output(component_id='grafico-comparacao', component_property='figure'),
+    [Input(component_id='comparacao-paises', component_property='value'),
+     Input(component_id='comparacao-indicador', component_property='value'),
+     Input(component_id='comparacao-anos', component_property='value'),
+     Input(component_id='comparacao-medida', component_property='value')],
+)
+def mostrar_comparacao(paises, indicador, intervalo_anos, medida='valor'):
+    # Qualquer conjunto de países, indicador e intervalo de anos; a figura é montada em menos de 1 ms
+    # mesmo com todos os países, então não passa pelo cache de figuras
+    estado = estado_atual()
+    paises = [pais for pais in paises or [] if pais in estado.registro.por_nome]
+    if not paises or indicador not in estado.cubo_indicadores.intervalo_anos:
+        return figura_vazia
+    if medida not in ('valor',) + indicadores.MEDIDAS_RANKING:
+        medida = 'valor'
+    ano_inicio, ano_fim = intervalo_anos or (None, None)
+    return utils.plot_comparacao_paises(estado.cubo_indicadores, indicador, paises, ano_inicio, ano_fim, estado.ranking, medida)
+
 @app.callback(
     Output('paises-dropdown', 'value'),
     [Input('choropleth-map', 'clickData')]
@@ -393,53 +566,123 @@ def update_location(click_data):
     changed_id = [p['prop_id'] for p in  dash.callback_context.triggered][0]
 
     if click_data is not None and changed_id != 'location-button.n_clicks':
+        registro = estado_atual().registro
         pais_iso3 = click_data['points'][0]['location']
-        pais_nome = utils.busca_pais_pelo_iso3(recorte_mundo, pais_iso3)
+        if pais_iso3 not in registro.por_iso3:
+            # Territórios do GeoJSON sem dados no dataset
+            return dash.no_update
+        pais_nome = utils.busca_pais_pelo_iso3(registro, pais_iso3)
         return pais_nome
     else:
         return None
 
-@app.callback(
-    [Output(component_id='choropleth-map', component_property='figure')],
-    [Input(component_id='radio-items', component_property='value')],
-)
-def update_map(opcao_mapa):
+def agendar_graficos_pais(pais, prefetch_sessao):
+    # Depois de escolher um país (ou o Mundo), o usuário quase sempre abre um dos gráficos dele.
+    # O dcc.Store guarda o token da sessão, para que o interesse no país anterior seja retirado só dela
+    sessao = (prefetch_sessao or {}).get('sessao') or uuid.uuid4().hex
+    estado = estado_atual()
+    if pais == 'Mundo':
+        graficos = [(opcao['value'], None) for opcao in opcoes_graficos['mundo']]
+    elif pais in estado.registro.por_nome:
+        indisponiveis = graficos_indisponiveis(estado.registro, pais)
+        graficos = [(opcao['value'], pais) for opcao in opcoes_graficos['pais'] if opcao['value'] not in indisponiveis]
+    else:
+        pais, graficos = None, []
+
+    tarefas = []
+    for tipo_grafico, pais_grafico in graficos:
+        # Mesma chave de mostrar_grafico_selecionado
+        chave = (estado.versao, tipo_grafico, pais_grafico)
+        if not cache_figuras.contem(chave):
+            construir = functools.partial(construir_grafico, estado, tipo_grafico, pais_grafico)
+            tarefas.append(functools.partial(cache_figuras.preencher, chave, construir))
+    agendador_prefetch.agendar(sessao, pais, tarefas)
+    return {'sessao': sessao, 'pais': pais}
+
+if agendador_prefetch is not None:
+    app.callback(
+        Output(component_id='prefetch-pais', component_property='data'),
+        [Input(component_id='paises-dropdown', component_property='value')],
+        [State(component_id='prefetch-pais', component_property='data')],
+    )(agendar_graficos_pais)
+
+def update_map(opcao_mapa, ano):
     if opcao_mapa is not None:
-        if opcao_mapa == 'idh':
-            opcao_escolhida = "Human Development Index (2021)"
-        elif opcao_mapa == 'populacao':
-            opcao_escolhida = "2022 Population"
-        elif opcao_mapa == 'renda':
-            opcao_escolhida = "Gross National Income Per Capita (2021)"
-        elif opcao_mapa == 'expectativa_vida':
-            opcao_escolhida = "Life Expectancy at Birth (2021)"
-
-        mapa = px.choropleth_mapbox(recorte_mundo, locations='ISO3', geojson=json_paises, color=opcao_escolhida,
-                                center={"lat": 14.778986, "lon": -15.723305}, zoom=2,
-                                color_continuous_scale='ylgn', opacity=0.4,
-                                hover_data={"Country": True}
-                                )
-        mapa.update_layout(
-            paper_bgcolor="#d4dadc",
-            autosize=True, # Preenche o tamanho inteiro da tela, ou ROW em que está inserido
-            margin=go.Margin(l=0, r=0, t=0, b=0), # Define a margem do mapa
-            showlegend=False,
-            mapbox_style='carto-positron'
-        )
-        mapa.update_coloraxes(colorbar=dict(len=0.5, yanchor='bottom', y=0))
-        mapa.update_layout(
-            coloraxis_colorbar=dict(
-                xanchor="left",  # Ancora a escala de cores à esquerda
-                yanchor="top",  # Ancora a escala de cores no topo
-                x=0.02,  # Define a posição horizontal da escala de cores em relação ao mapa
-                y=0.98  # Define a posição vertical da escala de cores em relação ao mapa
-            )
-        )
+        valores = estado_atual().valores_mapa[opcao_mapa]
+        indice = utils.indice_quadro(valores, valores['ano_padrao'] if ano is None else ano)
+
+        # Atualização parcial: apenas as cores, o hover e a escala são enviados, a geometria continua no navegador
+        mapa = dash.Patch()
+        mapa['data'][0]['z'] = valores['quadros'][indice]
+        mapa['data'][0]['hovertemplate'] = valores['hovertemplates'][indice]
+        mapa['layout']['coloraxis']['cmin'] = valores['cmin']
+        mapa['layout']['coloraxis']['cmax'] = valores['cmax']
+        mapa['layout']['coloraxis']['colorbar']['title']['text'] = valores['titulos'][indice]
 
         return [mapa]
     else:
         return dash.no_update
 
+# Limites e marcas do slider de anos da métrica escolhida. A população só tem alguns anos, então o slider para
+# apenas nas marcas
+app.clientside_callback(
+    ClientsideFunction(namespace='mapa', function_name='configurar_anos'),
+    [
+        Output(component_id='ano-mapa', component_property='min'),
+        Output(component_id='ano-mapa', component_property='max'),
+        Output(component_id='ano-mapa', component_property='step'),
+        Output(component_id='ano-mapa', component_property='marks'),
+        Output(component_id='ano-mapa', component_property='value'),
+    ],
+    Input(component_id='radio-items', component_property='value'),
+    State(component_id='valores-mapa', component_property='data'),
+    State(component_id='ano-mapa', component_property='value'),
+)
+
+# Animação: o botão liga e desliga o intervalo, e cada disparo do intervalo avança um ano no slider, que recolore
+# o mapa pelo mesmo caminho do arraste
+app.clientside_callback(
+    ClientsideFunction(namespace='mapa', function_name='animar'),
+    [
+        Output(component_id='ano-mapa', component_property='value', allow_duplicate=True),
+        Output(component_id='intervalo-animacao', component_property='disabled'),
+        Output(component_id='animar-mapa', component_property='children'),
+    ],
+    Input(component_id='animar-mapa', component_property='n_clicks'),
+    Input(component_id='intervalo-animacao', component_property='n_intervals'),
+    State(component_id='radio-items', component_property='value'),
+    State(component_id='ano-mapa', component_property='value'),
+    State(component_id='valores-mapa', component_property='data'),
+    State(component_id='intervalo-animacao', component_property='disabled'),
+    prevent_initial_call=True,
+)
+
+# Ao aproximar o mapa, troca a geometria pelo nível mais detalhado que o zoom pede, também por URL
+app.clientside_callback(
+    ClientsideFunction(namespace='mapa', function_name='trocar_nivel'),
+    Output(component_id='choropleth-map', component_property='figure', allow_duplicate=True),
+    Input(component_id='choropleth-map', component_property='relayoutData'),
+    State(component_id='niveis-mapa', component_property='data'),
+    State(component_id='choropleth-map', component_property='figure'),
+    prevent_initial_call=True,
+)
+
+if modo_mapa == 'servidor':
+    app.callback(
+        [Output(component_id='choropleth-map', component_property='figure')],
+        [Input(component_id='radio-items', component_property='value'),
+         Input(component_id='ano-mapa', component_property='value')],
+    )(update_map)
+else:
+    app.clientside_callback(
+        ClientsideFunction(namespace='mapa', function_name='atualizar_metrica'),
+        Output(component_id='choropleth-map', component_property='figure'),
+        Input(component_id='radio-items', component_property='value'),
+        Input(component_id='ano-mapa', component_property='value'),
+        State(component_id='valores-mapa', component_property='data'),
+        State(component_id='choropleth-map', component_property='figure'),
+    )
+
 # ------------------------------------------------------------------------------
 if __name__ == '__main__':
     app.run_server(debug=True)
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""Gera as versões redimensionadas das bandeiras usadas nos cards.
+
+Para cada PNG de static/bandeiras são gerados, em cada variante, um WebP e um PNG (fallback para
+navegadores sem WebP). Precisa do Pillow, usado apenas nesta etapa de build:
+
+    pip install Pillow
+    python bandeiras.py
+"""
+import os
+
+pasta_bandeiras = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'bandeiras')
+
+# Largura em pixels de cada variante. O card mostra a miniatura e usa a de detalhe em telas de alta densidade
+VARIANTES = {
+    'miniatura': 160,
+    'detalhe': 320,
+}
+FORMATOS = ('webp', 'png')
+QUALIDADE_WEBP = 80
+
+
+def caminho_variante(sigla, variante, formato):
+    return os.path.join(pasta_bandeiras, variante, f'{sigla}.{formato}')
+
+def urls_bandeira(sigla, url_asset):
+    """URLs usadas no card: o PNG da miniatura como src e os srcset (PNG e WebP) com todas as variantes.
+
+    Enquanto as variantes não forem geradas, o card usa a bandeira original."""
+    if not all(os.path.isfile(caminho_variante(sigla, variante, formato)) for variante in VARIANTES for formato in FORMATOS):
+        return {'src': url_asset(f'bandeiras/{sigla}.png'), 'srcset': '', 'srcset_webp': ''}
+
+    def srcset(formato):
+        return ', '.join(f"{url_asset(f'bandeiras/{variante}/{sigla}.{formato}')} {largura}w" for variante, largura in VARIANTES.items())
+
+    return {
+        'src': url_asset(f'bandeiras/miniatura/{sigla}.png'),
+        'srcset': srcset('png'),
+        'srcset_webp': srcset('webp'),
+    }
+
+def gerar_variantes():
+    from PIL import Image
+
+    tamanhos = {'original': 0, **{f'{variante}.{formato}': 0 for variante in VARIANTES for formato in FORMATOS}}
+    for variante in VARIANTES:
+        os.makedirs(os.path.join(pasta_bandeiras, variante), exist_ok=True)
+
+    for arquivo in sorted(os.listdir(pasta_bandeiras)):
+        if not arquivo.endswith('.png'):
+            continue
+        sigla = arquivo[:-len('.png')]
+        caminho = os.path.join(pasta_bandeiras, arquivo)
+        tamanhos['original'] += os.path.getsize(caminho)
+
+        with Image.open(caminho) as imagem:
+            imagem = imagem.convert('RGBA')
+            for variante, largura in VARIANTES.items():
+                altura = round(imagem.height * largura / imagem.width)
+                redimensionada = imagem.resize((largura, altura), Image.LANCZOS)
+
+                destino = caminho_variante(sigla, variante, 'webp')
+                redimensionada.save(destino, 'WEBP', quality=QUALIDADE_WEBP, method=6)
+                tamanhos[f'{variante}.webp'] += os.path.getsize(destino)
+
+                # Bandeiras têm poucas cores, então a paleta de 256 cores reduz bastante o PNG sem perda visível
+                destino = caminho_variante(sigla, variante, 'png')
+                redimensionada.quantize(colors=256, method=Image.FASTOCTREE).save(destino, 'PNG', optimize=True)
+                tamanhos[f'{variante}.png'] += os.path.getsize(destino)
+
+    return tamanhos
+
+
+if __name__ == '__main__':
+    for nome, tamanho in gerar_variantes().items():
+        print(f"{nome:<16}{tamanho:>12,} bytes")
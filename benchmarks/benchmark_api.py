@@ -0,0 +1,108 @@
+"""Mede as rotas de dados da API (api.py) com o cliente de teste do Flask, comparando com a mesma consulta no pandas.
+
+Para cada consulta, mede requisições por segundo:
+
+- rota em JSON e em Arrow (formato=arrow), montada a partir do cubo de indicadores
+- revalidação: a mesma requisição com If-None-Match do ETag recebido, que deve responder 304 sem corpo
+- pandas: filtro do info_mundo, melt das colunas "<indicador> (<ano>)", dropna e to_json(orient='records'),
+  o que cada requisição faria sem o cubo
+
+Também confere que todas as linhas de /api/series (lidas página a página) são iguais às do pandas.
+
+Uso: python benchmarks/benchmark_api.py [--segundos 2]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api  # noqa: E402
+import app  # noqa: E402
+
+COLUNA_ANO = re.compile(r'^(.+) \((\d{4})\)$')
+
+
+def series_pandas(info_mundo, indicadores=None, regiao=None):
+    df = info_mundo if regiao is None else info_mundo[info_mundo['UN Region'] == regiao]
+    colunas = [coluna for coluna in df.columns
+               if (encontrado := COLUNA_ANO.match(coluna)) and (indicadores is None or encontrado.group(1) in indicadores)]
+    longo = df.melt(id_vars=['Country', 'ISO3'], value_vars=colunas, var_name='coluna', value_name='valor').dropna(subset=['valor'])
+    partes = longo['coluna'].str.extract(COLUNA_ANO)
+    longo = longo.assign(indicador=partes[0], ano=partes[1].astype(int))
+    return longo.rename(columns={'Country': 'pais', 'ISO3': 'iso3'})[['pais', 'iso3', 'indicador', 'ano', 'valor']]
+
+def requisicoes_por_segundo(funcao, segundos):
+    quantidade, inicio = 0, time.perf_counter()
+    while time.perf_counter() - inicio < segundos:
+        funcao()
+        quantidade += 1
+    return quantidade / (time.perf_counter() - inicio)
+
+def ler_todas(cliente, url):
+    # Segue o campo 'proxima' até a última página
+    colunas = {}
+    while url:
+        corpo = cliente.get(url).get_json()
+        for nome, valores in corpo['colunas'].items():
+            colunas.setdefault(nome, []).extend(valores)
+        url = corpo['proxima']
+    return pd.DataFrame(colunas)
+
+def conferir(cliente, info_mundo):
+    da_api = ler_todas(cliente, f'/api/series?limite={api.LIMITE_LINHAS}')
+    do_pandas = series_pandas(info_mundo)
+    chaves = ['indicador', 'pais', 'ano']
+    da_api = da_api.sort_values(chaves).reset_index(drop=True)
+    do_pandas = do_pandas.sort_values(chaves).reset_index(drop=True)[da_api.columns]
+    iguais = (len(da_api) == len(do_pandas)
+              and (da_api[['pais', 'iso3', 'indicador']].to_numpy() == do_pandas[['pais', 'iso3', 'indicador']].to_numpy()).all()
+              and np.array_equal(da_api['ano'].to_numpy(), do_pandas['ano'].to_numpy())
+              and np.array_equal(da_api['valor'].to_numpy(), do_pandas['valor'].to_numpy()))
+    return len(da_api), len(do_pandas), iguais
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segundos', type=float, default=2)
+    args = parser.parse_args()
+
+    estado = app.estado_atual()
+    info_mundo = estado.info_mundo
+    cliente = app.server.test_client()
+
+    consultas = [
+        ('IDH, todos os países', 'indicador=Human Development Index',
+         lambda: series_pandas(info_mundo, {'Human Development Index'}).to_json(orient='records')),
+        ('todos os indicadores, Europa', 'regiao=Europe',
+         lambda: series_pandas(info_mundo, regiao='Europe').head(api.LIMITE_LINHAS_PADRAO).to_json(orient='records')),
+        (f'tudo, {api.LIMITE_LINHAS} linhas', f'limite={api.LIMITE_LINHAS}',
+         lambda: series_pandas(info_mundo).head(api.LIMITE_LINHAS).to_json(orient='records')),
+    ]
+    print(f"{'consulta':<32}{'linhas':>8}{'json req/s':>12}{'arrow req/s':>13}{'304 req/s':>11}{'pandas req/s':>14}")
+    for nome, parametros, pandas in consultas:
+        url = f'/api/series?{parametros}'
+        resposta = cliente.get(url)
+        etag = resposta.headers['ETag']
+        assert cliente.get(url, headers={'If-None-Match': etag}).status_code == 304
+        linhas = resposta.get_json()['quantidade']
+        json_rps = requisicoes_por_segundo(lambda: cliente.get(url), args.segundos)
+        arrow_rps = requisicoes_por_segundo(lambda: cliente.get(f'{url}&formato=arrow'), args.segundos) if api.pyarrow else float('nan')
+        revalidacao_rps = requisicoes_por_segundo(lambda: cliente.get(url, headers={'If-None-Match': etag}), args.segundos)
+        pandas_rps = requisicoes_por_segundo(pandas, args.segundos)
+        print(f'{nome:<32}{linhas:>8}{json_rps:>12.1f}{arrow_rps:>13.1f}{revalidacao_rps:>11.1f}{pandas_rps:>14.1f}')
+
+    tamanhos = {formato: len(cliente.get(f'/api/series?limite={api.LIMITE_LINHAS}&formato={formato}').data)
+                for formato in (['json', 'arrow'] if api.pyarrow else ['json'])}
+    print('\nTamanho de uma página de', api.LIMITE_LINHAS, 'linhas:', json.dumps({k: f'{v / 1e6:.1f} MB' for k, v in tamanhos.items()}))
+
+    linhas_api, linhas_pandas, iguais = conferir(cliente, info_mundo)
+    print(f'Linhas de /api/series: {linhas_api}, do pandas: {linhas_pandas}, iguais: {iguais}')
+    if not iguais:
+        sys.exit(1)
@@ -0,0 +1,259 @@
+"""Mede o custo de cada callback do app e compara com uma baseline salva.
+
+Os callbacks do servidor são chamados pelo mesmo endpoint usado pelo navegador (_dash-update-component),
+com o cliente de teste do Flask, para uma amostra de países de todas as regiões. Para cada caso são
+registrados o tempo (mínimo, mediana e p95), o pico de memória alocada e o tamanho da resposta:
+
+- mostrar_grafico_selecionado, para cada tipo de gráfico, com o cache de figuras vazio e com a figura já em cache
+- mostrar_comparacao, com 3, 50 e todos os países, e com todos os países na posição do ranking
+- update_map, para cada métrica do radio e para um ano do slider (o app é importado com INFO_MUNDO_MAPA=servidor
+  para registrá-lo)
+- update_location, com o clickData de um país do mapa
+- selecionar_pais roda no navegador (static/clientside.js); dele é medido apenas o tamanho dos dados dos cards
+
+Os resultados são gravados em JSON e comparados com benchmarks/baseline_callbacks.json. O script termina
+com erro quando algum caso passa dos limites de regressão. O tempo comparado é o mínimo das chamadas: a
+mediana de poucas chamadas oscila com o coletor de lixo e com outros processos, o mínimo não.
+
+Uso: python benchmarks/benchmark_callbacks.py [--repeticoes 7] [--saida resultados.json] [--atualizar-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.environ['INFO_MUNDO_MAPA'] = 'servidor'
+# Sem compressão, para que o tamanho registrado seja o do JSON gerado pelo callback
+os.environ['INFO_MUNDO_COMPRESSAO'] = '0'
+
+import app  # noqa: E402
+import dados  # noqa: E402
+
+caminho_baseline = os.path.join(project_root, 'benchmarks', 'baseline_callbacks.json')
+
+GRAFICOS_PAIS = ['evolucao_populacao', 'evolucao_idh', 'comparacao_idh', 'comparacao_idh_renda', 'comparacao_idh_vizinhos', 'ranking_idh', 'evolucao_expectativa_vida', 'evolucao_renda']
+GRAFICOS_MUNDO = ['mundo-populacao', 'mundo-idh-expectativa', 'mundo-renda-expectativa']
+
+# Limites de regressão em relação à baseline. O tempo varia bastante entre execuções, então só conta
+# como regressão quando piora na proporção e também em valor absoluto
+LIMITES = {
+    'tempo_minimo_ms': {'proporcao': 0.5, 'absoluto': 2.0},
+    'pico_memoria_kb': {'proporcao': 0.25, 'absoluto': 64.0},
+    'bytes': {'proporcao': 0.05, 'absoluto': 256.0},
+}
+# Limites próprios de alguns casos. O sunburst do Mundo sem cache ainda é montado pelo plotly.express (cerca de
+# 65 ms) e sente mais que os outros uma máquina que fica mais lenta durante a execução, depois da calibração
+LIMITES_CASOS = {
+    'mostrar_grafico_selecionado[mundo-populacao]': {'tempo_minimo_ms': {'proporcao': 1.0, 'absoluto': 2.0}},
+}
+# Casos com uma única requisição (os gráficos do Mundo, o mapa) são repetidos até este número de chamadas,
+# para que o mínimo seja tão estável quanto o dos casos com a amostra de países
+CHAMADAS_MINIMAS = 20
+
+
+def amostra_paises(registro):
+    """Primeiro país (em ordem alfabética) de cada região da ONU, mais alguns países grandes."""
+    paises = {'Brazil', 'China', 'India', 'United States'}
+    for membros in registro.membros['UN Region'].values():
+        paises.add(sorted(membros)[0])
+    return sorted(pais for pais in paises if pais in registro.por_nome)
+
+def requisicao_grafico(tipo_grafico, pais):
+    return {
+        'output': 'grafico-selecionado.figure',
+        'outputs': {'id': 'grafico-selecionado', 'property': 'figure'},
+        'inputs': [{'id': 'graficos-dropdown', 'property': 'value', 'value': tipo_grafico}],
+        'state': [{'id': 'paises-dropdown', 'property': 'value', 'value': pais}],
+        'changedPropIds': ['graficos-dropdown.value'],
+    }
+
+def requisicao_comparacao(paises, indicador='Human Development Index', intervalo_anos=(1990, 2021), medida='valor'):
+    return {
+        'output': 'grafico-comparacao.figure',
+        'outputs': {'id': 'grafico-comparacao', 'property': 'figure'},
+        'inputs': [
+            {'id': 'comparacao-paises', 'property': 'value', 'value': paises},
+            {'id': 'comparacao-indicador', 'property': 'value', 'value': indicador},
+            {'id': 'comparacao-anos', 'property': 'value', 'value': list(intervalo_anos)},
+            {'id': 'comparacao-medida', 'property': 'value', 'value': medida},
+        ],
+        'changedPropIds': ['comparacao-paises.value'],
+    }
+
+def requisicao_mapa(opcao, ano=None):
+    # Sem o ano, o mapa mostra o ano padrão da métrica
+    return {
+        'output': '..choropleth-map.figure..',
+        'outputs': [{'id': 'choropleth-map', 'property': 'figure'}],
+        'inputs': [
+            {'id': 'radio-items', 'property': 'value', 'value': opcao},
+            {'id': 'ano-mapa', 'property': 'value', 'value': ano},
+        ],
+        'changedPropIds': ['radio-items.value'],
+    }
+
+def requisicao_localizacao(iso3):
+    return {
+        'output': 'paises-dropdown.value',
+        'outputs': {'id': 'paises-dropdown', 'property': 'value'},
+        'inputs': [{'id': 'choropleth-map', 'property': 'clickData', 'value': {'points': [{'location': iso3}]}}],
+        'changedPropIds': ['choropleth-map.clickData'],
+    }
+
+def medir(cliente, corpos, repeticoes, antes=None):
+    """Chama o callback com cada corpo e retorna tempo, memória e tamanho da resposta."""
+    tempos = []
+    tamanhos = []
+    pico_memoria = 0
+    for corpo in corpos:
+        # A primeira chamada aquece os imports e caches internos do plotly e do Dash, que não fazem parte do custo do callback
+        if antes is not None:
+            antes()
+        cliente.post('/_dash-update-component', json=corpo)
+
+        # O pico de memória é medido em uma chamada separada, já que o tracemalloc deixa as chamadas mais lentas
+        if antes is not None:
+            antes()
+        tracemalloc.start()
+        cliente.post('/_dash-update-component', json=corpo)
+        pico_memoria = max(pico_memoria, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        for _ in range(max(repeticoes, -(-CHAMADAS_MINIMAS // len(corpos)))):
+            if antes is not None:
+                antes()
+            inicio = time.perf_counter()
+            resposta = cliente.post('/_dash-update-component', json=corpo)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+            if resposta.status_code not in (200, 204):
+                raise RuntimeError(f"{corpo['output']} respondeu {resposta.status_code}: {resposta.get_data(as_text=True)[:200]}")
+            tamanhos.append(len(resposta.get_data()))
+
+    tempos.sort()
+    return {
+        'chamadas': len(tempos),
+        'tempo_minimo_ms': round(tempos[0], 3),
+        'tempo_mediana_ms': round(statistics.median(tempos), 3),
+        'tempo_p95_ms': round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))], 3),
+        'pico_memoria_kb': round(pico_memoria / 1024, 1),
+        'bytes': round(statistics.mean(tamanhos)),
+    }
+
+def calibrar():
+    """Tempo de uma carga fixa, usado para descontar a diferença de velocidade entre a máquina (ou o momento) da baseline e a atual."""
+    tempos = []
+    for _ in range(15):
+        inicio = time.perf_counter()
+        json.dumps([{'x': list(range(200)), 'y': [i * 0.5 for i in range(200)]} for _ in range(200)])
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return round(min(tempos), 3)
+
+def executar(repeticoes):
+    cliente = app.server.test_client()
+    estado = app.estado_atual()
+    paises = amostra_paises(estado.registro)
+    resultados = {}
+
+    for tipo_grafico in GRAFICOS_PAIS + GRAFICOS_MUNDO:
+        corpos = [requisicao_grafico(tipo_grafico, 'Mundo' if tipo_grafico in GRAFICOS_MUNDO else pais) for pais in paises]
+        if tipo_grafico in GRAFICOS_MUNDO:
+            corpos = corpos[:1]
+        resultados[f'mostrar_grafico_selecionado[{tipo_grafico}]'] = medir(cliente, corpos, repeticoes, antes=app.cache_figuras.limpar)
+        resultados[f'mostrar_grafico_selecionado[{tipo_grafico}, cache]'] = medir(cliente, corpos, repeticoes)
+
+    todos_paises = [pais.nome for pais in estado.registro.paises]
+    for quantidade in (3, 50, len(todos_paises)):
+        resultados[f'mostrar_comparacao[{quantidade} países]'] = medir(cliente, [requisicao_comparacao(todos_paises[:quantidade])], repeticoes)
+    corpo = requisicao_comparacao(todos_paises, medida='posicao')
+    resultados[f'mostrar_comparacao[{len(todos_paises)} países, posição]'] = medir(cliente, [corpo], repeticoes)
+
+    for opcao in dados.opcoes_mapa:
+        resultados[f'update_map[{opcao}]'] = medir(cliente, [requisicao_mapa(opcao)], repeticoes)
+    resultados['update_map[idh, 1990]'] = medir(cliente, [requisicao_mapa('idh', 1990)], repeticoes)
+
+    corpos = [requisicao_localizacao(estado.registro.por_nome[pais].iso3) for pais in paises]
+    resultados['update_location'] = medir(cliente, corpos, repeticoes)
+
+    cards = estado.dados_cards['cards']
+    resultados['selecionar_pais (dados dos cards)'] = {
+        'bytes': len(json.dumps(estado.dados_cards)),
+        'bytes_por_pais': round(statistics.mean(len(json.dumps(cards[pais])) for pais in paises)),
+    }
+
+    return {
+        'ambiente': {
+            'python': platform.python_version(), 'plataforma': platform.platform(),
+            'repeticoes': repeticoes, 'paises': paises, 'calibracao_ms': calibrar(),
+        },
+        'resultados': resultados,
+    }
+
+def comparar(atual, baseline):
+    """Retorna as linhas do relatório e a lista de regressões em relação à baseline."""
+    linhas = []
+    regressoes = []
+    # Os tempos são comparados já corrigidos pela calibração das duas execuções
+    fator_tempo = atual['ambiente']['calibracao_ms'] / baseline['ambiente']['calibracao_ms']
+    for caso, metricas in atual['resultados'].items():
+        anterior = baseline['resultados'].get(caso, {})
+        for metrica, valor in metricas.items():
+            if metrica not in LIMITES:
+                continue
+            if metrica not in anterior:
+                linhas.append(f'{caso:<64}{metrica:<18}{valor:>12}{"(novo)":>14}')
+                continue
+            base = anterior[metrica]
+            if metrica.startswith('tempo'):
+                base = round(base * fator_tempo, 3)
+            variacao = (valor - base) / base if base else 0.0
+            limite = LIMITES_CASOS.get(caso, {}).get(metrica, LIMITES[metrica])
+            regrediu = valor - base > limite['absoluto'] and variacao > limite['proporcao']
+            marca = '  REGRESSÃO' if regrediu else ''
+            linhas.append(f'{caso:<64}{metrica:<18}{valor:>12}{variacao:>+13.0%}{marca}')
+            if regrediu:
+                regressoes.append(f'{caso} {metrica}: {base} -> {valor} ({variacao:+.0%})')
+    return linhas, regressoes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=7)
+    parser.add_argument('--saida', help='arquivo JSON onde os resultados são gravados')
+    parser.add_argument('--baseline', default=caminho_baseline)
+    parser.add_argument('--atualizar-baseline', action='store_true', help='grava os resultados como a nova baseline')
+    args = parser.parse_args()
+
+    atual = executar(args.repeticoes)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(atual, f, indent=2, ensure_ascii=False)
+    if args.atualizar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(atual, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f'Baseline gravada em {args.baseline}')
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(json.dumps(atual['resultados'], indent=2, ensure_ascii=False))
+        print(f'Sem baseline em {args.baseline}; rode com --atualizar-baseline para criá-la')
+        sys.exit(0)
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    linhas, regressoes = comparar(atual, baseline)
+    print(f"Calibração: {atual['ambiente']['calibracao_ms']} ms (baseline {baseline['ambiente']['calibracao_ms']} ms)")
+    print(f'{"caso":<64}{"métrica":<18}{"valor":>12}{"vs baseline":>14}')
+    print('\n'.join(linhas))
+    if regressoes:
+        print(f'\n{len(regressoes)} regressões:')
+        print('\n'.join(regressoes))
+        sys.exit(1)
+    print('\nNenhuma regressão em relação à baseline')
@@ -0,0 +1,142 @@
+"""Compara a montagem dos gráficos com o plotly.express (implementação anterior) e direto como dict (figuras.py).
+
+Para cada gráfico mede o tempo de construção + serialização em JSON e confere, para todos os países, que as
+duas versões geram a mesma figura. A única diferença aceita é o trace vazio que o px.line(title=...) criava
+no gráfico de comparação por região, que não aparece no gráfico.
+
+Uso: python benchmarks/benchmark_figuras.py [--repeticoes 20]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import figuras  # noqa: E402
+import utils  # noqa: E402
+
+
+# Implementações anteriores, mantidas apenas como referência de comparação
+
+def anterior_serie_pais(cubo, indicador, nome_pais, titulo_eixo, metrica):
+    anos, valores = cubo.serie(indicador, nome_pais)
+    df_serie = pd.DataFrame({'Ano': anos, 'Valor': valores})
+    fig = px.line(df_serie, x='Ano', y='Valor', title=f'Evolução {metrica}: {nome_pais}', color_discrete_sequence=['#258c03'])
+    fig.update_yaxes(title=titulo_eixo)
+    return utils.padronizar_grafico_pais(fig, metrica, nome_pais)
+
+def anterior_idh_por_regiao(cubo, paises_regiao, nome_regiao, nome_pais):
+    fig = px.line(title=f'Evolução do IDH na região: {nome_regiao}')
+    paises_regiao = list(paises_regiao)
+    if nome_pais not in paises_regiao:
+        paises_regiao.append(nome_pais)
+    anos, valores_regiao = cubo.series('Human Development Index', paises_regiao)
+    posicao_pais = paises_regiao.index(nome_pais)
+    valores_fundo = np.delete(valores_regiao, posicao_pais, axis=0)
+    nomes_fundo = np.delete(np.array(paises_regiao, dtype=object), posicao_pais)
+    x_fundo = np.tile(np.append(anos, anos[-1]), len(valores_fundo))
+    y_fundo = np.hstack([valores_fundo, np.full((len(valores_fundo), 1), np.nan)]).ravel()
+    fig.add_trace(go.Scatter(x=x_fundo, y=y_fundo, customdata=np.repeat(nomes_fundo, len(anos) + 1), name='', mode='lines',
+                             line=dict(color='lightgray'), hovertemplate="%{customdata}: %{y:.2f}", showlegend=False))
+    fig.add_trace(go.Scatter(x=anos, y=valores_regiao[posicao_pais], name=nome_pais, line=dict(width=3, color='green'), hovertemplate=f"{nome_pais}: %{{y:.2f}}"))
+    fig.update_layout(legend=dict(x=0, y=1, xanchor='left', yanchor='top'), xaxis_title='Ano', yaxis_title='IDH')
+    return utils.padronizar_grafico_pais(fig, 'do IDH {}'.format(nome_regiao), nome_pais)
+
+def anterior_evolucao_populacao(df, nome_pais):
+    anos = ['1970', '1980', '1990', '2000', '2010', '2015', '2020', '2022']
+    df_pais = df[df['Country'] == nome_pais]
+    df_grafico = df_pais[['ISO3'] + [ano + ' Population' for ano in anos]].copy()
+    df_grafico.columns = ['ISO3'] + [ano[:4] for ano in anos]
+    df_grafico = df_grafico.melt(id_vars='ISO3', var_name='Ano', value_name='População')
+    fig = px.bar(df_grafico, x='Ano', y='População', color='ISO3', title='População por Ano', color_discrete_sequence=['#258c03'])
+    return utils.padronizar_grafico_pais(fig, 'da População', nome_pais)
+
+def anterior_correlacao(df, coluna_x, titulo, titulo_x, autosize=True):
+    fig = px.scatter(df, x=coluna_x, y='Life Expectancy at Birth (2021)', title=titulo, color='UN Region', hover_data=['Life Expectancy at Birth (2021)', 'Country'])
+    fig = utils.padronizar_grafico(fig)
+    if not autosize:
+        fig.update_layout(autosize=False, width=900, height=500)
+    fig.update_xaxes(title=titulo_x)
+    fig.update_yaxes(title='Expectativa de Vida')
+    return fig
+
+
+def graficos(cubo, df, registro, info_mundo):
+    """Pares (implementação anterior, implementação atual) de cada gráfico, em função do país."""
+    def regiao(nome_pais):
+        return registro.por_nome[nome_pais].grupos['UN Region']
+
+    return {
+        'evolucao_idh': (
+            lambda pais: anterior_serie_pais(cubo, 'Human Development Index', pais, 'IDH', 'do IDH'),
+            lambda pais: utils.plot_idh_pais(cubo, pais)),
+        'evolucao_expectativa_vida': (
+            lambda pais: anterior_serie_pais(cubo, 'Life Expectancy at Birth', pais, 'Expectativa de Vida', 'da Expectativa de Vida'),
+            lambda pais: utils.plot_expectativa_vida_pais(cubo, pais)),
+        'evolucao_renda': (
+            lambda pais: anterior_serie_pais(cubo, 'Gross National Income Per Capita', pais, 'Renda Per Capita', 'da Renda'),
+            lambda pais: utils.evolucao_renda(cubo, pais)),
+        'evolucao_populacao': (
+            lambda pais: anterior_evolucao_populacao(df, pais),
+            lambda pais: utils.evolucao_populacao(df, registro, pais)),
+        'comparacao_idh': (
+            lambda pais: anterior_idh_por_regiao(cubo, utils.obter_paises_vizinhos(registro, pais), regiao(pais), pais),
+            lambda pais: utils.plot_idh_por_regiao(cubo, utils.obter_paises_vizinhos(registro, pais), regiao(pais), pais)),
+        'mundo-idh-expectativa': (
+            lambda pais: anterior_correlacao(info_mundo, 'Human Development Index (2021)', 'Correlação entre o IDH e Expectativa de Vida', 'IDH'),
+            lambda pais: utils.correlacao_idh_expectativa(info_mundo)),
+        'mundo-renda-expectativa': (
+            lambda pais: anterior_correlacao(info_mundo, 'Gross National Income Per Capita (2021)', 'Correlação entre a Renda Per Capita e Expectativa de Vida', 'Renda Per Capita', autosize=False),
+            lambda pais: utils.correlacao_renda_expectativa(info_mundo)),
+    }
+
+def medir(funcao, pais, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        texto = figuras.para_json(funcao(pais))
+    return (time.perf_counter() - inicio) / repeticoes * 1000, len(texto)
+
+def conferir(nome, anterior, atual, paises):
+    """Retorna os países em que as duas implementações geram figuras diferentes."""
+    diferentes = []
+    for pais in paises:
+        esperado = json.loads(anterior(pais).to_json())
+        obtido = json.loads(figuras.para_json(atual(pais)))
+        if nome == 'comparacao_idh':
+            # Trace vazio criado pelo px.line(title=...)
+            esperado['data'] = esperado['data'][1:]
+        if esperado != obtido:
+            diferentes.append(pais)
+    return diferentes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    estado = app.estado_atual()
+    paises = [pais.nome for pais in estado.registro.paises]
+    pares = graficos(estado.cubo_indicadores, estado.recorte_mundo, estado.registro, estado.info_mundo)
+
+    print(f"{'gráfico':<28}{'plotly.express (ms)':>21}{'dict (ms)':>12}{'ganho':>9}{'bytes':>10}  conferência")
+    falhas = 0
+    for nome, (anterior, atual) in pares.items():
+        amostra = paises[:1] if nome.startswith('mundo') else paises
+        tempo_anterior, _ = medir(anterior, 'Brazil', args.repeticoes)
+        tempo_atual, tamanho = medir(atual, 'Brazil', args.repeticoes)
+        diferentes = conferir(nome, anterior, atual, amostra)
+        falhas += len(diferentes)
+        conferencia = f'{len(amostra)} iguais' if not diferentes else f'{len(diferentes)} diferentes: {", ".join(diferentes[:5])}'
+        print(f"{nome:<28}{tempo_anterior:>21.2f}{tempo_atual:>12.3f}{tempo_anterior / tempo_atual:>8.0f}x{tamanho:>10,}  {conferencia}")
+
+    if falhas:
+        sys.exit(1)
@@ -0,0 +1,82 @@
+"""Compara a geometria do mapa servida por URL (o padrão) com a geometria embutida na figura do layout.
+
+Com o cliente de teste do Flask e brotli, mede os bytes baixados pelo navegador:
+
+- primeira visita: /_dash-layout e o nível da geometria do zoom inicial
+- visita seguinte: o layout revalidado com o ETag (304) ou, depois de uma recarga dos dados, baixado de novo,
+  com a geometria já em cache quando vem por URL (versionada e imutável)
+- zoom: cada nível mais detalhado, baixado só quando o usuário aproxima o mapa até ele
+
+Também mede o tempo de serializar o layout com a geometria embutida e por URL.
+
+Uso: python benchmarks/benchmark_geometria_mapa.py [--repeticoes 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plotly.io as pio  # noqa: E402
+
+import app  # noqa: E402
+import compressao  # noqa: E402
+
+BROTLI = {'Accept-Encoding': 'br'}
+
+
+def layout_embutido(estado):
+    # Layout da página com a figura original, que leva o GeoJSON do nível inicial dentro do trace
+    fig_mapa = estado.fig_mapa
+    estado.fig_mapa = dict(fig_mapa, data=[dict(fig_mapa['data'][0], geojson=estado.json_mapa)] + fig_mapa['data'][1:])
+    try:
+        return app.montar_layout(estado)
+    finally:
+        estado.fig_mapa = fig_mapa
+
+def medir_ms(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), resultado
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    estado = app.estado_atual()
+    cliente = app.server.test_client()
+    if not estado.niveis_mapa:
+        sys.exit('Os níveis da geometria não foram gerados: rode `python geometria.py`')
+
+    tempo_embutido, texto_embutido = medir_ms(lambda: pio.json.to_json_plotly(layout_embutido(estado)).encode(), args.repeticoes)
+    tempo_url, texto_url = medir_ms(lambda: pio.json.to_json_plotly(app.montar_layout(estado)).encode(), args.repeticoes)
+    embutido = len(compressao.comprimir(texto_embutido, 'br'))
+
+    resposta = cliente.get('/_dash-layout', headers=BROTLI)
+    layout_url = len(resposta.data)
+    revalidacao = cliente.get('/_dash-layout', headers=dict(BROTLI, **{'If-None-Match': resposta.headers['ETag']}))
+    geometrias = {}
+    for nivel in estado.niveis_mapa:
+        resposta_nivel = cliente.get(nivel['url'], headers=BROTLI)
+        geometrias[nivel['nivel']] = (len(resposta_nivel.data), resposta_nivel.headers.get('Cache-Control'))
+    inicial = geometrias[estado.niveis_mapa[0]['nivel']][0]
+
+    print(f"{'':<34}{'embutida KB':>13}{'por URL KB':>12}")
+    print(f"{'primeira visita':<34}{embutido / 1024:>13.1f}{(layout_url + inicial) / 1024:>12.1f}")
+    print(f"{'visita seguinte, mesmos dados':<34}{len(revalidacao.data) / 1024:>13.1f}{len(revalidacao.data) / 1024:>12.1f}"
+          f"   (layout {revalidacao.status_code})")
+    # Depois de uma recarga o layout muda e é baixado de novo; por URL, a geometria continua no cache
+    print(f"{'visita seguinte, dados recarregados':<34}{embutido / 1024:>13.1f}{layout_url / 1024:>12.1f}")
+    print(f"{'layout sem compressão':<34}{len(texto_embutido) / 1024:>13.1f}{len(texto_url) / 1024:>12.1f}")
+    print(f"{'serialização do layout (ms)':<34}{tempo_embutido:>13.1f}{tempo_url:>12.1f}")
+    print('\nNíveis da geometria (brotli):')
+    for nivel in estado.niveis_mapa:
+        tamanho, cache = geometrias[nivel['nivel']]
+        print(f"  {nivel['nivel']:<12} até o zoom {nivel['zoom_maximo']:.1f}: {tamanho / 1024:>7.1f} KB  {cache}")
@@ -0,0 +1,115 @@
+"""Compara a localização do país de um ponto pelo índice espacial (indice_espacial.py) com a varredura de todas as features.
+
+Mede, em µs por ponto:
+
+- varredura: teste do ponto em cada anel de cada feature, até achar o país (o que seria feito sem o índice)
+- varredura com retângulos: o mesmo, pulando as features cujo retângulo envolvente não contém o ponto
+- índice, um ponto por chamada (IndicePaises.localizar) e em lote (IndicePaises.localizar_varios)
+
+Também confere que o índice e a varredura encontram o mesmo país nos dois conjuntos de pontos, e que as
+coordenadas de longitude-latitude.csv caem no país esperado. Termina com erro se algum ponto divergir da varredura.
+
+Uso: python benchmarks/benchmark_indice_espacial.py [--pontos 20000] [--pontos-varredura 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geometria  # noqa: E402
+import indice_espacial  # noqa: E402
+
+
+def aneis_features(json_paises):
+    # Anéis de cada feature como arrays, agrupados por polígono, e o retângulo envolvente da feature
+    features = []
+    for feature in json_paises['features']:
+        geometria_feature = feature['geometry']
+        poligonos = [geometria_feature['coordinates']] if geometria_feature['type'] == 'Polygon' else geometria_feature['coordinates']
+        aneis = [[np.asarray(anel, dtype=float)[:, :2] for anel in poligono] for poligono in poligonos]
+        pontos = np.vstack([anel for poligono in aneis for anel in poligono])
+        features.append((feature['id'], aneis, pontos.min(axis=0), pontos.max(axis=0)))
+    return features
+
+def dentro_anel(anel, x, y):
+    x1, y1 = anel[:-1].T
+    x2, y2 = anel[1:].T
+    cruza = (y1 <= y) != (y2 <= y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_intersecao = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return np.count_nonzero(cruza & (x_intersecao > x)) % 2 == 1
+
+def varredura(features, lat, lon, retangulos=False):
+    for iso3, aneis, minimo, maximo in features:
+        if retangulos and not (minimo[0] <= lon <= maximo[0] and minimo[1] <= lat <= maximo[1]):
+            continue
+        for poligono in aneis:
+            # Dentro do contorno externo e fora dos buracos: número ímpar de anéis contendo o ponto
+            if sum(dentro_anel(anel, lon, lat) for anel in poligono) % 2 == 1:
+                return iso3
+    return None
+
+def medir(funcao, quantidade):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, (time.perf_counter() - inicio) / quantidade * 1e6
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pontos', type=int, default=20000, help='pontos sorteados para o índice')
+    parser.add_argument('--pontos-varredura', type=int, default=500, help='pontos (dos sorteados) usados na varredura, bem mais lenta')
+    args = parser.parse_args()
+
+    json_paises = geometria.carregar_geojson_original()
+    inicio = time.perf_counter()
+    indice = indice_espacial.IndicePaises(json_paises)
+    construcao = time.perf_counter() - inicio
+    celulas_fronteira = np.count_nonzero(np.diff(indice.inicio_celula))
+    print(f'Índice: {len(indice.ids)} features, {len(indice.arestas)} arestas, grade {indice.linhas}x{indice.colunas} '
+          f'({celulas_fronteira} células com fronteira), construído em {construcao * 1000:.0f} ms')
+
+    # Pontos sorteados na faixa de latitudes com países, e pontos perto das fronteiras (vértices deslocados), o pior
+    # caso do índice: quase todos caem em células com fronteira
+    gerador = np.random.default_rng(0)
+    vertices = indice.arestas[gerador.integers(0, len(indice.arestas), args.pontos), :2]
+    conjuntos = {
+        'sorteados': (gerador.uniform(-60, 85, args.pontos), gerador.uniform(-180, 180, args.pontos)),
+        'perto das fronteiras': (vertices[:, 1] + gerador.normal(0, 0.01, args.pontos), vertices[:, 0] + gerador.normal(0, 0.01, args.pontos)),
+    }
+
+    features = aneis_features(json_paises)
+    divergencias = 0
+    print(f"\n{'pontos':<22}{'método':<34}{'µs por ponto':>14}{'vs varredura':>14}")
+    for nome_conjunto, (lats, lons) in conjuntos.items():
+        amostra = range(min(args.pontos_varredura, len(lats)))
+        esperado, tempo_varredura = medir(lambda: [varredura(features, lats[i], lons[i]) for i in amostra], len(amostra))
+        _, tempo_retangulos = medir(lambda: [varredura(features, lats[i], lons[i], retangulos=True) for i in amostra], len(amostra))
+        individual, tempo_individual = medir(lambda: [indice.localizar(lat, lon) for lat, lon in zip(lats.tolist(), lons.tolist())], len(lats))
+        lote, tempo_lote = medir(lambda: indice.ids_varios(lats, lons), len(lats))
+
+        for nome, tempo in [('varredura', tempo_varredura), ('varredura com retângulos', tempo_retangulos),
+                            ('índice, um ponto por chamada', tempo_individual), (f'índice, lote de {len(lats)}', tempo_lote)]:
+            print(f'{nome_conjunto:<22}{nome:<34}{tempo:>14.2f}{tempo_varredura / tempo:>13.0f}x')
+
+        diferentes = [i for i in amostra if esperado[i] != lote[i]] + [i for i in range(len(lats)) if individual[i] != lote[i]]
+        for i in diferentes[:10]:
+            print(f'  divergência em ({lats[i]:.5f}, {lons[i]:.5f}): varredura {esperado[i] if i in amostra else "-"}, '
+                  f'individual {individual[i]}, lote {lote[i]}')
+        divergencias += len(diferentes)
+    print(f'\nDivergências: {divergencias} (índice x varredura e individual x lote)')
+
+    # As coordenadas de cada país no CSV são um ponto representativo, às vezes no mar (ilhas) ou fora do GeoJSON
+    df = pd.read_csv(os.path.join(geometria.pasta_dados, 'longitude-latitude.csv'), keep_default_na=False, na_values=[''])
+    encontrados = indice.ids_varios(df['Latitude'], df['Longitude'])
+    acertos = sum(encontrado == iso3 for encontrado, iso3 in zip(encontrados, df['ISO-ALPHA-3']))
+    fora = sum(encontrado is None for encontrado in encontrados)
+    print(f'longitude-latitude.csv: {acertos} de {len(df)} no país esperado, {fora} fora de todos os países')
+
+    if divergencias:
+        sys.exit(1)
@@ -0,0 +1,64 @@
+"""Mede o custo da troca de ano no mapa com os quadros pré-calculados, comparando com reconstruir a figura no servidor.
+
+Para cada métrica do radio:
+
+- quadros: tamanho dos valores de todos os anos (dcc.Store valores-mapa), em JSON e com brotli, enviados uma vez
+  com o layout
+- Patch: tamanho da resposta do update_map (INFO_MUNDO_MAPA=servidor) para um ano
+- reconstrução: tempo e tamanho de montar de novo a figura do ano com o px.choropleth_mapbox, com a geometria,
+  o que cada troca de ano custaria sem os quadros
+
+No modo padrão, a troca de ano roda no navegador (static/clientside.js) e não gera requisições.
+
+Uso: python benchmarks/benchmark_mapa_anos.py [--repeticoes 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault('INFO_MUNDO_MAPA', 'servidor')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plotly.io as pio  # noqa: E402
+
+import app  # noqa: E402
+import compressao  # noqa: E402
+import dados  # noqa: E402
+from benchmark_callbacks import requisicao_mapa  # noqa: E402
+
+
+def reconstruir_figura(estado, opcao, indice):
+    # Figura inteira de um ano: o recorte com a coluna do ano e a geometria, como o app fazia antes dos quadros
+    valores = estado.valores_mapa[opcao]
+    df = estado.recorte_mundo.copy()
+    df[dados.opcoes_mapa['idh']] = valores['quadros'][indice]
+    figura = dados.criar_figura_mapa(df, estado.json_mapa, {'idh': dict(valores, ano_padrao=valores['anos'][indice])})
+    return pio.json.to_json_plotly(figura.to_dict())
+
+def medir_ms(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), resultado
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    estado = app.estado_atual()
+    cliente = app.server.test_client()
+    print(f"{'métrica':<18}{'anos':>6}{'quadros KB':>12}{'brotli KB':>11}{'Patch KB':>10}{'reconstrução ms':>17}{'figura KB':>11}")
+    for opcao, valores in estado.valores_mapa.items():
+        texto = json.dumps(valores).encode()
+        ano = valores['anos'][0]
+        patch = cliente.post('/_dash-update-component', json=requisicao_mapa(opcao, ano)).data
+        tempo, figura = medir_ms(lambda: reconstruir_figura(estado, opcao, 0), args.repeticoes)
+        print(f"{opcao:<18}{len(valores['anos']):>6}{len(texto) / 1024:>12.1f}{len(compressao.comprimir(texto, 'br')) / 1024:>11.1f}"
+              f"{len(patch) / 1024:>10.1f}{tempo:>17.1f}{len(figura) / 1024:>11.1f}")
@@ -0,0 +1,81 @@
+"""Mede o ganho do prefetch dos gráficos de um país (INFO_MUNDO_PREFETCH) no tempo de resposta do gráfico.
+
+Para uma amostra de países e para o Mundo, compara o tempo de mostrar_grafico_selecionado em três situações:
+
+- sem prefetch: o gráfico é construído quando o usuário o escolhe (cache de figuras vazio)
+- com prefetch: o país é escolhido, o gráfico é pedido depois de --espera ms (o tempo de o usuário abrir o dropdown)
+- troca rápida: o usuário passa por vários países antes de escolher o gráfico do último; as tarefas dos países
+  anteriores devem ser canceladas e não atrasar o gráfico pedido
+
+Uso: python benchmarks/benchmark_prefetch.py [--repeticoes 3] [--espera 300]
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ['INFO_MUNDO_PREFETCH'] = '1'
+
+from benchmark_callbacks import GRAFICOS_MUNDO, GRAFICOS_PAIS, amostra_paises, requisicao_grafico  # noqa: E402
+
+import app  # noqa: E402
+
+
+def requisicao_selecao(pais, sessao='benchmark'):
+    # O dcc.Store prefetch-pais guarda o token da sessão, que o servidor usa para retirar o interesse no país anterior
+    return {
+        'output': 'prefetch-pais.data',
+        'outputs': {'id': 'prefetch-pais', 'property': 'data'},
+        'inputs': [{'id': 'paises-dropdown', 'property': 'value', 'value': pais}],
+        'state': [{'id': 'prefetch-pais', 'property': 'data', 'value': {'sessao': sessao}}],
+        'changedPropIds': ['paises-dropdown.value'],
+    }
+
+def tempo_grafico(cliente, tipo_grafico, pais):
+    inicio = time.perf_counter()
+    resposta = cliente.post('/_dash-update-component', json=requisicao_grafico(tipo_grafico, pais))
+    if resposta.status_code != 200:
+        raise RuntimeError(f'{tipo_grafico} de {pais} respondeu {resposta.status_code}')
+    return (time.perf_counter() - inicio) * 1000
+
+def medir(cliente, paises, repeticoes, espera, prefetch=True, anteriores=0):
+    """Tempo (ms) de cada gráfico, pedido `espera` ms depois de escolher o país (e antes, os `anteriores` países seguintes da lista).
+
+    Sem prefetch, a escolha do país não é enviada ao servidor, mas a espera é mantida para que as medições sejam comparáveis."""
+    tempos = {tipo_grafico: [] for tipo_grafico in GRAFICOS_PAIS + GRAFICOS_MUNDO}
+    for _ in range(repeticoes):
+        for posicao, pais in enumerate(paises):
+            for tipo_grafico in GRAFICOS_MUNDO if pais == 'Mundo' else GRAFICOS_PAIS:
+                app.cache_figuras.limpar()
+                if prefetch:
+                    caminho = [paises[(posicao + passo) % len(paises)] for passo in range(1, anteriores + 1)] + [pais]
+                    for selecionado in caminho:
+                        cliente.post('/_dash-update-component', json=requisicao_selecao(selecionado))
+                time.sleep(espera / 1000)
+                tempos[tipo_grafico].append(tempo_grafico(cliente, tipo_grafico, pais))
+                if prefetch:
+                    # Limpa a seleção, para que o país não continue contando como visto
+                    cliente.post('/_dash-update-component', json=requisicao_selecao(None))
+                    app.agendador_prefetch.aguardar()
+    return {tipo_grafico: statistics.median(valores) for tipo_grafico, valores in tempos.items() if valores}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--espera', type=float, default=300, help='ms entre a escolha do país e o pedido do gráfico')
+    args = parser.parse_args()
+
+    cliente = app.server.test_client()
+    paises = amostra_paises(app.estado_atual().registro) + ['Mundo']
+    # Aquece os imports e caches internos do plotly e do Dash
+    medir(cliente, paises[:1], 1, 0, prefetch=False)
+
+    sem_prefetch = medir(cliente, paises, args.repeticoes, args.espera, prefetch=False)
+    com_prefetch = medir(cliente, paises, args.repeticoes, args.espera)
+    troca_rapida = medir(cliente, paises, args.repeticoes, args.espera, anteriores=3)
+
+    print(f"{'gráfico':<28}{'sem prefetch ms':>17}{'com prefetch ms':>17}{'troca rápida ms':>17}")
+    for tipo_grafico in GRAFICOS_PAIS + GRAFICOS_MUNDO:
+        print(f"{tipo_grafico:<28}{sem_prefetch[tipo_grafico]:>17.2f}{com_prefetch[tipo_grafico]:>17.2f}{troca_rapida[tipo_grafico]:>17.2f}")
+    print(f'\nTarefas do prefetch: {app.agendador_prefetch.estatisticas()}')
@@ -0,0 +1,112 @@
+"""Compara as tabelas de ranking (indicadores.RankingIndicadores) com o ranking calculado na hora com o pandas.
+
+Para uma amostra de países, mede em µs:
+
+- posição de um país em um indicador e ano: consulta à tabela x rank da coluna do ano no hdi_info.csv
+- série da posição ao longo dos anos (o gráfico de ranking): consulta à tabela x um rank por ano
+- posição na região: consulta à tabela x filtro dos países da região e rank
+
+Também confere que as posições e os percentis das tabelas são iguais aos do pandas (rank denso e rank médio)
+em todos os indicadores e anos, no mundo e em cada região.
+
+Uso: python benchmarks/benchmark_ranking.py [--repeticoes 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmark_callbacks import amostra_paises
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import indicadores  # noqa: E402
+
+INDICADOR = 'Human Development Index'
+
+
+def posicoes_pandas(valores, indicador):
+    # Rank denso (0 sem valor) e percentil (porcentagem dos outros países que ficaram atrás, empates contam metade)
+    menor_melhor = indicador in indicadores.MENOR_MELHOR
+    serie = pd.Series(valores)
+    posicao = serie.rank(method='dense', ascending=menor_melhor).fillna(0).astype(int).to_numpy()
+    total = serie.notna().sum()
+    percentil = ((serie.rank(method='average', ascending=not menor_melhor) - 1) / max(total - 1, 1) * 100).to_numpy()
+    if total == 1:
+        percentil = np.where(serie.notna(), 100.0, np.nan)
+    return posicao, percentil
+
+def posicao_na_hora(info_mundo, indicador, pais, ano):
+    coluna = info_mundo[f'{indicador} ({ano})']
+    ranking = coluna.rank(method='dense', ascending=indicador in indicadores.MENOR_MELHOR)
+    return ranking[info_mundo['Country'] == pais].iloc[0]
+
+def serie_na_hora(info_mundo, indicador, pais, anos):
+    return [posicao_na_hora(info_mundo, indicador, pais, ano) for ano in anos]
+
+def posicao_regiao_na_hora(info_mundo, indicador, pais, ano):
+    regiao = info_mundo.loc[info_mundo['Country'] == pais, 'UN Region'].iloc[0]
+    da_regiao = info_mundo[info_mundo['UN Region'] == regiao]
+    ranking = da_regiao[f'{indicador} ({ano})'].rank(method='dense', ascending=indicador in indicadores.MENOR_MELHOR)
+    return ranking[da_regiao['Country'] == pais].iloc[0]
+
+def medir_us(funcao, paises, repeticoes):
+    tempos = []
+    for pais in paises:
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            funcao(pais)
+        tempos.append((time.perf_counter() - inicio) / repeticoes * 1e6)
+    return statistics.median(tempos)
+
+def conferir(estado):
+    cubo, ranking, registro = estado.cubo_indicadores, estado.ranking, estado.registro
+    divergencias = 0
+    grupos = [list(range(len(cubo.paises)))] + [
+        [cubo.posicao_pais(pais) for pais in membros] for membros in registro.membros[ranking.agrupamento].values()]
+    for indicador in cubo.indicadores:
+        i = cubo.indice_indicador[indicador]
+        for a in range(len(cubo.anos)):
+            for numero, linhas in enumerate(grupos):
+                posicao, percentil = posicoes_pandas(cubo.valores[i, linhas, a], indicador)
+                tabela_posicao = ranking.posicao if numero == 0 else ranking.posicao_grupo
+                tabela_percentil = ranking.percentil if numero == 0 else ranking.percentil_grupo
+                if not (np.array_equal(tabela_posicao[i, linhas, a], posicao)
+                        and np.allclose(tabela_percentil[i, linhas, a], percentil, atol=1e-3, equal_nan=True)):
+                    divergencias += 1
+    return divergencias
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=200)
+    args = parser.parse_args()
+
+    estado = app.estado_atual()
+    ranking, info_mundo = estado.ranking, estado.info_mundo
+    paises = amostra_paises(estado.registro)
+    anos = [int(ano) for ano in ranking.cubo.anos_indicador(INDICADOR)]
+
+    casos = [
+        ('posição em um ano', lambda pais: ranking.ranking(INDICADOR, pais, 2021),
+         lambda pais: posicao_na_hora(info_mundo, INDICADOR, pais, 2021)),
+        (f'série de {len(anos)} anos', lambda pais: ranking.series(INDICADOR, [pais]),
+         lambda pais: serie_na_hora(info_mundo, INDICADOR, pais, anos)),
+        ('posição na região', lambda pais: ranking.ranking(INDICADOR, pais, 2021, grupo=True),
+         lambda pais: posicao_regiao_na_hora(info_mundo, INDICADOR, pais, 2021)),
+    ]
+    print(f"{'consulta':<22}{'tabela µs':>12}{'pandas µs':>12}{'ganho':>10}")
+    for nome, tabela, na_hora in casos:
+        tempo_tabela = medir_us(tabela, paises, args.repeticoes)
+        tempo_na_hora = medir_us(na_hora, paises, max(1, args.repeticoes // 20))
+        print(f'{nome:<22}{tempo_tabela:>12.2f}{tempo_na_hora:>12.1f}{tempo_na_hora / tempo_tabela:>9.0f}x')
+
+    divergencias = conferir(estado)
+    print(f'\nIndicador × ano × grupo com posição ou percentil diferente do pandas: {divergencias}')
+    if divergencias:
+        sys.exit(1)
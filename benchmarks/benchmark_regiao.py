@@ -0,0 +1,62 @@
+"""Compara a construção do gráfico de comparação do IDH por região com um trace por país
+(implementação anterior) e com todos os países de fundo em um único trace.
+
+Uso: python benchmarks/benchmark_regiao.py
+"""
+import os
+import sys
+import time
+
+import plotly.express as px
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import figuras  # noqa: E402
+import utils  # noqa: E402
+
+REPETICOES = 20
+
+
+def plot_um_trace_por_pais(cubo, paises_regiao, nome_regiao, nome_pais):
+    # Implementação anterior, mantida apenas como referência de comparação
+    fig = px.line(title=f'Evolução do IDH na região: {nome_regiao}')
+    anos, valores_regiao = cubo.series('Human Development Index', paises_regiao)
+    destaque = None
+    for pais, valores_idh in zip(paises_regiao, valores_regiao):
+        if pais == nome_pais:
+            destaque = go.Scatter(x=anos, y=valores_idh, name=pais, line=dict(width=3, color='green'), hovertemplate=f"{pais}: %{{y:.2f}}")
+        else:
+            fig.add_scatter(x=anos, y=valores_idh, mode='lines', line=dict(color='lightgray'), hovertemplate=f"{pais}: %{{y:.2f}}", showlegend=False)
+    fig.update_layout(legend=dict(x=0, y=1, xanchor='left', yanchor='top'), xaxis_title='Ano', yaxis_title='IDH')
+    fig.add_trace(destaque)
+    return utils.padronizar_grafico_pais(fig, 'do IDH {}'.format(nome_regiao), nome_pais)
+
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    for _ in range(REPETICOES):
+        tamanho = len(figuras.para_json(funcao()))
+    return (time.perf_counter() - inicio) / REPETICOES * 1000, tamanho
+
+
+if __name__ == '__main__':
+    estado = app.estado_atual()
+    regioes = estado.recorte_mundo['UN Region'].value_counts()
+    maior_regiao = regioes.index[0]
+    paises_regiao = estado.recorte_mundo.loc[estado.recorte_mundo['UN Region'] == maior_regiao, 'Country'].tolist()
+    nome_pais = paises_regiao[0]
+    cubo = estado.cubo_indicadores
+
+    variantes = {
+        'um trace por país': lambda: plot_um_trace_por_pais(cubo, paises_regiao, maior_regiao, nome_pais),
+        'trace único': lambda: utils.plot_idh_por_regiao(cubo, paises_regiao, maior_regiao, nome_pais),
+        'trace único (WebGL)': lambda: utils.plot_idh_por_regiao(cubo, paises_regiao, maior_regiao, nome_pais, webgl=True),
+    }
+
+    print(f"Região: {maior_regiao} ({len(paises_regiao)} países)")
+    print(f"{'variante':<22}{'construção + JSON (ms)':>24}{'tamanho (bytes)':>18}")
+    for nome, funcao in variantes.items():
+        tempo, tamanho = medir(funcao)
+        print(f"{nome:<22}{tempo:>24.1f}{tamanho:>18,}")
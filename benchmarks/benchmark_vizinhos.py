@@ -0,0 +1,68 @@
+"""Mede as consultas do grafo de vizinhos (vizinhos.py) para todos os países, comparando com o cálculo na hora.
+
+- fronteiras, k mais próximos, raio e vizinhos (fronteiras completadas com os mais próximos): consultas ao grafo
+  montado na preparação dos dados
+- cálculo na hora: distâncias do país a todos os outros e ordenação, o que cada requisição faria sem o grafo
+
+Uso: python benchmarks/benchmark_vizinhos.py [--repeticoes 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import vizinhos  # noqa: E402
+
+
+def proximos_na_hora(grafo, nome_pais, k):
+    posicao = grafo.posicao[nome_pais]
+    distancias = vizinhos._distancia_km(grafo.lats[posicao], grafo.lons[posicao], grafo.lats, grafo.lons)
+    distancias[posicao] = np.nan
+    ordem = np.argsort(distancias)[:k]
+    return [(grafo.nomes[vizinho], distancias[vizinho]) for vizinho in ordem.tolist()]
+
+def medir_us(funcao, paises, repeticoes):
+    tempos = []
+    for pais in paises:
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            funcao(pais)
+        tempos.append((time.perf_counter() - inicio) / repeticoes * 1e6)
+    return statistics.median(tempos), max(tempos)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    grafo = app.estado_atual().grafo_vizinhos
+    paises = grafo.nomes
+    sem_fronteira = sum(1 for pais in paises if not grafo.fronteiras(pais))
+    pares = (grafo.inicio_fronteiras[-1]) // 2
+    print(f'{len(paises)} países, {pares} pares com fronteira terrestre, {sem_fronteira} países sem fronteira terrestre\n')
+
+    consultas = {
+        'fronteiras': grafo.fronteiras,
+        '5 mais próximos': lambda pais: grafo.proximos(pais, 5),
+        'raio de 2000 km': lambda pais: grafo.proximos(pais, None, 2000),
+        'vizinhos (gráfico)': grafo.vizinhos,
+        '5 mais próximos, na hora': lambda pais: proximos_na_hora(grafo, pais, 5),
+    }
+    print(f"{'consulta':<28}{'mediana µs':>12}{'máximo µs':>12}")
+    for nome, funcao in consultas.items():
+        mediana, maximo = medir_us(funcao, paises, args.repeticoes)
+        print(f'{nome:<28}{mediana:>12.2f}{maximo:>12.2f}')
+
+    # As consultas ao grafo devem concordar com o cálculo na hora
+    divergentes = [pais for pais in paises
+                   if [nome for nome, _ in grafo.proximos(pais, 5)] != [nome for nome, _ in proximos_na_hora(grafo, pais, 5)]]
+    print(f'\nPaíses com os 5 mais próximos diferentes do cálculo na hora: {len(divergentes)} {divergentes[:5]}')
+    if divergentes:
+        sys.exit(1)
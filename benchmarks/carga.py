@@ -0,0 +1,222 @@
+"""Teste de carga: inicia o app no gunicorn e simula usuários navegando pelo dashboard ao mesmo tempo.
+
+Cada usuário abre a página (/, _dash-layout e _dash-dependencies) e repete o fluxo de uso: clique em um
+país no mapa (update_location), escolha de um gráfico (mostrar_grafico_selecionado) e troca da métrica
+do mapa (update_map). Os cards são atualizados no navegador e não geram requisições. As requisições
+são as mesmas do navegador, com gzip, e as respostas são conferidas.
+
+Para cada combinação de workers e usuários simultâneos, mostra a vazão, a latência (p50/p95/p99) e a
+taxa de erros de cada requisição.
+
+Uso: python benchmarks/carga.py [--workers 1,4] [--usuarios 8,32] [--duracao 20] [--aquecimento 5] [--pausa 0] [--mapa servidor] [--saida carga.json]
+"""
+import argparse
+import collections
+import concurrent.futures
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.request
+
+import pandas as pd
+
+from verificar_sessoes import GRAFICOS_MUNDO, chamar_callback, graficos_pais, grupos_paises, iniciar_servidor, porta_livre, project_root, titulo_esperado
+
+OPCOES_MAPA = ['idh', 'populacao', 'renda', 'expectativa_vida']
+# Parte dos usuários volta para o Mundo e abre um dos gráficos do mundo
+PROPORCAO_MUNDO = 0.15
+
+
+class Resultados:
+    """Latências e erros de cada requisição, compartilhados entre as threads dos usuários."""
+
+    def __init__(self):
+        self.latencias = collections.defaultdict(list)
+        self.erros = collections.Counter()
+        self.bytes = collections.Counter()
+        self.exemplos_erros = []
+        self._trava = threading.Lock()
+
+    def registrar(self, nome, segundos, tamanho=0):
+        with self._trava:
+            self.latencias[nome].append(segundos)
+            self.bytes[nome] += tamanho
+
+    def registrar_erro(self, nome, erro):
+        with self._trava:
+            self.erros[nome] += 1
+            if len(self.exemplos_erros) < 10:
+                self.exemplos_erros.append(f'{nome}: {erro}')
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+def medir(resultados, nome, funcao):
+    """Executa a requisição, registra a latência e retorna o resultado (ou None em caso de erro)."""
+    inicio = time.perf_counter()
+    try:
+        resposta, tamanho = funcao()
+    except Exception as erro:
+        resultados.registrar(nome, time.perf_counter() - inicio)
+        resultados.registrar_erro(nome, repr(erro))
+        return None
+    resultados.registrar(nome, time.perf_counter() - inicio, tamanho)
+    return resposta
+
+def pedir_pagina(url, caminho):
+    requisicao = urllib.request.Request(url + caminho, headers={'Accept-Encoding': 'gzip'})
+    with urllib.request.urlopen(requisicao, timeout=60) as resposta:
+        conteudo = resposta.read()
+        tamanho = len(conteudo)
+        if resposta.headers.get('Content-Encoding') == 'gzip':
+            conteudo = gzip.decompress(conteudo)
+    return conteudo, tamanho
+
+def clicar_no_mapa(url, iso3):
+    return chamar_callback(
+        url, 'paises-dropdown.value', {'id': 'paises-dropdown', 'property': 'value'},
+        [{'id': 'choropleth-map', 'property': 'clickData', 'value': {'points': [{'location': iso3}]}}],
+        comprimir=True,
+    )
+
+def escolher_grafico(url, tipo_grafico, pais):
+    return chamar_callback(
+        url, 'grafico-selecionado.figure', {'id': 'grafico-selecionado', 'property': 'figure'},
+        [{'id': 'graficos-dropdown', 'property': 'value', 'value': tipo_grafico}],
+        [{'id': 'paises-dropdown', 'property': 'value', 'value': pais}],
+        comprimir=True,
+    )
+
+def trocar_metrica(url, opcao):
+    return chamar_callback(
+        url, '..choropleth-map.figure..', [{'id': 'choropleth-map', 'property': 'figure'}],
+        [{'id': 'radio-items', 'property': 'value', 'value': opcao},
+         {'id': 'ano-mapa', 'property': 'value', 'value': None}],
+        comprimir=True,
+    )
+
+def simular_usuario(url, paises, grupos, resultados, limite, pausa, mapa_no_servidor, semente):
+    aleatorio = random.Random(semente)
+
+    def esperar():
+        if pausa:
+            time.sleep(aleatorio.uniform(0, 2 * pausa))
+
+    for caminho in ('/', '/_dash-layout', '/_dash-dependencies'):
+        medir(resultados, caminho, lambda: pedir_pagina(url, caminho))
+
+    while time.time() < limite:
+        if aleatorio.random() < PROPORCAO_MUNDO:
+            pais, tipo_grafico = 'Mundo', aleatorio.choice(GRAFICOS_MUNDO)
+        else:
+            nome, iso3 = aleatorio.choice(paises)
+            resposta = medir(resultados, 'update_location', lambda: clicar_no_mapa(url, iso3))
+            if resposta is None:
+                continue
+            pais = resposta['response']['paises-dropdown']['value']
+            if pais != nome:
+                resultados.registrar_erro('update_location', f'clique em {iso3} selecionou {pais}')
+                continue
+            tipo_grafico = aleatorio.choice(graficos_pais(url, pais))
+        esperar()
+
+        resposta = medir(resultados, 'mostrar_grafico_selecionado', lambda: escolher_grafico(url, tipo_grafico, pais))
+        if resposta is not None:
+            titulo = resposta['response']['grafico-selecionado']['figure']['layout'].get('title', {}).get('text', '')
+            if titulo != titulo_esperado(tipo_grafico, pais, grupos):
+                resultados.registrar_erro('mostrar_grafico_selecionado', f'pediu {tipo_grafico} de {pais} e recebeu "{titulo}"')
+        esperar()
+
+        if mapa_no_servidor:
+            opcao = aleatorio.choice(OPCOES_MAPA)
+            medir(resultados, 'update_map', lambda: trocar_metrica(url, opcao))
+            esperar()
+
+def executar_cenario(url, paises, grupos, usuarios, duracao, pausa, mapa_no_servidor):
+    resultados = Resultados()
+    limite = time.time() + duracao
+    inicio = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=usuarios) as executor:
+        tarefas = [executor.submit(simular_usuario, url, paises, grupos, resultados, limite, pausa, mapa_no_servidor, semente)
+                   for semente in range(usuarios)]
+        for tarefa in tarefas:
+            tarefa.result()
+    return resultados, time.perf_counter() - inicio
+
+def resumir(resultados, segundos):
+    total = sum(len(latencias) for latencias in resultados.latencias.values())
+    erros = sum(resultados.erros.values())
+    resumo = {
+        'requisicoes': total,
+        'duracao_s': round(segundos, 2),
+        'vazao_rps': round(total / segundos, 1),
+        'taxa_erros': round(erros / total, 4) if total else 0.0,
+        'requisicoes_por_nome': {},
+    }
+    for nome, latencias in sorted(resultados.latencias.items()):
+        resumo['requisicoes_por_nome'][nome] = {
+            'requisicoes': len(latencias),
+            'p50_ms': round(percentil(latencias, 50) * 1000, 1),
+            'p95_ms': round(percentil(latencias, 95) * 1000, 1),
+            'p99_ms': round(percentil(latencias, 99) * 1000, 1),
+            'taxa_erros': round(resultados.erros[nome] / len(latencias), 4),
+            'bytes_medio': round(resultados.bytes[nome] / len(latencias)),
+        }
+    return resumo
+
+def imprimir(workers, usuarios, resumo, exemplos_erros):
+    print(f"\nworkers={workers} usuários={usuarios}: {resumo['requisicoes']} requisições em {resumo['duracao_s']} s, "
+          f"{resumo['vazao_rps']} req/s, {resumo['taxa_erros']:.2%} de erros")
+    print(f"  {'requisição':<30}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erros':>9}{'bytes':>10}")
+    for nome, dados in resumo['requisicoes_por_nome'].items():
+        print(f"  {nome:<30}{dados['requisicoes']:>7}{dados['p50_ms']:>10}{dados['p95_ms']:>10}{dados['p99_ms']:>10}"
+              f"{dados['taxa_erros']:>9.2%}{dados['bytes_medio']:>10,}")
+    for exemplo in exemplos_erros:
+        print(f'  erro: {exemplo}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', default='1,4', help='lista de números de workers do gunicorn, separados por vírgula')
+    parser.add_argument('--usuarios', default='8,32', help='lista de números de usuários simultâneos, separados por vírgula')
+    parser.add_argument('--duracao', type=float, default=20, help='segundos de carga em cada cenário')
+    parser.add_argument('--aquecimento', type=float, default=5,
+                        help='segundos de carga descartados depois de iniciar o servidor (imports e caches de cada worker)')
+    parser.add_argument('--pausa', type=float, default=0, help='tempo médio, em segundos, entre as ações de cada usuário')
+    parser.add_argument('--mapa', choices=['servidor', 'cliente'], default='servidor',
+                        help='onde a troca de métrica do mapa é feita (INFO_MUNDO_MAPA); no cliente ela não gera requisições')
+    parser.add_argument('--saida', help='arquivo JSON onde os resultados são gravados')
+    args = parser.parse_args()
+
+    df = pd.read_csv(os.path.join(project_root, 'static', 'data', 'hdi_info.csv'))
+    paises = list(zip(df['Country'], df['ISO3']))
+    grupos = grupos_paises()
+    mapa_no_servidor = args.mapa == 'servidor'
+
+    usuarios_cenarios = [int(valor) for valor in args.usuarios.split(',')]
+    cenarios = []
+    for workers in [int(valor) for valor in args.workers.split(',')]:
+        processo, url = iniciar_servidor(workers, porta_livre(), env={'INFO_MUNDO_MAPA': args.mapa})
+        try:
+            executar_cenario(url, paises, grupos, max(usuarios_cenarios), args.aquecimento, args.pausa, mapa_no_servidor)
+            for usuarios in usuarios_cenarios:
+                resultados, segundos = executar_cenario(url, paises, grupos, usuarios, args.duracao, args.pausa, mapa_no_servidor)
+                resumo = resumir(resultados, segundos)
+                imprimir(workers, usuarios, resumo, resultados.exemplos_erros)
+                cenarios.append(dict(workers=workers, usuarios=usuarios, **resumo))
+        finally:
+            processo.terminate()
+            processo.wait()
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'argumentos': vars(args), 'cenarios': cenarios}, f, indent=2, ensure_ascii=False)
+
+    if any(cenario['taxa_erros'] > 0 for cenario in cenarios):
+        sys.exit(1)
@@ -0,0 +1,78 @@
+"""Mede a memória de cada worker do gunicorn, sem e com o app pré-carregado no processo principal.
+
+Para cada modo, inicia o app no gunicorn, aquece os workers com alguns segundos de carga (como em
+benchmarks/carga.py) e lê /proc/<pid>/smaps_rollup do processo principal e de cada worker:
+
+- RSS: páginas residentes do processo, incluindo as compartilhadas com os outros processos
+- PSS: RSS com cada página compartilhada dividida entre os processos que a usam
+- privada: páginas só do processo (o que cada worker a mais custa de memória)
+
+Só funciona no Linux.
+
+Uso: python benchmarks/memoria_workers.py [--workers 4] [--modos padrao,preload] [--aquecimento 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from carga import executar_cenario
+from verificar_sessoes import iniciar_servidor, porta_livre, project_root
+
+MODOS = {
+    'padrao': {'INFO_MUNDO_PRELOAD': '0'},
+    'preload': {'INFO_MUNDO_PRELOAD': '1'},
+}
+
+
+def memoria_processo(pid):
+    """RSS, PSS e memória privada do processo, em MB."""
+    valores = {}
+    with open(f'/proc/{pid}/smaps_rollup', encoding='ascii') as f:
+        for linha in f:
+            partes = linha.split()
+            if len(partes) == 3 and partes[2] == 'kB':
+                valores[partes[0].rstrip(':')] = int(partes[1])
+    privada = valores['Private_Clean'] + valores['Private_Dirty']
+    return {'rss_mb': valores['Rss'] / 1024, 'pss_mb': valores['Pss'] / 1024, 'privada_mb': privada / 1024}
+
+def filhos(pid):
+    resultado = subprocess.run(['pgrep', '-P', str(pid)], capture_output=True, text=True)
+    return [int(linha) for linha in resultado.stdout.split()]
+
+def medir_modo(modo, workers, aquecimento, paises):
+    processo, url = iniciar_servidor(workers, porta_livre(), env=MODOS[modo])
+    try:
+        executar_cenario(url, paises, workers * 2, aquecimento, 0, False)
+        time.sleep(1)
+        return memoria_processo(processo.pid), [memoria_processo(pid) for pid in filhos(processo.pid)]
+    finally:
+        processo.terminate()
+        processo.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--modos', default='padrao,preload', help=f'modos separados por vírgula: {", ".join(MODOS)}')
+    parser.add_argument('--aquecimento', type=float, default=10, help='segundos de carga antes da medição')
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit('É preciso o /proc/<pid>/smaps_rollup do Linux')
+
+    df = pd.read_csv(os.path.join(project_root, 'static', 'data', 'hdi_info.csv'))
+    paises = list(zip(df['Country'], df['ISO3']))
+
+    print(f"{'modo':<10}{'processo':<12}{'RSS MB':>10}{'PSS MB':>10}{'privada MB':>12}")
+    for modo in args.modos.split(','):
+        principal, memoria_workers = medir_modo(modo, args.workers, args.aquecimento, paises)
+        print(f"{modo:<10}{'principal':<12}{principal['rss_mb']:>10.1f}{principal['pss_mb']:>10.1f}{principal['privada_mb']:>12.1f}")
+        for memoria in memoria_workers:
+            print(f"{'':<10}{'worker':<12}{memoria['rss_mb']:>10.1f}{memoria['pss_mb']:>10.1f}{memoria['privada_mb']:>12.1f}")
+        total_pss = principal['pss_mb'] + sum(memoria['pss_mb'] for memoria in memoria_workers)
+        media_privada = sum(memoria['privada_mb'] for memoria in memoria_workers) / len(memoria_workers)
+        print(f"{'':<10}{'total (PSS)':<12}{total_pss:>20.1f}   privada média por worker: {media_privada:.1f} MB")
@@ -0,0 +1,85 @@
+"""Verifica que a recarga dos dados com o app rodando não derruba nenhuma requisição.
+
+Inicia o app no gunicorn com INFO_MUNDO_RECARGA, simula usuários como no teste de carga e, durante a
+carga, altera o mtime de static/data/hdi_info.csv algumas vezes (o conteúdo não muda, e o mtime original
+é restaurado no final). O snapshot fica desativado, então cada recarga prepara os dados do zero. Ao final
+confere que nenhuma requisição falhou e, pelo /metrics, que os workers trocaram de versão.
+
+Uso: python benchmarks/verificar_recarga.py [--workers 2] [--usuarios 8] [--recargas 3] [--intervalo 8]
+"""
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+import urllib.request
+
+import pandas as pd
+
+from carga import executar_cenario, imprimir, resumir
+from verificar_sessoes import iniciar_servidor, porta_livre, project_root
+
+caminho_arquivo = os.path.join(project_root, 'static', 'data', 'hdi_info.csv')
+
+
+def alterar_arquivo(recargas, intervalo, parar):
+    estado_original = os.stat(caminho_arquivo)
+    try:
+        for _ in range(recargas):
+            if parar.wait(intervalo):
+                return
+            os.utime(caminho_arquivo)
+            print(f'{time.strftime("%H:%M:%S")} mtime de {os.path.basename(caminho_arquivo)} alterado')
+    finally:
+        os.utime(caminho_arquivo, ns=(estado_original.st_atime_ns, estado_original.st_mtime_ns))
+
+def versoes_workers(url, leituras=30):
+    """Versões dos dados e recargas vistas em várias leituras do /metrics (cada leitura cai em um worker)."""
+    versoes = set()
+    falhas = 0
+    for _ in range(leituras):
+        with urllib.request.urlopen(url + '/metrics', timeout=10) as resposta:
+            texto = resposta.read().decode()
+        versoes.update(int(valor) for valor in re.findall(r'^info_mundo_dados_versao (\d+)', texto, re.M))
+        falhas += sum(int(valor) for valor in re.findall(r'^info_mundo_dados_recargas_total\{resultado="falha"\} (\d+)', texto, re.M))
+    return versoes, falhas
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--usuarios', type=int, default=8)
+    parser.add_argument('--recargas', type=int, default=3, help='quantas vezes o arquivo é alterado durante a carga')
+    parser.add_argument('--intervalo', type=float, default=8, help='segundos entre as alterações do arquivo')
+    args = parser.parse_args()
+
+    df = pd.read_csv(caminho_arquivo)
+    paises = list(zip(df['Country'], df['ISO3']))
+    duracao = (args.recargas + 1) * args.intervalo
+
+    ambiente = {'INFO_MUNDO_RECARGA': '0.5', 'INFO_MUNDO_SNAPSHOT': '', 'INFO_MUNDO_METRICAS': '1', 'INFO_MUNDO_MAPA': 'servidor'}
+    processo, url = iniciar_servidor(args.workers, porta_livre(), env=ambiente)
+    parar = threading.Event()
+    alteracoes = threading.Thread(target=alterar_arquivo, args=(args.recargas, args.intervalo, parar))
+    try:
+        alteracoes.start()
+        resultados, segundos = executar_cenario(url, paises, args.usuarios, duracao, 0, True)
+        parar.set()
+        alteracoes.join()
+        # Espera a recarga causada pela restauração do mtime original
+        time.sleep(max(5, args.intervalo))
+        versoes, falhas_recarga = versoes_workers(url)
+    finally:
+        parar.set()
+        alteracoes.join()
+        processo.terminate()
+        processo.wait()
+
+    resumo = resumir(resultados, segundos)
+    imprimir(args.workers, args.usuarios, resumo, resultados.exemplos_erros)
+    print(f'\nVersões dos dados vistas no /metrics: {sorted(versoes)}; recargas com falha: {falhas_recarga}')
+
+    if resumo['taxa_erros'] > 0 or falhas_recarga or not versoes or max(versoes) < 2:
+        sys.exit(1)
+    print('Nenhuma requisição falhou durante as recargas')
@@ -0,0 +1,203 @@
+"""Verifica que sessões independentes recebem os gráficos corretos com o app rodando em vários workers do gunicorn.
+
+Cada sessão simulada escolhe uma sequência de países e gráficos e confere se cada resposta do
+callback mostrar_grafico_selecionado corresponde ao país e ao gráfico pedidos por ela, pelo título completo
+da figura (o tipo do gráfico, o país e, nas comparações pelo grupo, o grupo do país). A verificação
+roda nos dois modos do gunicorn.conf.py: cada worker carregando o app e com INFO_MUNDO_PRELOAD=1.
+
+É uma verificação obrigatória antes de cada release (ver "Rodando com vários workers" no README): termina
+com código 1 se alguma sessão recebeu um gráfico errado e 2 se o app não iniciou no gunicorn.
+
+Uso: python benchmarks/verificar_sessoes.py [--workers 4] [--sessoes 32] [--passos 10] [--preload 0,1]
+"""
+import argparse
+import concurrent.futures
+import functools
+import gzip
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GRAFICOS_PAIS = ['evolucao_populacao', 'evolucao_idh', 'comparacao_idh', 'comparacao_idh_renda', 'comparacao_idh_vizinhos', 'ranking_idh', 'evolucao_expectativa_vida', 'evolucao_renda']
+GRAFICOS_MUNDO = ['mundo-populacao', 'mundo-idh-expectativa', 'mundo-renda-expectativa']
+
+# Título de cada gráfico, que identifica o tipo do gráfico e o país. Nos gráficos de um país, o título termina com o
+# nome dele; nos de comparação pelo grupo, traz também o grupo do país (região da ONU ou grupo de renda)
+TITULOS_PAIS = {
+    'evolucao_populacao': 'Evolução da População',
+    'evolucao_idh': 'Evolução do IDH',
+    'comparacao_idh': 'Evolução do IDH {UN Region}',
+    'comparacao_idh_renda': 'Evolução do IDH {World Bank Income Groups}',
+    'comparacao_idh_vizinhos': 'Evolução do IDH com os países vizinhos',
+    'ranking_idh': 'Evolução da posição no ranking do IDH',
+    'evolucao_expectativa_vida': 'Evolução da Expectativa de Vida',
+    'evolucao_renda': 'Evolução da Renda',
+}
+TITULOS_MUNDO = {
+    'mundo-populacao': 'População do mundo divida por região',
+    'mundo-idh-expectativa': 'Correlação entre o IDH e Expectativa de Vida',
+    'mundo-renda-expectativa': 'Correlação entre a Renda Per Capita e Expectativa de Vida',
+}
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def iniciar_servidor(workers, porta, env=None):
+    """Inicia o app no gunicorn e espera até que ele responda."""
+    processo = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(project_root, 'gunicorn.conf.py'),
+         '--workers', str(workers), '--bind', f'127.0.0.1:{porta}', 'app:server'],
+        cwd=project_root, env=dict(os.environ, **(env or {})),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f'http://127.0.0.1:{porta}'
+    limite = time.time() + 120
+    while time.time() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError('o gunicorn terminou durante a inicialização')
+        try:
+            with urllib.request.urlopen(url + '/_dash-layout', timeout=5):
+                return processo, url
+        except OSError:
+            time.sleep(0.5)
+    processo.terminate()
+    raise RuntimeError('o app não respondeu a tempo')
+
+def chamar_callback(url, output, outputs, inputs, state=(), comprimir=False):
+    """Faz a mesma requisição que o navegador faz em _dash-update-component e retorna o JSON e o tamanho da resposta.
+
+    Com comprimir=True a resposta é pedida com gzip, como faz o navegador, e o tamanho retornado é o transferido."""
+    corpo = {
+        'output': output,
+        'outputs': outputs,
+        'inputs': list(inputs),
+        'state': list(state),
+        'changedPropIds': [f"{entrada['id']}.{entrada['property']}" for entrada in inputs],
+    }
+    cabecalhos = {'Content-Type': 'application/json'}
+    if comprimir:
+        cabecalhos['Accept-Encoding'] = 'gzip'
+    requisicao = urllib.request.Request(url + '/_dash-update-component', data=json.dumps(corpo).encode(), headers=cabecalhos)
+    with urllib.request.urlopen(requisicao, timeout=60) as resposta:
+        conteudo = resposta.read()
+        tamanho = len(conteudo)
+        if resposta.headers.get('Content-Encoding') == 'gzip':
+            conteudo = gzip.decompress(conteudo)
+    return (json.loads(conteudo) if conteudo else None), tamanho
+
+def _procurar_componente(no, id_componente):
+    if isinstance(no, dict):
+        if no.get('props', {}).get('id') == id_componente:
+            return no
+        filhos = list(no.get('props', {}).values()) if 'props' in no else list(no.values())
+        no = filhos
+    if isinstance(no, list):
+        for filho in no:
+            encontrado = _procurar_componente(filho, id_componente)
+            if encontrado is not None:
+                return encontrado
+    return None
+
+@functools.lru_cache(maxsize=None)
+def graficos_indisponiveis(url):
+    # Gráficos que a página não oferece para cada país (ex.: comparação pela região para países sem região), lidos
+    # do dcc.Store dados-cards do layout, como o navegador faz
+    with urllib.request.urlopen(url + '/_dash-layout', timeout=60) as resposta:
+        layout = json.loads(resposta.read())
+    return _procurar_componente(layout, 'dados-cards')['props']['data']['graficos_indisponiveis']
+
+def graficos_pais(url, pais):
+    indisponiveis = graficos_indisponiveis(url).get(pais, [])
+    return [tipo_grafico for tipo_grafico in GRAFICOS_PAIS if tipo_grafico not in indisponiveis]
+
+def pedir_grafico(url, tipo_grafico, pais):
+    resposta, _ = chamar_callback(
+        url, 'grafico-selecionado.figure', {'id': 'grafico-selecionado', 'property': 'figure'},
+        [{'id': 'graficos-dropdown', 'property': 'value', 'value': tipo_grafico}],
+        [{'id': 'paises-dropdown', 'property': 'value', 'value': pais}],
+    )
+    return resposta['response']['grafico-selecionado']['figure']
+
+def grupos_paises():
+    """Região da ONU e grupo de renda de cada país, lidos dos mesmos arquivos que o app usa (por ISO3)."""
+    import pandas as pd
+    pasta_dados = os.path.join(project_root, 'static', 'data')
+    paises = pd.read_csv(os.path.join(pasta_dados, 'hdi_info.csv'), usecols=['Country', 'ISO3'])
+    regioes = pd.read_excel(os.path.join(pasta_dados, 'regioes.xlsx')).set_index('ISO Code')
+    grupos = regioes.reindex(paises['ISO3'])[['UN Region', 'World Bank Income Groups']].astype(object)
+    grupos = grupos.where(grupos.notna(), None)
+    return dict(zip(paises['Country'], grupos.to_dict('records')))
+
+def titulo_esperado(tipo_grafico, pais, grupos):
+    if tipo_grafico in GRAFICOS_MUNDO:
+        return TITULOS_MUNDO[tipo_grafico]
+    return f"{TITULOS_PAIS[tipo_grafico].format(**grupos[pais])}: <span style='color: #34ce00'>{pais}</span>"
+
+def simular_sessao(url, grupos, passos, semente):
+    aleatorio = random.Random(semente)
+    paises = list(grupos)
+    erros = []
+    for _ in range(passos):
+        if aleatorio.random() < 0.2:
+            pais, tipo_grafico = 'Mundo', aleatorio.choice(GRAFICOS_MUNDO)
+        else:
+            pais = aleatorio.choice(paises)
+            tipo_grafico = aleatorio.choice(graficos_pais(url, pais))
+        figura = pedir_grafico(url, tipo_grafico, pais)
+        titulo = figura['layout'].get('title', {}).get('text', '')
+        # O título completo confere o país e o tipo do gráfico
+        esperado = titulo_esperado(tipo_grafico, pais, grupos)
+        if titulo != esperado:
+            erros.append(f'sessão {semente}: pediu {tipo_grafico} de {pais} e recebeu "{titulo}" (esperado "{esperado}")')
+    return erros
+
+
+def verificar(workers, sessoes, passos, preload):
+    """Inicia o gunicorn e simula as sessões. Retorna as respostas incorretas e a duração."""
+    processo, url = iniciar_servidor(workers, porta_livre(), env={'INFO_MUNDO_PRELOAD': preload})
+    try:
+        grupos = grupos_paises()
+        inicio = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=sessoes) as executor:
+            resultados = list(executor.map(lambda semente: simular_sessao(url, grupos, passos, semente), range(sessoes)))
+        duracao = time.perf_counter() - inicio
+    finally:
+        processo.terminate()
+        processo.wait()
+    return [erro for resultado in resultados for erro in resultado], duracao
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--sessoes', type=int, default=32)
+    parser.add_argument('--passos', type=int, default=10)
+    parser.add_argument('--preload', default='0,1', help='valores de INFO_MUNDO_PRELOAD verificados, separados por vírgula')
+    args = parser.parse_args()
+
+    falhou = False
+    for preload in args.preload.split(','):
+        try:
+            erros, duracao = verificar(args.workers, args.sessoes, args.passos, preload)
+        except RuntimeError as erro:
+            print(f'INFO_MUNDO_PRELOAD={preload}: {erro}')
+            sys.exit(2)
+        total = args.sessoes * args.passos
+        print(f'INFO_MUNDO_PRELOAD={preload}: {total} requisições de {args.sessoes} sessões em {args.workers} workers, {duracao:.1f} s')
+        if erros:
+            falhou = True
+            print(f'{len(erros)} respostas incorretas:')
+            print('\n'.join(erros[:20]))
+    if falhou:
+        sys.exit(1)
+    print('Todas as sessões receberam os gráficos corretos')
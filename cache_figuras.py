@@ -0,0 +1,123 @@
+import collections
+import threading
+
+import figuras
+import metricas
+
+
+class CacheFiguras:
+    """Cache LRU de figuras já serializadas em JSON, limitado pelo tamanho total em bytes.
+
+    As figuras só dependem dos parâmetros do gráfico e da versão dos dados (que faz parte da chave), então
+    cada combinação é construída uma vez por processo enquanto couber no limite."""
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self.acertos = 0
+        self.falhas = 0
+        self._figuras = collections.OrderedDict()
+        self._bytes = 0
+        # Figuras sendo construídas no momento, para que uma segunda requisição (ou o prefetch) da mesma chave
+        # espere a construção em andamento em vez de repeti-la
+        self._construindo = {}
+        self._trava = threading.Lock()
+
+    def obter(self, chave, construir):
+        """Retorna a figura da chave, construindo-a com construir() quando não estiver no cache."""
+        with self._trava:
+            texto = self._figuras.get(chave)
+            if texto is not None:
+                self._figuras.move_to_end(chave)
+                self.acertos += 1
+            else:
+                self.falhas += 1
+
+        if texto is None:
+            texto = self._construir(chave, construir, esperar=True)
+
+        with metricas.medir('desserializacao'):
+            return figuras.carregar(texto)
+
+    def _construir(self, chave, construir, esperar):
+        """Constrói, serializa e guarda a figura. Se a chave já estiver sendo construída, espera por ela (ou, com
+        esperar=False, retorna None)."""
+        with self._trava:
+            em_andamento = self._construindo.get(chave)
+            if em_andamento is None:
+                em_andamento = self._construindo[chave] = threading.Event()
+                dono = True
+            else:
+                dono = False
+
+        if not dono:
+            if not esperar:
+                return None
+            em_andamento.wait()
+            with self._trava:
+                texto = self._figuras.get(chave)
+            if texto is not None:
+                return texto
+            # A figura não coube no cache ou a construção falhou: constrói aqui mesmo
+            return figuras.para_json(construir())
+
+        try:
+            # A construção fica fora da trava para não bloquear as outras requisições
+            figura = construir()
+            with metricas.medir('serializacao'):
+                texto = figuras.para_json(figura)
+            self._guardar(chave, texto)
+            return texto
+        finally:
+            with self._trava:
+                del self._construindo[chave]
+            em_andamento.set()
+
+    def contem(self, chave):
+        with self._trava:
+            return chave in self._figuras
+
+    def preencher(self, chave, construir):
+        """Constrói e guarda a figura da chave, se ela ainda não estiver no cache nem sendo construída, sem contar como consulta."""
+        if self.contem(chave):
+            return False
+        return self._construir(chave, construir, esperar=False) is not None
+
+    def _guardar(self, chave, texto):
+        tamanho = len(texto)
+        if tamanho > self.limite_bytes:
+            return
+        with self._trava:
+            if chave in self._figuras:
+                return
+            self._figuras[chave] = texto
+            self._bytes += tamanho
+            # Remove as figuras usadas há mais tempo até voltar ao limite
+            while self._bytes > self.limite_bytes:
+                _, removido = self._figuras.popitem(last=False)
+                self._bytes -= len(removido)
+
+    def limpar(self):
+        with self._trava:
+            self._figuras.clear()
+            self._bytes = 0
+
+    def coletar_metricas(self):
+        """Linhas do cache para o /metrics (metricas.Metricas.registrar_coletor)."""
+        estatisticas = self.estatisticas()
+        return [
+            ('info_mundo_cache_figuras_consultas_total', 'counter', 'Consultas ao cache de figuras', (('resultado', 'acerto'),), estatisticas['acertos']),
+            ('info_mundo_cache_figuras_consultas_total', 'counter', 'Consultas ao cache de figuras', (('resultado', 'falha'),), estatisticas['falhas']),
+            ('info_mundo_cache_figuras_figuras', 'gauge', 'Figuras guardadas no cache', (), estatisticas['figuras']),
+            ('info_mundo_cache_figuras_bytes', 'gauge', 'Bytes ocupados pelas figuras no cache', (), estatisticas['bytes']),
+            ('info_mundo_cache_figuras_limite_bytes', 'gauge', 'Limite de bytes do cache de figuras', (), estatisticas['limite_bytes']),
+        ]
+
+    def estatisticas(self):
+        with self._trava:
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'figuras': len(self._figuras),
+                'bytes': self._bytes,
+                'limite_bytes': self.limite_bytes,
+            }
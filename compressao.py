@@ -0,0 +1,178 @@
+import functools
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+
+import flask
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    # Sem o pacote brotli as respostas são comprimidas apenas com gzip
+    brotli = None
+
+# Tipos de resposta que valem a pena comprimir (imagens PNG já são comprimidas)
+TIPOS_COMPRIMIVEIS = {
+    'application/json', 'application/javascript', 'text/javascript', 'text/html', 'text/css', 'text/plain', 'image/svg+xml',
+}
+# Arquivos de static/ que ganham versões pré-comprimidas (.gz/.br) com `python compressao.py`
+EXTENSOES_PRECOMPRIMIDAS = ('.css', '.js', '.json', '.svg')
+# Pastas de static/ cujos arquivos são referenciados com o hash do conteúdo na URL (?v=) e podem ficar em cache para sempre
+PASTAS_IMUTAVEIS = ('bandeiras/', 'icons/', 'data/')
+UM_ANO = 31536000
+
+pasta_static = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+logger = logging.getLogger('info_mundo.compressao')
+
+
+@functools.lru_cache(maxsize=None)
+def _hash_conteudo(caminho, modificacao, tamanho):
+    with open(caminho, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+def hash_arquivo(caminho):
+    # Calculado uma vez por versão do arquivo: a geometria do mapa pode ser regenerada com o app rodando
+    estado = os.stat(caminho)
+    return _hash_conteudo(caminho, estado.st_mtime_ns, estado.st_size)
+
+def url_versionada(app, caminho):
+    """URL do asset com o hash do conteúdo, que muda sempre que o arquivo muda."""
+    return f"{app.get_asset_url(caminho)}?v={hash_arquivo(os.path.join(pasta_static, caminho))}"
+
+def _codificacao_aceita(requisicao):
+    aceitas = requisicao.accept_encodings
+    if brotli is not None and aceitas['br']:
+        return 'br'
+    if aceitas['gzip']:
+        return 'gzip'
+    return None
+
+def comprimir(dados, codificacao, nivel_gzip=6, nivel_brotli=5):
+    if codificacao == 'br':
+        return brotli.compress(dados, quality=nivel_brotli)
+    return gzip.compress(dados, compresslevel=nivel_gzip, mtime=0)
+
+def configurar(server, prefixo_static='/static/', tamanho_minimo=1024):
+    """Ativa compressão das respostas, arquivos pré-comprimidos, cache dos assets versionados e ETag/304 nas respostas GET."""
+    # Os scripts servidos em _dash-component-suites não mudam com o app rodando, então são comprimidos uma vez só
+    scripts_comprimidos = {}
+
+    @server.before_request
+    def servir_precomprimido():
+        requisicao = flask.request
+        if requisicao.method != 'GET' or not requisicao.path.startswith(prefixo_static):
+            return None
+        caminho = requisicao.path[len(prefixo_static):]
+        if not caminho.endswith(EXTENSOES_PRECOMPRIMIDAS):
+            return None
+        codificacao = _codificacao_aceita(requisicao)
+        if codificacao is None:
+            return None
+
+        original = safe_join(pasta_static, caminho)
+        if original is None or not os.path.isfile(original):
+            return None
+        comprimido = original + ('.br' if codificacao == 'br' else '.gz')
+        # Só usa a versão pré-comprimida se ela for mais nova que o original
+        if not _atualizado(comprimido, original):
+            return None
+
+        resposta = flask.send_file(comprimido, mimetype=mimetypes.guess_type(original)[0], conditional=True)
+        resposta.headers['Content-Encoding'] = codificacao
+        resposta.vary.add('Accept-Encoding')
+        return resposta
+
+    @server.after_request
+    def finalizar_resposta(resposta):
+        requisicao = flask.request
+
+        if requisicao.path.startswith(prefixo_static):
+            caminho = requisicao.path[len(prefixo_static):]
+            versao = requisicao.args.get('v')
+            if versao and caminho.startswith(PASTAS_IMUTAVEIS) and resposta.status_code == 200:
+                arquivo = safe_join(pasta_static, caminho)
+                if arquivo is not None and os.path.isfile(arquivo) and versao == hash_arquivo(arquivo):
+                    resposta.cache_control.no_cache = None
+                    resposta.cache_control.public = True
+                    resposta.cache_control.max_age = UM_ANO
+                    resposta.cache_control.immutable = True
+
+        if (resposta.status_code != 200 or resposta.direct_passthrough or requisicao.method == 'HEAD'
+                or 'Content-Encoding' in resposta.headers or resposta.mimetype not in TIPOS_COMPRIMIVEIS):
+            return resposta
+
+        dados = resposta.get_data()
+        codificacao = _codificacao_aceita(requisicao)
+        if codificacao is not None and len(dados) >= tamanho_minimo:
+            if requisicao.path.startswith('/_dash-component-suites/'):
+                chave = (requisicao.full_path, codificacao)
+                if chave not in scripts_comprimidos:
+                    scripts_comprimidos[chave] = comprimir(dados, codificacao)
+                dados = scripts_comprimidos[chave]
+            else:
+                dados = comprimir(dados, codificacao)
+            resposta.set_data(dados)
+            resposta.headers['Content-Encoding'] = codificacao
+            resposta.vary.add('Accept-Encoding')
+
+        # Respostas GET determinísticas (layout, dependências) ganham ETag: se nada mudou, o navegador recebe um 304 sem corpo
+        if requisicao.method == 'GET' and resposta.get_etag()[0] is None:
+            resposta.add_etag()
+            if resposta.cache_control.max_age is None:
+                resposta.cache_control.no_cache = True
+            resposta.make_conditional(requisicao)
+
+        return resposta
+
+def _atualizado(comprimido, original):
+    return os.path.isfile(comprimido) and os.path.getmtime(comprimido) >= os.path.getmtime(original)
+
+def precomprimir(caminho, apenas_desatualizados=False):
+    """Grava as versões .gz (e .br, se o pacote brotli estiver instalado) de um arquivo, com a compressão máxima.
+
+    Com apenas_desatualizados, as versões mais novas que o original são mantidas. A gravação passa por um arquivo
+    temporário, para que os workers nunca sirvam uma versão pela metade."""
+    codificacoes = {'gzip': '.gz'}
+    if brotli is not None:
+        codificacoes['br'] = '.br'
+    gerados = []
+    dados = None
+    for codificacao, extensao in codificacoes.items():
+        if apenas_desatualizados and _atualizado(caminho + extensao, caminho):
+            continue
+        if dados is None:
+            with open(caminho, 'rb') as f:
+                dados = f.read()
+        comprimido = comprimir(dados, codificacao, nivel_gzip=9, nivel_brotli=11)
+        temporario = f'{caminho}{extensao}.{os.getpid()}.tmp'
+        with open(temporario, 'wb') as f:
+            f.write(comprimido)
+        os.replace(temporario, caminho + extensao)
+        gerados.append((caminho + extensao, len(dados), len(comprimido)))
+    return gerados
+
+def garantir_precomprimidos(caminho):
+    """Gera as versões pré-comprimidas que faltam ou estão desatualizadas (os .gz/.br não vão para o repositório).
+    Sem elas, um arquivo servido por send_file, como a geometria do mapa, sai sem compressão."""
+    try:
+        return precomprimir(caminho, apenas_desatualizados=True)
+    except OSError:
+        logger.warning('Não foi possível gravar as versões comprimidas de %s; o arquivo será servido sem compressão', caminho, exc_info=True)
+        return []
+
+def gerar_precomprimidos(pasta=pasta_static):
+    """Gera as versões .gz (e .br, se o pacote brotli estiver instalado) dos arquivos de texto de static/."""
+    gerados = []
+    for raiz, _, arquivos in os.walk(pasta):
+        for arquivo in arquivos:
+            if arquivo.endswith(EXTENSOES_PRECOMPRIMIDAS):
+                gerados.extend(precomprimir(os.path.join(raiz, arquivo)))
+    return [(os.path.relpath(caminho, pasta), original, comprimido) for caminho, original, comprimido in gerados]
+
+if __name__ == '__main__':
+    for caminho, original, comprimido in gerar_precomprimidos():
+        print(f"{caminho:<45}{original:>12,}{comprimido:>12,}")
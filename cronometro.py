@@ -0,0 +1,36 @@
+import contextlib
+import time
+
+
+class Cronometro:
+    """Registra o tempo de cada etapa da inicialização do app.
+
+    Etapas podem ser aninhadas; no relatório as internas aparecem indentadas e só as de primeiro nível entram no total."""
+
+    def __init__(self):
+        self.etapas = []
+        self._profundidade = 0
+
+    def registrar(self, nome, segundos):
+        self.etapas.append([nome, segundos, self._profundidade])
+
+    @contextlib.contextmanager
+    def etapa(self, nome):
+        # A etapa é registrada na entrada para que apareça antes das etapas internas
+        self.registrar(nome, 0.0)
+        registro = self.etapas[-1]
+        self._profundidade += 1
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            registro[1] = time.perf_counter() - inicio
+            self._profundidade -= 1
+
+    def relatorio(self):
+        nomes = ['  ' * profundidade + nome for nome, _, profundidade in self.etapas]
+        largura = max([len(nome) for nome in nomes] + [len('total')])
+        linhas = [f"{nome:<{largura}} {segundos * 1000:>9.1f} ms" for nome, (_, segundos, _) in zip(nomes, self.etapas)]
+        total = sum(segundos for _, segundos, profundidade in self.etapas if profundidade == 0)
+        linhas.append(f"{'total':<{largura}} {total * 1000:>9.1f} ms")
+        return '\n'.join(linhas)
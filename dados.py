@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+import utils
+import indicadores
+import registro_paises
+import geometria
+import indice_espacial
+import vizinhos
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+pasta_dados = os.path.join(project_root, 'static', 'data')
+
+# Arquivos de onde o estado do app é preparado. Os módulos Python entram na lista para que uma mudança
+# no código da preparação também invalide o snapshot
+ARQUIVOS_DADOS = ['hdi_info.csv', 'regioes.xlsx', 'world_population.csv', 'longitude-latitude.csv', 'custom.geo.json']
+MODULOS_PREPARACAO = ['dados.py', 'utils.py', 'indicadores.py', 'registro_paises.py', 'geometria.py', 'indice_espacial.py', 'vizinhos.py']
+
+# Geometria simplificada enviada ao mapa, no nível mais leve que ainda fica bem no zoom inicial
+# Os níveis são gerados com `python geometria.py`
+zoom_mapa = 2
+
+# Coluna exibida para cada opção do radio e colunas mostradas no hover
+opcoes_mapa = {
+    'idh': "Human Development Index (2021)",
+    'populacao': "2022 Population",
+    'renda': "Gross National Income Per Capita (2021)",
+    'expectativa_vida': "Life Expectancy at Birth (2021)",
+}
+# Série de cada opção para o slider de anos: indicador do cubo ou, para a população, as colunas "<ano> Population"
+# do world_population.csv
+indicadores_mapa = {
+    'idh': "Human Development Index",
+    'renda': "Gross National Income Per Capita",
+    'expectativa_vida': "Life Expectancy at Birth",
+}
+# Casas decimais dos valores enviados ao navegador: a renda e a expectativa de vida vêm com 4 a 6 casas no
+# hdi_info.csv, que pesam nos quadros de todos os anos sem mudar as cores. A renda e a população vão como inteiros
+casas_decimais_mapa = {'renda': 0, 'expectativa_vida': 2, 'populacao': 0}
+colunas_hover_mapa = ["Country", "Human Development Groups"]
+hover_opcoes_mapa = {opcao: ["Country"] for opcao in opcoes_mapa}
+hover_opcoes_mapa['idh'] = colunas_hover_mapa
+
+
+class Dados:
+    """Estado preparado a partir dos arquivos de static/data e usado pelos callbacks."""
+
+    def __init__(self, info_mundo, recorte_mundo, json_mapa, cubo_indicadores, registro, ranking, indice_paises, grafo_vizinhos, valores_mapa, fig_mapa, assinatura):
+        self.info_mundo = info_mundo
+        self.recorte_mundo = recorte_mundo
+        self.json_mapa = json_mapa
+        self.cubo_indicadores = cubo_indicadores
+        self.registro = registro
+        self.ranking = ranking
+        self.indice_paises = indice_paises
+        self.grafo_vizinhos = grafo_vizinhos
+        self.valores_mapa = valores_mapa
+        self.fig_mapa = fig_mapa
+        # Hash dos arquivos de origem: muda sempre que os dados preparados podem mudar (usado no ETag da API)
+        self.assinatura = assinatura
+
+
+def arquivos_dados():
+    # Arquivos de dados lidos na preparação, observados pela recarga com o app rodando
+    arquivos = [os.path.join(pasta_dados, arquivo) for arquivo in ARQUIVOS_DADOS] + \
+        [geometria.caminho_nivel(geometria.escolher_nivel(zoom_mapa))]
+    # O nível da geometria pode ainda não ter sido gerado
+    return [arquivo for arquivo in arquivos if os.path.exists(arquivo)]
+
+def arquivos_fonte():
+    modulos = [os.path.join(project_root, modulo) for modulo in MODULOS_PREPARACAO]
+    return arquivos_dados() + [modulo for modulo in modulos if os.path.exists(modulo)]
+
+def assinatura_fontes():
+    sha = hashlib.sha256()
+    for caminho in arquivos_fonte():
+        with open(caminho, 'rb') as f:
+            sha.update(hashlib.sha256(f.read()).digest())
+    return sha.hexdigest()
+
+def criar_figura_mapa(recorte_mundo, json_mapa, valores_mapa):
+    fig_mapa = px.choropleth_mapbox(recorte_mundo, locations='ISO3', geojson=json_mapa, color=opcoes_mapa['idh'],
+                                center={"lat": 14.778986, "lon": -15.723305}, zoom=zoom_mapa,
+                                color_continuous_scale='ylgn', opacity=0.4,
+                                hover_data={coluna: True for coluna in colunas_hover_mapa}
+                                )
+    fig_mapa.update_layout(
+        paper_bgcolor="#d4dadc",
+        autosize=True, # Preenche o tamanho inteiro da tela, ou ROW em que está inserido
+        margin=go.layout.Margin(l=0, r=0, t=0, b=0), # Define a margem do mapa
+        showlegend=False,
+        mapbox_style='carto-positron',
+        # Mantém o zoom e a posição do usuário quando a figura é trocada no navegador (métrica, ano, nível da geometria)
+        uirevision='mapa',
+    )
+    fig_mapa.update_coloraxes(colorbar=dict(len=0.5, yanchor='bottom', y=0))
+    fig_mapa.update_layout(
+        coloraxis_colorbar=dict(
+            xanchor="left",  # Ancora a escala de cores à esquerda
+            yanchor="top",  # Ancora a escala de cores no topo
+            x=0.02,  # Define a posição horizontal da escala de cores em relação ao mapa
+            y=0.98  # Define a posição vertical da escala de cores em relação ao mapa
+        )
+    )
+    valores = valores_mapa['idh']
+    indice = utils.indice_quadro(valores, valores['ano_padrao'])
+    fig_mapa.update_traces(z=valores['quadros'][indice], hovertemplate=valores['hovertemplates'][indice])
+    fig_mapa.update_coloraxes(cmin=valores_mapa['idh']['cmin'], cmax=valores_mapa['idh']['cmax'])
+    return fig_mapa
+
+def preparar_dados(cronometro):
+    with cronometro.etapa('assinatura dos arquivos'):
+        assinatura = assinatura_fontes()
+
+    # ===================================================================
+    # Leitura dos datasets
+    with cronometro.etapa('leitura hdi_info.csv'):
+        info_mundo = pd.read_csv(os.path.join(pasta_dados, 'hdi_info.csv'))
+    with cronometro.etapa('leitura regioes.xlsx'):
+        regioes = pd.read_excel(os.path.join(pasta_dados, 'regioes.xlsx'))
+    with cronometro.etapa('leitura world_population.csv'):
+        df_populacao = pd.read_csv(os.path.join(pasta_dados, 'world_population.csv'))
+    with cronometro.etapa('leitura longitude-latitude.csv'):
+        df_coordenadas = pd.read_csv(os.path.join(pasta_dados, 'longitude-latitude.csv'), keep_default_na=False, na_values=[''])
+
+    # ====================================================================
+    # Operações com o GeoJSON
+    with cronometro.etapa('leitura custom.geo.json'):
+        with open(geometria.caminho_geojson_original, "r", encoding="utf-8") as f:
+            json_paises = json.load(f)
+
+    with cronometro.etapa('ids e siglas do GeoJSON'):
+        # Cria a key 'id' para cada pais
+        geometria.definir_ids_paises(json_paises)
+
+        # Código para criar uma nova propriedade 'sigla' em todos os paises no GeoJSON, que será utilizada para buscar a imagem da bandeira no diretório
+        excecoes_iso_a2 = ['N. Cyprus', 'Siachen Glacier', 'Somaliland']
+        for pais in json_paises['features']:
+            sigla = pais['properties']['iso_a2']
+            if(pais['properties']['iso_a2'] == '-99'):
+                sigla = pais['properties']['iso_a2_eh']
+                if(pais['properties']['name'] in excecoes_iso_a2):
+                    sigla = pais['properties']['postal']
+            sigla = sigla.lower()
+            pais['properties']['sigla'] = sigla
+
+    with cronometro.etapa('geometria do mapa'):
+        json_mapa = geometria.carregar_nivel(geometria.escolher_nivel(zoom_mapa), json_paises)
+
+    # ======================================================
+    # Operações nos Datasets
+    with cronometro.etapa('recorte_mundo'):
+        # Merge no dataset de regiões para plot de comparação entre o país e a região que ele pertence
+        info_mundo['UNDP Developing Regions'] = info_mundo['ISO3'].map(regioes.set_index('ISO Code')['UN Region'])
+        info_mundo.rename(columns = {'UNDP Developing Regions': 'UN Region'}, inplace=True)
+        info_mundo['World Bank Income Groups'] = info_mundo['ISO3'].map(regioes.set_index('ISO Code')['World Bank Income Groups'])
+
+        # Recorte no dataset principal e dataset de população para projeção nos cards e no mapa
+        recorte_mundo = info_mundo.iloc[:, :5].copy()
+        recorte_mundo['Gross National Income Per Capita (2021)'] = info_mundo['Gross National Income Per Capita (2021)']
+        recorte_mundo['Life Expectancy at Birth (2021)'] = info_mundo['Life Expectancy at Birth (2021)']
+        recorte_mundo['World Bank Income Groups'] = info_mundo['World Bank Income Groups']
+
+        merged_df = pd.merge(recorte_mundo, df_populacao, left_on='ISO3', right_on='CCA3')
+
+        novas_colunas = ['1970 Population', '1980 Population', '1990 Population', '2000 Population', '2010 Population', '2015 Population', '2020 Population', '2022 Population', 'Capital', 'World Population Percentage', 'Area (km²)']
+        recorte_mundo[novas_colunas] = merged_df[novas_colunas]
+
+        recorte_mundo['Human Development Index (2021)'] = info_mundo['Human Development Index (2021)']
+
+    with cronometro.etapa('cubo de indicadores'):
+        # Cubo (indicador × país × ano) com todas as séries do dataset, montado uma única vez
+        cubo_indicadores = indicadores.CuboIndicadores(info_mundo)
+
+    with cronometro.etapa('registro de países'):
+        # Índices por nome, ISO3, sigla e região para as buscas feitas a cada clique
+        registro = registro_paises.RegistroPaises(recorte_mundo, json_paises, df_coordenadas)
+
+    with cronometro.etapa('ranking'):
+        # Posição e percentil de cada país em todos os indicadores e anos, no mundo e na região
+        ranking = indicadores.RankingIndicadores(cubo_indicadores, registro)
+
+    with cronometro.etapa('índice espacial'):
+        # Grade sobre as fronteiras originais (não simplificadas) para localizar o país de um ponto (lat, lon)
+        indice_paises = indice_espacial.IndicePaises(json_paises)
+
+    with cronometro.etapa('vizinhos'):
+        # Fronteiras terrestres (arestas compartilhadas no GeoJSON) e distâncias entre os centros dos países
+        grafo_vizinhos = vizinhos.GrafoVizinhos(registro, df_coordenadas, indice_paises)
+
+    # ======================================================
+    # Criação do mapa
+    with cronometro.etapa('figura do mapa'):
+        # Tabela com os valores de cada métrica em cada ano, enviada uma única vez ao navegador. A troca de métrica no
+        # radio e de ano no slider apenas recolore o mapa, sem reenviar a geometria nem reconstruir a figura
+        colunas_populacao = [coluna for coluna in recorte_mundo.columns if coluna.endswith(' Population')]
+        valores_mapa = {}
+        for opcao, coluna in opcoes_mapa.items():
+            if opcao in indicadores_mapa:
+                anos, valores = cubo_indicadores.series(indicadores_mapa[opcao])
+                titulos = [f'{indicadores_mapa[opcao]} ({ano})' for ano in anos]
+                quadros = valores.T
+            else:
+                anos = [int(coluna_populacao.split()[0]) for coluna_populacao in colunas_populacao]
+                titulos = colunas_populacao
+                quadros = recorte_mundo[colunas_populacao].to_numpy(dtype=float).T
+            valores_mapa[opcao] = utils.valores_metrica_mapa(titulos, anos, quadros, int(anos[titulos.index(coluna)]),
+                                                             colunas_hover_mapa, hover_opcoes_mapa[opcao], casas_decimais_mapa.get(opcao))
+        # A figura é guardada como dict, que o dcc.Graph aceita diretamente e é bem mais rápido de (des)serializar
+        fig_mapa = criar_figura_mapa(recorte_mundo, json_mapa, valores_mapa).to_dict()
+
+    return Dados(info_mundo, recorte_mundo, json_mapa, cubo_indicadores, registro, ranking, indice_paises, grafo_vizinhos, valores_mapa, fig_mapa, assinatura)
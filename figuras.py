@@ -0,0 +1,86 @@
+import json
+
+import numpy as np
+import plotly.io as pio
+
+try:
+    import orjson
+except ImportError:
+    # Sem o orjson a serialização fica com o encoder do plotly, mais lento
+    orjson = None
+
+# Figuras montadas direto como dict, no mesmo formato que o plotly.express + padronizar_grafico geram, sem a
+# validação e a criação dos objetos do plotly. O template simple_white (o maior pedaço do layout) é convertido
+# uma única vez e compartilhado por todas as figuras; na serialização entra o JSON já pronto dele
+
+template = pio.templates['simple_white'].to_plotly_json()
+template_json = pio.json.to_json_plotly(template)
+
+# Sequência de cores que o plotly.express usa com o template padrão
+cores = list(pio.templates['plotly'].layout.colorway)
+
+cor_serie = '#258c03'
+fonte_eixos = {'color': '#16350a', 'size': 18}
+
+
+def titulo(texto, **extras):
+    return {'text': texto, **extras, 'x': 0.5, 'y': 0.95, 'xanchor': 'center', 'yanchor': 'top'}
+
+def eixo(ancora, titulo_eixo, destaque=False):
+    dados_eixo = {'anchor': ancora, 'domain': [0.0, 1.0], 'title': {'text': titulo_eixo}}
+    if destaque:
+        # Fontes maiores dos gráficos de um país (padronizar_grafico_pais)
+        dados_eixo['title']['font'] = {'size': 20}
+        dados_eixo['tickfont'] = dict(fonte_eixos)
+    return dados_eixo
+
+def layout(titulo_grafico, titulo_x, titulo_y, legenda, destaque=False, autosize=True, **extras):
+    return {
+        'xaxis': eixo('y', titulo_x, destaque),
+        'yaxis': eixo('x', titulo_y, destaque),
+        'legend': legenda,
+        'title': titulo_grafico,
+        **extras,
+        'paper_bgcolor': '#f7f5f6',
+        'plot_bgcolor': '#f7f5f6',
+        'autosize': autosize,
+        'width': 900,
+        'height': 500,
+        'template': template,
+    }
+
+def layout_pais(metrica, nome_pais, titulo_x, titulo_y, legenda=None, **extras):
+    """Layout dos gráficos de um país, igual ao de padronizar_grafico_pais."""
+    texto = f"Evolução {metrica}: <span style='color: #34ce00'>{nome_pais}</span>"
+    return layout(titulo(texto, font={'size': 24}), titulo_x, titulo_y, legenda or {'tracegroupgap': 0}, destaque=True, **extras)
+
+def figura(data, layout_figura):
+    return {'data': data, 'layout': layout_figura}
+
+def _converter(valor):
+    # Arrays de objetos (ex.: nomes dos países) e escalares do NumPy, que o orjson não serializa sozinho
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f'Tipo não serializável: {type(valor)}')
+
+def para_json(fig):
+    """Serializa uma figura (dict montado aqui ou go.Figure) em JSON."""
+    if not isinstance(fig, dict):
+        return fig.to_json()
+
+    layout_figura = fig['layout']
+    if layout_figura.get('template') is not template or len(layout_figura) == 1:
+        return pio.json.to_json_plotly(fig)
+
+    # O template entra como texto já serializado, no fim do layout
+    sem_template = {'data': fig['data'], 'layout': {chave: valor for chave, valor in layout_figura.items() if chave != 'template'}}
+    if orjson is not None:
+        texto = orjson.dumps(sem_template, option=orjson.OPT_SERIALIZE_NUMPY, default=_converter).decode()
+    else:
+        texto = pio.json.to_json_plotly(sem_template)
+    return f'{texto[:-2]},"template":{template_json}}}}}'
+
+def carregar(texto):
+    return orjson.loads(texto) if orjson is not None else json.loads(texto)
@@ -0,0 +1,262 @@
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+import compressao
+
+# Níveis de simplificação da geometria dos países, do mais grosseiro para o mais detalhado.
+# A tolerância (em graus) é usada pelo Douglas-Peucker e as casas decimais definem a quantização das coordenadas.
+NIVEIS = {
+    'mundo': {'tolerancia': 0.1, 'casas_decimais': 2},
+    'continente': {'tolerancia': 0.03, 'casas_decimais': 3},
+    'pais': {'tolerancia': 0.005, 'casas_decimais': 4},
+}
+
+# Países cujo 'iso_a3' no GeoJSON é '-99' e que precisam do 'iso_a3_eh' para casar com o dataset
+PAISES_ISO3_EXCECAO = ['MDV', 'MUS', 'NOR', 'FRA', 'SYC']
+
+# Largura do tile do mapbox em pixels, usada para converter o zoom em graus por pixel
+TAMANHO_TILE = 512
+
+pasta_dados = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'data')
+caminho_geojson_original = os.path.join(pasta_dados, 'custom.geo.json')
+
+
+def caminho_nivel(nivel):
+    return os.path.join(pasta_dados, f'custom.geo.{nivel}.json')
+
+def definir_ids_paises(json_paises):
+    # Cria a key 'id' para cada pais, utilizada pelo choropleth para casar com a coluna ISO3
+    for pais in json_paises['features']:
+        iso_a3 = pais['properties']['iso_a3']
+        iso_a3_eh = pais['properties']['iso_a3_eh']
+        if iso_a3_eh in PAISES_ISO3_EXCECAO:
+            iso_a3 = iso_a3_eh
+        pais['id'] = iso_a3
+    return json_paises
+
+def escolher_nivel(zoom):
+    # Escolhe o nível mais grosseiro cuja tolerância ainda fica abaixo de um pixel no zoom informado
+    graus_por_pixel = 360 / (TAMANHO_TILE * 2 ** zoom)
+    for nivel, parametros in NIVEIS.items():
+        if parametros['tolerancia'] <= graus_por_pixel:
+            return nivel
+    return list(NIVEIS)[-1]
+
+def zoom_maximo(nivel):
+    # Maior zoom em que escolher_nivel ainda escolhe o nível: acima dele, a tolerância passa de um pixel
+    return math.log2(360 / (TAMANHO_TILE * NIVEIS[nivel]['tolerancia']))
+
+def _poligonos(geometria):
+    if geometria['type'] == 'Polygon':
+        return [geometria['coordinates']]
+    return geometria['coordinates']
+
+def _quantizar_anel(anel, casas_decimais):
+    pontos = np.round(np.asarray(anel, dtype=float), casas_decimais)
+    # Remove pontos repetidos em sequência gerados pela quantização
+    repetidos = np.all(pontos[1:] == pontos[:-1], axis=1)
+    pontos = pontos[np.concatenate([[True], ~repetidos])]
+    return [tuple(ponto) for ponto in pontos.tolist()]
+
+def _douglas_peucker(pontos, tolerancia):
+    # Simplificação de uma linha mantendo sempre o primeiro e o último ponto
+    pontos = np.asarray(pontos, dtype=float)
+    manter = np.zeros(len(pontos), dtype=bool)
+    manter[0] = manter[-1] = True
+    pilha = [(0, len(pontos) - 1)]
+
+    while pilha:
+        inicio, fim = pilha.pop()
+        if fim - inicio < 2:
+            continue
+        a, b = pontos[inicio], pontos[fim]
+        trecho = pontos[inicio + 1:fim]
+        segmento = b - a
+        comprimento = np.hypot(*segmento)
+        if comprimento == 0:
+            distancias = np.hypot(*(trecho - a).T)
+        else:
+            distancias = np.abs(segmento[0] * (trecho[:, 1] - a[1]) - segmento[1] * (trecho[:, 0] - a[0])) / comprimento
+        indice = int(np.argmax(distancias))
+        if distancias[indice] > tolerancia:
+            meio = inicio + 1 + indice
+            manter[meio] = True
+            pilha.append((inicio, meio))
+            pilha.append((meio, fim))
+
+    return [tuple(ponto) for ponto in pontos[manter].tolist()]
+
+def _simplificar_arco(arco, tolerancia, arcos_simplificados):
+    # Arcos compartilhados entre dois países aparecem em sentidos opostos em cada anel, por isso
+    # são simplificados sempre no mesmo sentido e guardados para que a fronteira fique idêntica nos dois
+    invertido = arco[0] > arco[-1]
+    chave = tuple(reversed(arco)) if invertido else tuple(arco)
+    if chave not in arcos_simplificados:
+        arcos_simplificados[chave] = _douglas_peucker(chave, tolerancia)
+    simplificado = arcos_simplificados[chave]
+    return list(reversed(simplificado)) if invertido else simplificado
+
+def _simplificar_anel(anel, juncoes, tolerancia, arcos_simplificados):
+    pontos = anel[:-1]
+    indices_juncao = [i for i, ponto in enumerate(pontos) if ponto in juncoes]
+
+    if not indices_juncao:
+        # Anel sem junções (ilhas ou enclaves): começa no menor ponto e segue sempre no mesmo sentido,
+        # assim um enclave e o buraco correspondente no país vizinho são simplificados da mesma forma
+        inicio = pontos.index(min(pontos))
+        pontos = pontos[inicio:] + pontos[:inicio]
+        invertido = len(pontos) > 2 and pontos[-1] < pontos[1]
+        if invertido:
+            pontos = pontos[:1] + pontos[:0:-1]
+
+        coordenadas = np.asarray(pontos)
+        mais_distante = int(np.argmax(np.hypot(*(coordenadas - coordenadas[0]).T)))
+        if mais_distante == 0:
+            return anel
+        primeira_metade = _douglas_peucker(pontos[:mais_distante + 1], tolerancia)
+        segunda_metade = _douglas_peucker(pontos[mais_distante:] + [pontos[0]], tolerancia)
+        resultado = primeira_metade + segunda_metade[1:]
+        return list(reversed(resultado)) if invertido else resultado
+
+    # Rotaciona o anel para começar em uma junção e o divide em arcos entre junções consecutivas
+    inicio = indices_juncao[0]
+    pontos = pontos[inicio:] + pontos[:inicio]
+    indices_juncao = [i - inicio for i in indices_juncao] + [len(pontos)]
+    pontos = pontos + [pontos[0]]
+
+    resultado = [pontos[0]]
+    for atual, proxima in zip(indices_juncao[:-1], indices_juncao[1:]):
+        arco = pontos[atual:proxima + 1]
+        resultado.extend(_simplificar_arco(arco, tolerancia, arcos_simplificados)[1:])
+    return resultado
+
+def _encontrar_juncoes(aneis):
+    # Um ponto é junção quando é compartilhado por mais de um anel e o conjunto de anéis que o contém
+    # muda em algum dos vizinhos, ou seja, é onde uma fronteira compartilhada começa ou termina
+    aneis_por_ponto = {}
+    for indice, anel in enumerate(aneis):
+        for ponto in anel[:-1]:
+            aneis_por_ponto.setdefault(ponto, set()).add(indice)
+
+    juncoes = set()
+    for anel in aneis:
+        pontos = anel[:-1]
+        for i, ponto in enumerate(pontos):
+            conjunto = aneis_por_ponto[ponto]
+            if len(conjunto) < 2:
+                continue
+            if aneis_por_ponto[pontos[i - 1]] != conjunto or aneis_por_ponto[pontos[(i + 1) % len(pontos)]] != conjunto:
+                juncoes.add(ponto)
+    return juncoes
+
+def simplificar_geojson(json_paises, tolerancia, casas_decimais):
+    """Gera uma versão simplificada do GeoJSON preservando as fronteiras compartilhadas entre países.
+
+    Apenas o 'id' de cada país é mantido nas propriedades, já que o mapa só precisa dele para colorir."""
+    aneis = []
+    estrutura = []
+    for feature in json_paises['features']:
+        poligonos = []
+        for poligono in _poligonos(feature['geometry']):
+            indices = []
+            for anel in poligono:
+                anel = _quantizar_anel(anel, casas_decimais)
+                if anel[0] != anel[-1]:
+                    anel.append(anel[0])
+                indices.append(len(aneis))
+                aneis.append(anel)
+            poligonos.append(indices)
+        estrutura.append(poligonos)
+
+    juncoes = _encontrar_juncoes(aneis)
+    arcos_simplificados = {}
+
+    features = []
+    for feature, poligonos in zip(json_paises['features'], estrutura):
+        coordenadas = []
+        for indices in poligonos:
+            poligono = []
+            for posicao, indice in enumerate(indices):
+                anel = _simplificar_anel(aneis[indice], juncoes, tolerancia, arcos_simplificados)
+                if len(anel) >= 4:
+                    poligono.append([list(ponto) for ponto in anel])
+                elif posicao == 0:
+                    # Anel externo colapsado pela simplificação, o polígono inteiro é descartado
+                    break
+            if poligono:
+                coordenadas.append(poligono)
+
+        if not coordenadas:
+            # Países muito pequenos para o nível: mantém a geometria apenas quantizada para não sumirem do mapa
+            coordenadas = [[[list(ponto) for ponto in aneis[indice]] for indice in indices] for indices in poligonos]
+
+        features.append({
+            'type': 'Feature',
+            'id': feature.get('id'),
+            'properties': {},
+            'geometry': {'type': 'MultiPolygon', 'coordinates': coordenadas},
+        })
+
+    return {'type': 'FeatureCollection', 'features': features}
+
+def carregar_geojson_original():
+    with open(caminho_geojson_original, 'r', encoding='utf-8') as f:
+        json_paises = json.load(f)
+    return definir_ids_paises(json_paises)
+
+def gerar_niveis(json_paises=None):
+    if json_paises is None:
+        json_paises = carregar_geojson_original()
+    niveis = {}
+    for nivel, parametros in NIVEIS.items():
+        niveis[nivel] = simplificar_geojson(json_paises, **parametros)
+        with open(caminho_nivel(nivel), 'w', encoding='utf-8') as f:
+            json.dump(niveis[nivel], f, separators=(',', ':'))
+        # Os níveis são servidos direto do disco, então as versões .gz/.br são geradas junto
+        compressao.precomprimir(caminho_nivel(nivel))
+    return niveis
+
+def carregar_nivel(nivel, json_paises=None):
+    # Lê o nível já gerado em disco; se ainda não existir, gera a partir do GeoJSON original
+    caminho = caminho_nivel(nivel)
+    if os.path.exists(caminho):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    if json_paises is None:
+        json_paises = carregar_geojson_original()
+    return simplificar_geojson(json_paises, **NIVEIS[nivel])
+
+def relatorio_niveis(json_paises, niveis, df, coluna):
+    # Mede o tamanho do GeoJSON e da figura serializada, além do tempo de construir e serializar a figura
+    import plotly.express as px
+
+    linhas = []
+    for nome, geometria in [('original', json_paises)] + list(niveis.items()):
+        inicio = time.perf_counter()
+        fig = px.choropleth_mapbox(df, locations='ISO3', geojson=geometria, color=coluna, zoom=2)
+        figura_json = fig.to_json()
+        tempo = time.perf_counter() - inicio
+        linhas.append({
+            'nivel': nome,
+            'bytes_geojson': len(json.dumps(geometria, separators=(',', ':'))),
+            'bytes_figura': len(figura_json),
+            'tempo_ms': tempo * 1000,
+        })
+    return linhas
+
+
+if __name__ == '__main__':
+    import pandas as pd
+
+    json_paises = carregar_geojson_original()
+    niveis = gerar_niveis(json_paises)
+
+    info_mundo = pd.read_csv(os.path.join(pasta_dados, 'hdi_info.csv'))
+    print(f"Nível escolhido para zoom=2: {escolher_nivel(2)}")
+    print(f"{'nível':<12}{'GeoJSON (bytes)':>18}{'figura (bytes)':>18}{'figura (ms)':>14}")
+    for linha in relatorio_niveis(json_paises, niveis, info_mundo, 'Human Development Index (2021)'):
+        print(f"{linha['nivel']:<12}{linha['bytes_geojson']:>18,}{linha['bytes_figura']:>18,}{linha['tempo_ms']:>14.1f}")
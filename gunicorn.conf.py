@@ -0,0 +1,28 @@
+# Configuração do gunicorn para rodar o Info Mundo com vários workers.
+# Os callbacks não guardam estado no processo (o estado de cada usuário fica na própria página),
+# então qualquer worker pode atender qualquer requisição.
+#
+# Uso: gunicorn app:server
+#
+# Antes de cada release, `python benchmarks/verificar_sessoes.py` confere os dois modos desta configuração com
+# sessões simultâneas e termina com erro se alguma recebeu o gráfico de outra (ver o README)
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('INFO_MUNDO_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('INFO_MUNDO_TIMEOUT', '60'))
+
+# Com INFO_MUNDO_PRELOAD=1, o app (imports e dados) é carregado uma única vez no processo principal e os
+# workers são criados por fork, compartilhando essas páginas de memória enquanto elas não são modificadas.
+# Mudanças no código passam a exigir reiniciar o processo principal (o HUP só recria os workers)
+preload_app = os.environ.get('INFO_MUNDO_PRELOAD', '0') not in ('', '0')
+
+
+def when_ready(server):
+    if preload_app:
+        # Os objetos já criados vão para uma geração permanente que o coletor de lixo não percorre. Percorrê-los
+        # escreve no cabeçalho de cada objeto, e o kernel copiaria as páginas deles para cada worker
+        gc.collect()
+        gc.freeze()
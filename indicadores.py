@@ -0,0 +1,175 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Colunas do hdi_info.csv no formato "<indicador> (<ano>)", como "Human Development Index (1990)"
+padrao_coluna_ano = re.compile(r'^(?P<indicador>.+) \((?P<ano>\d{4})\)$')
+
+
+class CuboIndicadores:
+    """Valores do hdi_info.csv organizados em um array (indicador × país × ano).
+
+    O dataset é percorrido uma única vez na criação do cubo, depois disso qualquer série
+    é obtida por indexação direta, sem filtros no DataFrame nem leitura dos nomes das colunas."""
+
+    def __init__(self, df):
+        colunas = {}
+        for coluna in df.columns:
+            correspondencia = padrao_coluna_ano.match(coluna)
+            if correspondencia:
+                indicador = correspondencia.group('indicador')
+                ano = int(correspondencia.group('ano'))
+                colunas.setdefault(indicador, {})[ano] = coluna
+
+        todos_anos = sorted({ano for anos in colunas.values() for ano in anos})
+
+        self.indicadores = list(colunas)
+        self.anos = np.arange(todos_anos[0], todos_anos[-1] + 1)
+        self.paises = df['Country'].tolist()
+        self.iso3 = df['ISO3'].tolist()
+
+        self.indice_indicador = {indicador: i for i, indicador in enumerate(self.indicadores)}
+        self.indice_pais = {pais: i for i, pais in enumerate(self.paises)}
+        self.indice_iso3 = {iso3: i for i, iso3 in enumerate(self.iso3)}
+        self.indice_ano = {int(ano): i for i, ano in enumerate(self.anos)}
+
+        self.valores = np.full((len(self.indicadores), len(self.paises), len(self.anos)), np.nan)
+        # Intervalo de anos (slice no eixo dos anos) em que cada indicador possui dados
+        self.intervalo_anos = {}
+        for indicador, anos in colunas.items():
+            i = self.indice_indicador[indicador]
+            for ano, coluna in anos.items():
+                self.valores[i, :, self.indice_ano[ano]] = pd.to_numeric(df[coluna], errors='coerce').to_numpy(dtype=float)
+            self.intervalo_anos[indicador] = slice(self.indice_ano[min(anos)], self.indice_ano[max(anos)] + 1)
+
+    def posicao_pais(self, pais):
+        # Aceita tanto o nome do país quanto o ISO3
+        if pais in self.indice_pais:
+            return self.indice_pais[pais]
+        return self.indice_iso3[pais]
+
+    def anos_indicador(self, indicador):
+        return self.anos[self.intervalo_anos[indicador]]
+
+    def serie(self, indicador, pais):
+        """Retorna os anos e os valores do indicador para um país."""
+        intervalo = self.intervalo_anos[indicador]
+        return self.anos[intervalo], self.valores[self.indice_indicador[indicador], self.posicao_pais(pais), intervalo]
+
+    def intervalo(self, indicador, ano_inicio=None, ano_fim=None):
+        """Slice no eixo dos anos com os anos do indicador, restritos a ano_inicio e ano_fim quando informados."""
+        intervalo = self.intervalo_anos[indicador]
+        if ano_inicio is not None or ano_fim is not None:
+            inicio = intervalo.start if ano_inicio is None else max(intervalo.start, int(ano_inicio) - int(self.anos[0]))
+            fim = intervalo.stop if ano_fim is None else min(intervalo.stop, int(ano_fim) - int(self.anos[0]) + 1)
+            intervalo = slice(inicio, max(inicio, fim))
+        return intervalo
+
+    def series(self, indicador, paises=None, ano_inicio=None, ano_fim=None):
+        """Retorna os anos e uma matriz (país × ano) com os valores do indicador.
+
+        Sem a lista de países, retorna todos na ordem do dataset. ano_inicio e ano_fim restringem o intervalo
+        de anos aos que o indicador possui. Todas as séries saem de uma única indexação no cubo."""
+        intervalo = self.intervalo(indicador, ano_inicio, ano_fim)
+        valores = self.valores[self.indice_indicador[indicador], :, intervalo]
+        if paises is not None:
+            valores = valores[[self.posicao_pais(pais) for pais in paises]]
+        return self.anos[intervalo], valores
+
+    def valores_ano(self, indicador, ano):
+        """Retorna o valor do indicador em um ano para todos os países."""
+        return self.valores[self.indice_indicador[indicador], :, self.indice_ano[ano]]
+
+
+# Indicadores em que o menor valor fica em primeiro no ranking (desigualdade, mortalidade, emissões...). Nos outros,
+# o maior valor fica em primeiro
+MENOR_MELHOR = {
+    'HDI Rank', 'GII Rank', 'GDI Group', 'Coefficient of human inequality', 'Overall loss (%)',
+    'Inequality in life expectancy', 'Inequality in eduation', 'Inequality in income', 'Gender Inequality Index',
+    'Maternal Mortality Ratio (deaths per 100,000 live births)', 'Adolescent Birth Rate (births per 1,000 women ages 15-19)',
+    'Difference from HDI value (%)', 'Carbon dioxide emissions per capita (production) (tonnes)',
+    'Material footprint per capita (tonnes)',
+}
+
+# Medidas do ranking que podem ser pedidas em RankingIndicadores.series
+MEDIDAS_RANKING = ('posicao', 'percentil')
+
+
+def _ranking(valores, menor_melhor):
+    """Posição (ranking denso, 0 sem valor), percentil e total de países com valor, pelo eixo dos países.
+
+    valores é um array (indicador × país × ano) e menor_melhor diz, para cada indicador, se o menor valor fica em
+    primeiro. O percentil é a porcentagem dos outros países que ficaram atrás, com os empates contando metade."""
+    quantidade_paises = valores.shape[1]
+    # Ordenando a pontuação em ordem crescente, o melhor país vem primeiro e os sem valor (NaN) por último
+    pontuacao = np.where(np.asarray(menor_melhor)[:, None, None], valores, -valores)
+    ordem = np.argsort(pontuacao, axis=1, kind='stable')
+    ordenados = np.take_along_axis(pontuacao, ordem, axis=1)
+    validos = ~np.isnan(ordenados)
+    total = validos.sum(axis=1)
+
+    # Início e fim de cada grupo de empatados na ordem; o ranking denso conta os grupos
+    novo = np.ones(ordenados.shape, dtype=bool)
+    novo[:, 1:] = ordenados[:, 1:] != ordenados[:, :-1]
+    ultimo = np.ones(ordenados.shape, dtype=bool)
+    ultimo[:, :-1] = novo[:, 1:]
+    posicoes = np.arange(quantidade_paises)[None, :, None]
+    primeiro_grupo = np.maximum.accumulate(np.where(novo, posicoes, 0), axis=1)
+    ultimo_grupo = np.minimum.accumulate(np.where(ultimo, posicoes, quantidade_paises)[:, ::-1], axis=1)[:, ::-1]
+
+    piores = total[:, None, :] - ultimo_grupo - 1
+    empatados = ultimo_grupo - primeiro_grupo
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentil = np.where(total[:, None, :] > 1, 100 * (piores + empatados / 2) / (total[:, None, :] - 1), 100.0)
+
+    posicao = np.zeros(valores.shape, dtype=np.int16)
+    np.put_along_axis(posicao, ordem, np.where(validos, np.cumsum(novo, axis=1), 0), axis=1)
+    percentis = np.full(valores.shape, np.nan, dtype=np.float32)
+    np.put_along_axis(percentis, ordem, np.where(validos, percentil, np.nan), axis=1)
+    return posicao, percentis, total.astype(np.int16)
+
+
+class RankingIndicadores:
+    """Posição e percentil de cada país em cada indicador e ano do cubo, no mundo e dentro do grupo (região da ONU).
+
+    As tabelas são calculadas de uma vez para todo o cubo na preparação dos dados; nas requisições, a posição de
+    um país ou a série dela ao longo dos anos sai de uma indexação, sem ordenar nenhuma coluna."""
+
+    def __init__(self, cubo, registro, agrupamento='UN Region'):
+        self.cubo = cubo
+        self.agrupamento = agrupamento
+        menor_melhor = [indicador in MENOR_MELHOR for indicador in cubo.indicadores]
+        self.posicao, self.percentil, self.total = _ranking(cubo.valores, menor_melhor)
+
+        # O mesmo cálculo dentro de cada grupo; total_grupo tem o total de países com valor no grupo de cada país
+        self.posicao_grupo = np.zeros_like(self.posicao)
+        self.percentil_grupo = np.full_like(self.percentil, np.nan)
+        self.total_grupo = np.zeros_like(self.posicao)
+        for membros in registro.membros[agrupamento].values():
+            linhas = [cubo.posicao_pais(pais) for pais in membros]
+            posicao, percentil, total = _ranking(cubo.valores[:, linhas, :], menor_melhor)
+            self.posicao_grupo[:, linhas, :] = posicao
+            self.percentil_grupo[:, linhas, :] = percentil
+            self.total_grupo[:, linhas, :] = total[:, None, :]
+
+    def ranking(self, indicador, pais, ano, grupo=False):
+        """Posição, total de países com valor e percentil do país no indicador e ano (posição 0 se ele não tem valor)."""
+        i, p, a = self.cubo.indice_indicador[indicador], self.cubo.posicao_pais(pais), self.cubo.indice_ano[int(ano)]
+        if grupo:
+            return int(self.posicao_grupo[i, p, a]), int(self.total_grupo[i, p, a]), float(self.percentil_grupo[i, p, a])
+        return int(self.posicao[i, p, a]), int(self.total[i, a]), float(self.percentil[i, p, a])
+
+    def series(self, indicador, paises=None, ano_inicio=None, ano_fim=None, medida='posicao', grupo=False):
+        """Como CuboIndicadores.series, com a posição (NaN sem valor) ou o percentil de cada país em vez do valor."""
+        intervalo = self.cubo.intervalo(indicador, ano_inicio, ano_fim)
+        if medida == 'posicao':
+            tabela = self.posicao_grupo if grupo else self.posicao
+        else:
+            tabela = self.percentil_grupo if grupo else self.percentil
+        valores = tabela[self.cubo.indice_indicador[indicador], :, intervalo]
+        if paises is not None:
+            valores = valores[[self.cubo.posicao_pais(pais) for pais in paises]]
+        if medida == 'posicao':
+            valores = np.where(valores > 0, valores, np.nan)
+        return self.cubo.anos[intervalo], valores
@@ -0,0 +1,182 @@
+import math
+
+import numpy as np
+
+# Tamanho, em graus, das células da grade do índice. Células menores deixam menos arestas por célula na
+# fronteira e mais células inteiramente dentro de um país, ao custo de tabelas maiores
+TAMANHO_CELULA = 0.5
+
+# Pontos em células com fronteiras testados de uma vez na localização em lote
+TAMANHO_BLOCO = 10000
+
+
+def _arestas(json_paises):
+    # Todas as arestas (x1, y1, x2, y2) dos anéis de cada país, com o índice do país de cada uma
+    ids = []
+    nomes = []
+    arestas = []
+    paises_arestas = []
+    for indice, feature in enumerate(json_paises['features']):
+        ids.append(feature.get('id'))
+        nomes.append(feature['properties'].get('name'))
+        geometria = feature['geometry']
+        poligonos = [geometria['coordinates']] if geometria['type'] == 'Polygon' else geometria['coordinates']
+        for poligono in poligonos:
+            for anel in poligono:
+                pontos = np.asarray(anel, dtype=float)[:, :2]
+                if not np.array_equal(pontos[0], pontos[-1]):
+                    pontos = np.vstack([pontos, pontos[:1]])
+                arestas.append(np.hstack([pontos[:-1], pontos[1:]]))
+                paises_arestas.append(np.full(len(pontos) - 1, indice, dtype=np.int16))
+    return ids, nomes, np.vstack(arestas), np.concatenate(paises_arestas)
+
+
+class IndicePaises:
+    """Índice espacial das fronteiras do GeoJSON, para descobrir em qual país fica um ponto (lat, lon).
+
+    O mundo é dividido em uma grade. Para cada célula ficam guardados o país que contém o centro dela e as
+    arestas das fronteiras que passam por ela. Um ponto em uma célula sem fronteiras está no mesmo país do
+    centro; nas outras, o país do ponto sai do número de fronteiras que o caminho até o centro cruza, testando
+    apenas as arestas da célula. Se o ponto ficar sobre uma fronteira, vale o país de um dos lados."""
+
+    def __init__(self, json_paises, tamanho_celula=TAMANHO_CELULA):
+        self.ids, self.nomes, self.arestas, self.pais_aresta = _arestas(json_paises)
+        self.tamanho_celula = tamanho_celula
+        self.linhas = int(np.ceil(180 / tamanho_celula))
+        self.colunas = int(np.ceil(360 / tamanho_celula))
+        self.centros_x = -180 + (np.arange(self.colunas) + 0.5) * tamanho_celula
+        self.centros_y = -90 + (np.arange(self.linhas) + 0.5) * tamanho_celula
+        self.pais_centro = self._paises_dos_centros()
+        self.inicio_celula, self.arestas_celula = self._arestas_por_celula()
+
+    def _paises_dos_centros(self):
+        # Para cada linha da grade, as interseções das arestas com a reta horizontal que passa pelos centros
+        # das células; um centro está dentro de um país quando tem um número ímpar de interseções à direita
+        x1, y1, x2, y2 = self.arestas.T
+        paises = np.full((self.linhas, self.colunas), -1, dtype=np.int16)
+        for linha, y in enumerate(self.centros_y):
+            cruzam = (y1 <= y) != (y2 <= y)
+            if not cruzam.any():
+                continue
+            xs = x1[cruzam] + (y - y1[cruzam]) * (x2[cruzam] - x1[cruzam]) / (y2[cruzam] - y1[cruzam])
+            paises_linha = self.pais_aresta[cruzam]
+            for pais in np.unique(paises_linha):
+                intersecoes = np.sort(xs[paises_linha == pais])
+                a_direita = len(intersecoes) - np.searchsorted(intersecoes, self.centros_x, side='right')
+                dentro = (a_direita % 2 == 1) & (paises[linha] < 0)
+                paises[linha, dentro] = pais
+        return paises.ravel()
+
+    def _arestas_por_celula(self):
+        # Cada aresta entra em todas as células do retângulo que a envolve; o resultado fica no formato CSR
+        # (início de cada célula em inicio_celula e os índices das arestas em arestas_celula)
+        x1, y1, x2, y2 = self.arestas.T
+        coluna_inicio, coluna_fim = self._coluna(np.minimum(x1, x2)), self._coluna(np.maximum(x1, x2))
+        linha_inicio, linha_fim = self._linha(np.minimum(y1, y2)), self._linha(np.maximum(y1, y2))
+        largura = coluna_fim - coluna_inicio + 1
+        quantidade = largura * (linha_fim - linha_inicio + 1)
+
+        aresta = np.repeat(np.arange(len(self.arestas)), quantidade)
+        posicao = np.arange(len(aresta)) - np.repeat(np.cumsum(quantidade) - quantidade, quantidade)
+        celula = (linha_inicio[aresta] + posicao // largura[aresta]) * self.colunas + coluna_inicio[aresta] + posicao % largura[aresta]
+
+        ordem = np.argsort(celula, kind='stable')
+        inicio = np.zeros(self.linhas * self.colunas + 1, dtype=np.int64)
+        np.cumsum(np.bincount(celula, minlength=self.linhas * self.colunas), out=inicio[1:])
+        return inicio, aresta[ordem].astype(np.int32)
+
+    def _coluna(self, x):
+        return np.clip(((np.asarray(x) + 180) // self.tamanho_celula).astype(np.int64), 0, self.colunas - 1)
+
+    def _linha(self, y):
+        return np.clip(((np.asarray(y) + 90) // self.tamanho_celula).astype(np.int64), 0, self.linhas - 1)
+
+    def _localizar_na_fronteira(self, celulas, xs, ys):
+        """Índices dos países (-1 fora de todos) dos pontos (xs, ys), que estão nas células com fronteiras `celulas`."""
+        resultado = self.pais_centro[celulas].copy()
+        # Cada ponto é testado com as arestas da sua célula, todos os pares (ponto, aresta) de uma vez
+        quantidades = self.inicio_celula[celulas + 1] - self.inicio_celula[celulas]
+        ponto = np.repeat(np.arange(len(celulas)), quantidades)
+        posicao = np.arange(len(ponto)) - np.repeat(np.cumsum(quantidades) - quantidades, quantidades)
+        arestas = self.arestas_celula[self.inicio_celula[celulas][ponto] + posicao]
+
+        x1, y1, x2, y2 = self.arestas[arestas].T
+        x, y = xs[ponto], ys[ponto]
+        cx = self.centros_x[celulas[ponto] % self.colunas]
+        cy = self.centros_y[celulas[ponto] // self.colunas]
+
+        # Caminho do ponto até o centro da célula: primeiro na horizontal, até x = cx, e depois na vertical, até
+        # y = cy. Cada fronteira cruzada troca o ponto de dentro para fora do país da aresta, ou o contrário
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_intersecao = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+            horizontal = ((y1 <= y) != (y2 <= y)) & (x_intersecao >= np.minimum(x, cx)) & (x_intersecao < np.maximum(x, cx))
+            y_intersecao = y1 + (cx - x1) * (y2 - y1) / (x2 - x1)
+            vertical = ((x1 <= cx) != (x2 <= cx)) & (y_intersecao >= np.minimum(y, cy)) & (y_intersecao < np.maximum(y, cy))
+        cruzou = horizontal != vertical
+
+        # Países cujas fronteiras o caminho cruzou um número ímpar de vezes: o ponto está no país se o centro não está
+        chaves, vezes = np.unique(ponto[cruzou].astype(np.int64) * len(self.ids) + self.pais_aresta[arestas[cruzou]], return_counts=True)
+        chaves = chaves[vezes % 2 == 1]
+        pontos_trocados, paises_trocados = chaves // len(self.ids), (chaves % len(self.ids)).astype(np.int16)
+        saiu_do_centro = paises_trocados == resultado[pontos_trocados]
+        resultado[pontos_trocados[saiu_do_centro]] = -1
+        resultado[pontos_trocados[~saiu_do_centro]] = paises_trocados[~saiu_do_centro]
+        return resultado
+
+    def indice(self, lat, lon):
+        """Índice do país (em self.ids) que contém o ponto, ou -1 se ele não estiver em nenhum país."""
+        if not (math.isfinite(lat) and math.isfinite(lon)):
+            return -1
+        # Sem numpy no caminho mais comum, o de um ponto longe das fronteiras
+        linha = min(max(int((lat + 90) // self.tamanho_celula), 0), self.linhas - 1)
+        coluna = min(max(int((lon + 180) // self.tamanho_celula), 0), self.colunas - 1)
+        celula = linha * self.colunas + coluna
+        pais_centro = int(self.pais_centro[celula])
+        inicio, fim = self.inicio_celula[celula], self.inicio_celula[celula + 1]
+        if inicio == fim:
+            return pais_centro
+
+        # Mesmo teste de _localizar_na_fronteira, em Python puro: para um ponto só e poucas arestas, é bem mais
+        # rápido que montar os arrays
+        arestas = self.arestas_celula[inicio:fim]
+        cx, cy = float(self.centros_x[coluna]), float(self.centros_y[linha])
+        trocas = {}
+        for (x1, y1, x2, y2), pais in zip(self.arestas[arestas].tolist(), self.pais_aresta[arestas].tolist()):
+            cruzou = False
+            if (y1 <= lat) != (y2 <= lat):
+                x_intersecao = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+                cruzou = min(lon, cx) <= x_intersecao < max(lon, cx)
+            if (x1 <= cx) != (x2 <= cx):
+                y_intersecao = y1 + (cx - x1) * (y2 - y1) / (x2 - x1)
+                cruzou ^= min(lat, cy) <= y_intersecao < max(lat, cy)
+            if cruzou:
+                trocas[pais] = not trocas.get(pais, False)
+        entrou = [pais for pais, impar in trocas.items() if impar and pais != pais_centro]
+        if entrou:
+            return max(entrou)
+        return -1 if trocas.get(pais_centro) else pais_centro
+
+    def localizar(self, lat, lon):
+        """ID (ISO3) do país que contém o ponto, ou None se ele não estiver em nenhum país."""
+        pais = self.indice(lat, lon)
+        return self.ids[pais] if pais >= 0 else None
+
+    def localizar_varios(self, lats, lons):
+        """Índices dos países (em self.ids) de vários pontos de uma vez, com -1 para os pontos fora de todos ou inválidos."""
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        validos = np.isfinite(lats) & np.isfinite(lons)
+        lats, lons = np.where(validos, lats, 0), np.where(validos, lons, 0)
+        celulas = self._linha(lats) * self.colunas + self._coluna(lons)
+        resultado = np.where(validos, self.pais_centro[celulas], -1).astype(np.int16)
+
+        # Só os pontos em células com fronteiras precisam do teste com as arestas, em blocos para limitar a memória
+        com_fronteira = np.nonzero(validos & (self.inicio_celula[celulas + 1] > self.inicio_celula[celulas]))[0]
+        for inicio in range(0, len(com_fronteira), TAMANHO_BLOCO):
+            pontos = com_fronteira[inicio:inicio + TAMANHO_BLOCO]
+            resultado[pontos] = self._localizar_na_fronteira(celulas[pontos], lons[pontos], lats[pontos])
+        return resultado
+
+    def ids_varios(self, lats, lons):
+        """Como localizar_varios, mas com o ID (ISO3) de cada ponto, ou None."""
+        return [self.ids[pais] if pais >= 0 else None for pais in self.localizar_varios(lats, lons).tolist()]
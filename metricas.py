@@ -0,0 +1,199 @@
+import bisect
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+import flask
+
+# As métricas só são coletadas com INFO_MUNDO_METRICAS=1. Desativadas, as funções instrumentadas
+# ficam exatamente como eram e o custo é zero
+ativo = os.environ.get('INFO_MUNDO_METRICAS', '0') not in ('', '0')
+# Com INFO_MUNDO_METRICAS_LOG=1, cada chamada de callback também gera uma linha de log em JSON
+log_ativo = ativo and os.environ.get('INFO_MUNDO_METRICAS_LOG', '0') not in ('', '0')
+
+LIMITES_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LIMITES_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+DESCRICOES = {
+    'info_mundo_callback_duracao_segundos': 'Tempo de resposta de cada callback, do início da requisição ao envio',
+    'info_mundo_callback_resposta_bytes': 'Tamanho da resposta de cada callback, como enviada ao navegador',
+    'info_mundo_fase_duracao_segundos': 'Tempo de cada fase dentro dos callbacks (construção da figura, serialização...)',
+}
+
+logger = logging.getLogger('info_mundo.metricas')
+
+
+class Histograma:
+    """Histograma cumulativo no formato do Prometheus."""
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+
+class Metricas:
+    """Histogramas do processo, indexados por (nome da métrica, rótulos).
+
+    Cada worker do gunicorn tem as suas próprias métricas."""
+
+    def __init__(self):
+        self._histogramas = {}
+        self._coletores = []
+        self._trava = threading.Lock()
+
+    def observar(self, nome, valor, rotulos, limites=LIMITES_SEGUNDOS):
+        chave = (nome, rotulos)
+        with self._trava:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = Histograma(limites)
+            histograma.observar(valor)
+
+    def registrar_coletor(self, coletor):
+        """Registra uma função chamada a cada leitura de /metrics, que retorna linhas (nome, tipo, descrição, rótulos, valor)."""
+        self._coletores.append(coletor)
+
+    def exportar(self):
+        """Texto no formato de exposição do Prometheus."""
+        linhas = []
+        with self._trava:
+            histogramas = sorted(
+                (nome, rotulos, list(h.limites), list(h.contagens), h.soma, h.total)
+                for (nome, rotulos), h in self._histogramas.items()
+            )
+
+        nome_anterior = None
+        for nome, rotulos, limites, contagens, soma, total in histogramas:
+            if nome != nome_anterior:
+                linhas.append(f'# HELP {nome} {DESCRICOES.get(nome, nome)}')
+                linhas.append(f'# TYPE {nome} histogram')
+                nome_anterior = nome
+            acumulado = 0
+            for limite, contagem in zip(limites, contagens):
+                acumulado += contagem
+                linhas.append(f'{nome}_bucket{_formatar_rotulos(rotulos + (("le", _formatar_numero(limite)),))} {acumulado}')
+            linhas.append(f'{nome}_bucket{_formatar_rotulos(rotulos + (("le", "+Inf"),))} {total}')
+            linhas.append(f'{nome}_sum{_formatar_rotulos(rotulos)} {soma}')
+            linhas.append(f'{nome}_count{_formatar_rotulos(rotulos)} {total}')
+
+        for coletor in self._coletores:
+            nome_anterior = None
+            for nome, tipo, descricao, rotulos, valor in coletor():
+                if nome != nome_anterior:
+                    linhas.append(f'# HELP {nome} {descricao}')
+                    linhas.append(f'# TYPE {nome} {tipo}')
+                    nome_anterior = nome
+                linhas.append(f'{nome}{_formatar_rotulos(rotulos)} {valor}')
+
+        return '\n'.join(linhas) + '\n'
+
+
+def _formatar_numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+def _formatar_rotulos(rotulos):
+    if not rotulos:
+        return ''
+    pares = []
+    for chave, valor in rotulos:
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pares.append(f'{chave}="{valor}"')
+    return '{' + ','.join(pares) + '}'
+
+
+metricas = Metricas()
+
+
+@contextlib.contextmanager
+def fase(nome):
+    """Mede o tempo de uma fase do callback. Dentro de uma requisição, a fase também entra na linha de log dela."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        metricas.observar('info_mundo_fase_duracao_segundos', segundos, (('fase', nome),))
+        if flask.has_request_context():
+            fases = flask.g.get('fases_metricas')
+            if fases is not None:
+                fases[nome] = fases.get(nome, 0.0) + segundos
+
+def medir(nome):
+    """Como fase(), mas não faz nada com as métricas desativadas."""
+    if not ativo:
+        return contextlib.nullcontext()
+    return fase(nome)
+
+def instrumentar(funcao):
+    """Decorador que mede cada chamada da função como uma fase com o nome dela."""
+    if not ativo:
+        return funcao
+
+    @functools.wraps(funcao)
+    def instrumentada(*args, **kwargs):
+        with fase(funcao.__name__):
+            return funcao(*args, **kwargs)
+    return instrumentada
+
+def configurar(app, rota='/metrics'):
+    """Mede as chamadas de callback do app Dash e expõe as métricas na rota do servidor Flask.
+
+    Deve ser chamada antes de compressao.configurar, para que o tempo e o tamanho medidos sejam os da resposta comprimida."""
+    server = app.server
+    if log_ativo and not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    def nome_callback(output):
+        callback = app.callback_map.get(output, {}).get('callback')
+        return getattr(callback, '__name__', output)
+
+    @server.before_request
+    def iniciar_medicao():
+        if flask.request.path.endswith('/_dash-update-component'):
+            flask.g.inicio_metricas = time.perf_counter()
+            flask.g.fases_metricas = {}
+
+    @server.after_request
+    def registrar_medicao(resposta):
+        inicio = flask.g.get('inicio_metricas')
+        if inicio is None:
+            return resposta
+        segundos = time.perf_counter() - inicio
+        corpo = flask.request.get_json(silent=True) or {}
+        callback = nome_callback(corpo.get('output', ''))
+        tamanho = resposta.calculate_content_length() or 0
+        rotulos = (('callback', callback),)
+        metricas.observar('info_mundo_callback_duracao_segundos', segundos, rotulos)
+        metricas.observar('info_mundo_callback_resposta_bytes', tamanho, rotulos, LIMITES_BYTES)
+
+        if log_ativo:
+            logger.info(json.dumps({
+                'evento': 'callback',
+                'callback': callback,
+                'status': resposta.status_code,
+                'duracao_ms': round(segundos * 1000, 3),
+                'bytes': tamanho,
+                'codificacao': resposta.headers.get('Content-Encoding'),
+                'fases_ms': {nome: round(valor * 1000, 3) for nome, valor in flask.g.fases_metricas.items()},
+                'pid': os.getpid(),
+            }, ensure_ascii=False))
+        return resposta
+
+    @server.route(rota)
+    def exportar_metricas():
+        return flask.Response(metricas.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
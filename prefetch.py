@@ -0,0 +1,126 @@
+import collections
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+
+# A construção antecipada dos gráficos só é feita com INFO_MUNDO_PREFETCH=1
+ativo = os.environ.get('INFO_MUNDO_PREFETCH', '0') not in ('', '0')
+
+logger = logging.getLogger('info_mundo.prefetch')
+
+
+class Agendador:
+    """Executa em segundo plano tarefas agrupadas por assunto (ex.: os gráficos de um país).
+
+    O número de threads limita quantas tarefas rodam ao mesmo tempo, e limite_fila quantas podem estar na fila;
+    as que passam do limite são descartadas. Cada sessão conta como interessada só no último assunto que pediu,
+    por até `validade` segundos (uma aba fechada ou uma sessão atendida por outro worker deixa de contar).
+    Quando ninguém mais está interessado, as tarefas do assunto que ainda não começaram são canceladas."""
+
+    def __init__(self, threads=1, limite_fila=16, validade=60):
+        self.limite_fila = limite_fila
+        self.validade = validade
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=threads, thread_name_prefix='prefetch')
+        self._tarefas = {}
+        # sessão -> (assunto, instante do último pedido), da menos para a mais recente
+        self._sessoes = collections.OrderedDict()
+        self._interessados = collections.Counter()
+        self._contagens = collections.Counter()
+        # Reentrante: cancelar uma tarefa chama o _remover dela na mesma thread, com a trava já adquirida
+        self._trava = threading.RLock()
+
+    def agendar(self, sessao, assunto, tarefas):
+        """Agenda as tarefas (funções sem argumentos) do assunto que a sessão passou a ver (None: nenhum)."""
+        with self._trava:
+            agora = time.monotonic()
+            self._expirar(agora)
+            anterior, _ = self._sessoes.pop(sessao, (None, None))
+            if anterior is not None:
+                self._perder_interesse(anterior)
+            if assunto is None:
+                return
+            self._sessoes[sessao] = (assunto, agora)
+            self._interessados[assunto] += 1
+            if self._tarefas.get(assunto):
+                # As tarefas do assunto já estão na fila, agendadas por esta ou por outra sessão
+                return
+
+            pendentes = []
+            for tarefa in tarefas:
+                if self._na_fila() >= self.limite_fila:
+                    self._contagens['descartadas'] += len(tarefas) - len(pendentes)
+                    break
+                pendente = self._executor.submit(self._executar, assunto, tarefa)
+                pendentes.append(pendente)
+                self._contagens['agendadas'] += 1
+            if pendentes:
+                self._tarefas[assunto] = pendentes
+                for pendente in pendentes:
+                    pendente.add_done_callback(lambda concluida, assunto=assunto: self._remover(assunto, concluida))
+
+    def _na_fila(self):
+        return sum(len(pendentes) for pendentes in self._tarefas.values())
+
+    def _expirar(self, agora):
+        # As sessões estão em ordem de último pedido: basta olhar o começo
+        while self._sessoes:
+            sessao, (assunto, instante) = next(iter(self._sessoes.items()))
+            if agora - instante < self.validade:
+                break
+            del self._sessoes[sessao]
+            self._perder_interesse(assunto)
+
+    def _perder_interesse(self, assunto):
+        self._interessados[assunto] -= 1
+        if self._interessados[assunto] > 0:
+            return
+        del self._interessados[assunto]
+        for tarefa in self._tarefas.pop(assunto, []):
+            # Só as que ainda não começaram podem ser canceladas; as outras terminam normalmente
+            if tarefa.cancel():
+                self._contagens['canceladas'] += 1
+
+    def _executar(self, assunto, tarefa):
+        with self._trava:
+            if self._interessados[assunto] <= 0:
+                self._contagens['canceladas'] += 1
+                return
+        try:
+            tarefa()
+        except Exception:
+            with self._trava:
+                self._contagens['erros'] += 1
+            logger.exception('Erro em uma tarefa de prefetch de %s', assunto)
+        else:
+            with self._trava:
+                self._contagens['executadas'] += 1
+
+    def _remover(self, assunto, concluida):
+        with self._trava:
+            pendentes = self._tarefas.get(assunto)
+            if pendentes is not None and concluida in pendentes:
+                pendentes.remove(concluida)
+                if not pendentes:
+                    del self._tarefas[assunto]
+
+    def aguardar(self):
+        """Espera as tarefas que já estão na fila terminarem (usado nos benchmarks)."""
+        with self._trava:
+            pendentes = [tarefa for tarefas in self._tarefas.values() for tarefa in tarefas]
+        concurrent.futures.wait(pendentes)
+
+    def estatisticas(self):
+        with self._trava:
+            return dict(self._contagens, na_fila=self._na_fila(), sessoes=len(self._sessoes))
+
+    def coletar_metricas(self):
+        """Linhas do prefetch para o /metrics (metricas.Metricas.registrar_coletor)."""
+        estatisticas = self.estatisticas()
+        linhas = [
+            ('info_mundo_prefetch_tarefas_total', 'counter', 'Tarefas de prefetch por resultado', (('resultado', resultado),), estatisticas.get(resultado, 0))
+            for resultado in ('agendadas', 'executadas', 'canceladas', 'descartadas', 'erros')
+        ]
+        linhas.append(('info_mundo_prefetch_fila', 'gauge', 'Tarefas de prefetch na fila ou rodando', (), estatisticas['na_fila']))
+        return linhas
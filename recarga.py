@@ -0,0 +1,113 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger('info_mundo.recarga')
+
+
+def assinatura_rapida(arquivos):
+    # Só tamanho e mtime, sem hash: é calculada a cada verificação
+    assinatura = {}
+    for caminho in arquivos:
+        try:
+            estado = os.stat(caminho)
+        except FileNotFoundError:
+            assinatura[caminho] = None
+        else:
+            assinatura[caminho] = (estado.st_size, estado.st_mtime_ns)
+    return assinatura
+
+
+class Recarregador:
+    """Guarda o estado montado a partir dos arquivos de dados e o remonta em segundo plano quando eles mudam.
+
+    O estado atual é uma única referência, trocada de uma vez quando o novo estado fica pronto: uma requisição
+    que já leu o estado antigo termina com ele, e as seguintes recebem o novo. carregar(versao) monta o estado
+    e ao_trocar são funções chamadas depois de cada troca (ex.: limpar caches)."""
+
+    def __init__(self, listar_arquivos, carregar, intervalo, ao_trocar=()):
+        self.listar_arquivos = listar_arquivos
+        self.carregar = carregar
+        self.intervalo = intervalo
+        self.ao_trocar = list(ao_trocar)
+        self.versao = 1
+        self.recargas = 0
+        self.falhas = 0
+        # A assinatura é lida antes de montar o estado, para que uma mudança durante a montagem não se perca
+        self._assinatura = assinatura_rapida(listar_arquivos())
+        self._pendente = None
+        self._thread = None
+        self._trava = threading.Lock()
+        self.atual = carregar(self.versao)
+
+    def iniciar(self):
+        """Inicia a verificação periódica dos arquivos no processo atual. Com intervalo 0 não faz nada.
+
+        Threads não sobrevivem ao fork, então deve ser chamada em cada worker, e não no processo principal do gunicorn."""
+        if self.intervalo <= 0 or self._thread is not None:
+            return
+        with self._trava:
+            if self._thread is not None:
+                return
+            if not logger.handlers:
+                handler = logging.StreamHandler()
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                logger.addHandler(handler)
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+            self._thread = threading.Thread(target=self._verificar_periodicamente, name='recarga-dados', daemon=True)
+            self._thread.start()
+
+    def _verificar_periodicamente(self):
+        while True:
+            time.sleep(self.intervalo)
+            try:
+                self.verificar()
+            except Exception:
+                logger.exception('Erro ao verificar os arquivos de dados')
+
+    def verificar(self):
+        """Remonta o estado se os arquivos mudaram e pararam de mudar desde a última verificação.
+
+        Retorna se o estado foi trocado."""
+        assinatura = assinatura_rapida(self.listar_arquivos())
+        if assinatura == self._assinatura:
+            self._pendente = None
+            return False
+        if assinatura != self._pendente:
+            # Espera a próxima verificação, já que o arquivo ainda pode estar sendo copiado
+            self._pendente = assinatura
+            return False
+        self._pendente = None
+        # Mesmo que a recarga falhe, só tenta de novo quando os arquivos mudarem outra vez
+        self._assinatura = assinatura
+        return self.recarregar()
+
+    def recarregar(self):
+        """Monta o estado de novo e troca o atual por ele. Em caso de erro, o estado atual é mantido."""
+        with self._trava:
+            inicio = time.perf_counter()
+            versao = self.versao + 1
+            try:
+                estado = self.carregar(versao)
+            except Exception:
+                self.falhas += 1
+                logger.exception('Falha ao recarregar os dados; o app continua com a versão %s', self.versao)
+                return False
+
+            self.atual = estado
+            self.versao = versao
+            self.recargas += 1
+            for funcao in self.ao_trocar:
+                funcao()
+            logger.info('Dados recarregados (versão %s, pid %s) em %.2f s', versao, os.getpid(), time.perf_counter() - inicio)
+            return True
+
+    def coletar_metricas(self):
+        """Linhas da recarga para o /metrics (metricas.Metricas.registrar_coletor)."""
+        return [
+            ('info_mundo_dados_versao', 'gauge', 'Versão dos dados em uso pelo processo (1 = carregada na inicialização)', (), self.versao),
+            ('info_mundo_dados_recargas_total', 'counter', 'Recargas dos dados concluídas', (('resultado', 'sucesso'),), self.recargas),
+            ('info_mundo_dados_recargas_total', 'counter', 'Recargas dos dados concluídas', (('resultado', 'falha'),), self.falhas),
+        ]
@@ -0,0 +1,52 @@
+import collections
+
+import pandas as pd
+
+# Registro compacto de cada país. 'posicao' é a linha do país no recorte_mundo e 'grupos' guarda
+# o valor de cada coluna de agrupamento (região da ONU, grupo de renda...)
+Pais = collections.namedtuple('Pais', ['posicao', 'nome', 'iso3', 'sigla', 'grupos'])
+
+AGRUPAMENTOS = ('UN Region', 'World Bank Income Groups')
+
+
+class RegistroPaises:
+    """Índices por nome, ISO3, sigla e grupo, montados uma única vez na inicialização.
+
+    Substitui os filtros no DataFrame e as buscas lineares nas features do GeoJSON feitos a cada clique."""
+
+    def __init__(self, df, json_paises, df_coordenadas=None, agrupamentos=AGRUPAMENTOS):
+        # Sigla (ISO2 em minúsculas) usada no nome do arquivo da bandeira. Países sem geometria no
+        # GeoJSON (Maldivas, Maurício, Seicheles) usam o ISO2 do longitude-latitude.csv
+        siglas = {feature['id']: feature['properties']['sigla'] for feature in json_paises['features']}
+        if df_coordenadas is not None:
+            for iso3, iso2 in zip(df_coordenadas['ISO-ALPHA-3'], df_coordenadas['ISO-ALPHA-2']):
+                if isinstance(iso2, str):
+                    siglas.setdefault(iso3, iso2.lower())
+
+        self.paises = []
+        self.por_nome = {}
+        self.por_iso3 = {}
+        self.por_sigla = {}
+        self.membros = {agrupamento: {} for agrupamento in agrupamentos}
+
+        colunas = ['Country', 'ISO3'] + list(agrupamentos)
+        for posicao, linha in enumerate(df[colunas].itertuples(index=False, name=None)):
+            nome, iso3 = linha[0], linha[1]
+            grupos = {agrupamento: None if pd.isna(valor) else valor for agrupamento, valor in zip(agrupamentos, linha[2:])}
+            pais = Pais(posicao, nome, iso3, siglas.get(iso3), grupos)
+
+            self.paises.append(pais)
+            self.por_nome[nome] = pais
+            self.por_iso3[iso3] = pais
+            if pais.sigla is not None:
+                self.por_sigla[pais.sigla] = pais
+            for agrupamento, valor in grupos.items():
+                if valor is not None:
+                    self.membros[agrupamento].setdefault(valor, []).append(nome)
+
+    def paises_do_grupo(self, nome_pais, agrupamento='UN Region'):
+        """Retorna os nomes dos países que estão no mesmo grupo que o país informado."""
+        valor = self.por_nome[nome_pais].grupos[agrupamento]
+        if valor is None:
+            return []
+        return self.membros[agrupamento][valor]
@@ -0,0 +1,150 @@
+import contextlib
+import hashlib
+import mmap
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+import plotly
+
+try:
+    import fcntl
+except ImportError:
+    # Sem fcntl (Windows), cada processo prepara o estado por conta própria
+    fcntl = None
+
+# Incrementar quando o formato do estado salvo mudar de forma que a assinatura dos arquivos não detecte
+VERSAO = 2
+# Os arrays do NumPy (colunas numéricas dos DataFrames, cubo de indicadores) ficam fora do pickle, no fim do
+# arquivo, alinhados em ALINHAMENTO bytes. Na leitura eles são mapeados na memória sem cópia e em modo somente
+# leitura, então os workers que carregam o mesmo snapshot compartilham essas páginas pelo cache do sistema
+ALINHAMENTO = 64
+
+
+def _hash_arquivo(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def assinatura_arquivos(arquivos):
+    # Tamanho, mtime e hash de cada arquivo de origem
+    assinatura = {}
+    for caminho in arquivos:
+        estado = os.stat(caminho)
+        assinatura[os.path.basename(caminho)] = (estado.st_size, estado.st_mtime_ns, _hash_arquivo(caminho))
+    return assinatura
+
+def _versoes():
+    return {'snapshot': VERSAO, 'pandas': pd.__version__, 'numpy': np.__version__, 'plotly': plotly.__version__}
+
+def _snapshot_valido(cabecalho, arquivos):
+    if cabecalho.get('versoes') != _versoes():
+        return False
+    assinatura_salva = cabecalho.get('arquivos', {})
+    if set(assinatura_salva) != {os.path.basename(caminho) for caminho in arquivos}:
+        return False
+    for caminho in arquivos:
+        tamanho, mtime, hash_salvo = assinatura_salva[os.path.basename(caminho)]
+        estado = os.stat(caminho)
+        if estado.st_size != tamanho:
+            return False
+        # O hash só é recalculado quando o mtime mudou (ex.: arquivo copiado ou checkout do git sem alteração)
+        if estado.st_mtime_ns != mtime and _hash_arquivo(caminho) != hash_salvo:
+            return False
+    return True
+
+def _alinhar(posicao):
+    return -(-posicao // ALINHAMENTO) * ALINHAMENTO
+
+def carregar(caminho_snapshot, arquivos):
+    """Retorna o estado salvo no snapshot, ou None se ele não existir ou algum arquivo de origem mudou."""
+    try:
+        with open(caminho_snapshot, 'rb') as f:
+            # O cabeçalho é lido separadamente para validar o snapshot sem carregar o estado inteiro
+            cabecalho = pickle.load(f)
+            if not _snapshot_valido(cabecalho, arquivos):
+                return None
+            dados_estado = f.read(cabecalho['tamanho_estado'])
+            inicio_buffers = _alinhar(f.tell())
+            # O mapeamento continua válido depois de fechar o arquivo, enquanto algum array apontar para ele
+            memoria = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        buffers = [memoria[inicio_buffers + posicao:inicio_buffers + posicao + tamanho] for posicao, tamanho in cabecalho['buffers']]
+        return pickle.loads(dados_estado, buffers=buffers)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, KeyError, TypeError, ValueError):
+        return None
+
+def salvar(caminho_snapshot, arquivos, estado):
+    os.makedirs(os.path.dirname(caminho_snapshot), exist_ok=True)
+    buffers = []
+    dados_estado = pickle.dumps(estado, protocol=5, buffer_callback=buffers.append)
+    buffers = [buffer.raw() for buffer in buffers]
+    posicoes = []
+    posicao = 0
+    for buffer in buffers:
+        posicoes.append((posicao, buffer.nbytes))
+        posicao = _alinhar(posicao + buffer.nbytes)
+    cabecalho = {'versoes': _versoes(), 'arquivos': assinatura_arquivos(arquivos), 'tamanho_estado': len(dados_estado), 'buffers': posicoes}
+
+    # Escreve em um arquivo temporário e troca no final, para que outros workers nunca leiam um snapshot pela metade
+    descritor, caminho_temporario = tempfile.mkstemp(dir=os.path.dirname(caminho_snapshot), suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'wb') as f:
+            pickle.dump(cabecalho, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.write(dados_estado)
+            inicio_buffers = _alinhar(f.tell())
+            for buffer, (posicao, _) in zip(buffers, posicoes):
+                f.write(bytes(inicio_buffers + posicao - f.tell()))
+                f.write(buffer)
+        os.replace(caminho_temporario, caminho_snapshot)
+    except BaseException:
+        os.unlink(caminho_temporario)
+        raise
+
+@contextlib.contextmanager
+def _trava(caminho_snapshot):
+    # Trava entre processos: quando vários workers encontram o snapshot desatualizado ao mesmo tempo
+    # (na inicialização ou em uma recarga dos dados), só um prepara o estado e os outros carregam o resultado
+    if fcntl is None:
+        yield
+        return
+    try:
+        os.makedirs(os.path.dirname(caminho_snapshot), exist_ok=True)
+        arquivo = open(caminho_snapshot + '.lock', 'a')
+    except OSError:
+        yield
+        return
+    with arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+def carregar_ou_preparar(caminho_snapshot, arquivos, preparar):
+    """Carrega o estado do snapshot ou, se ele estiver desatualizado, prepara de novo e salva.
+
+    Retorna o estado e se ele veio do snapshot. Com caminho_snapshot vazio, o snapshot é desativado."""
+    if not caminho_snapshot:
+        return preparar(), False
+
+    estado = carregar(caminho_snapshot, arquivos)
+    if estado is not None:
+        return estado, True
+
+    with _trava(caminho_snapshot):
+        # Outro processo pode ter salvo o snapshot enquanto este esperava a trava
+        estado = carregar(caminho_snapshot, arquivos)
+        if estado is not None:
+            return estado, True
+
+        estado = preparar()
+        try:
+            salvar(caminho_snapshot, arquivos, estado)
+        except OSError:
+            # Sem permissão de escrita (ex.: disco somente leitura), o app continua sem snapshot
+            pass
+    return estado, False
@@ -0,0 +1,129 @@
+// Callbacks executados no navegador, sem ida ao servidor
+
+// Quadro do ano pedido ou, se a métrica não tem esse ano, do mais próximo; no empate, o mais recente
+// (mesma regra de utils.indice_quadro)
+function indice_quadro(valores, ano) {
+    var anos = valores.anos;
+    var indice = 0;
+    for (var i = 1; i < anos.length; i++) {
+        if (Math.abs(anos[i] - ano) <= Math.abs(anos[indice] - ano)) {
+            indice = i;
+        }
+    }
+    return indice;
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    cards: {
+        // Atualiza os cards e as opções de gráfico com os textos já calculados para o país escolhido
+        selecionar_pais: function(pais, dados_cards, grafico_atual) {
+            if (!pais || !dados_cards || !(pais in dados_cards.cards)) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            var card = dados_cards.cards[pais];
+            var mundo = pais === 'Mundo';
+            var opcoes = dados_cards.opcoes_graficos[mundo ? 'mundo' : 'pais'];
+            // Sem região ou grupo de renda (ex.: Hong Kong), as comparações pelo grupo ficam de fora
+            var indisponiveis = dados_cards.graficos_indisponiveis[pais] || [];
+            if (indisponiveis.length) {
+                opcoes = opcoes.filter(function(opcao) { return indisponiveis.indexOf(opcao.value) === -1; });
+            }
+
+            // Ao trocar de país o mesmo gráfico continua selecionado, exceto os gráficos do mundo e os que o país não tem
+            var grafico = grafico_atual || '';
+            if (mundo || grafico.indexOf('mundo') === 0 || indisponiveis.indexOf(grafico) !== -1) {
+                grafico = '';
+            }
+
+            return [pais, card.populacao, card.porcentagem_populacao, card.idh_rank, card.idh, grafico, opcoes,
+                    card.bandeira.src, card.bandeira.srcset, card.bandeira.srcset_webp, card.capital, card.renda, card.expectativa_vida, card.area];
+        }
+    },
+    mapa: {
+        // Recolore o mapa com a métrica e o ano escolhidos reaproveitando a figura (e a geometria) já carregada
+        atualizar_metrica: function(opcao, ano, valores_mapa, figura) {
+            if (!opcao || !valores_mapa || !figura) {
+                return window.dash_clientside.no_update;
+            }
+            var valores = valores_mapa[opcao];
+            var indice = indice_quadro(valores, ano == null ? valores.ano_padrao : ano);
+
+            var trace = Object.assign({}, figura.data[0], {
+                z: valores.quadros[indice],
+                hovertemplate: valores.hovertemplates[indice]
+            });
+            var coloraxis = Object.assign({}, figura.layout.coloraxis, {
+                cmin: valores.cmin,
+                cmax: valores.cmax,
+                colorbar: Object.assign({}, figura.layout.coloraxis.colorbar, {title: {text: valores.titulos[indice]}})
+            });
+
+            return Object.assign({}, figura, {
+                data: [trace].concat(figura.data.slice(1)),
+                layout: Object.assign({}, figura.layout, {coloraxis: coloraxis})
+            });
+        },
+
+        // Troca a geometria do mapa pelo nível do zoom atual. Cada URL é baixada uma única vez: o plotly guarda
+        // o GeoJSON já carregado, e o navegador guarda o arquivo em cache
+        trocar_nivel: function(relayout, niveis, figura) {
+            var zoom = relayout && relayout['mapbox.zoom'];
+            if (zoom == null || !niveis || !niveis.length || !figura || typeof figura.data[0].geojson !== 'string') {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            var nivel = niveis[niveis.length - 1];
+            for (var i = 0; i < niveis.length; i++) {
+                if (zoom <= niveis[i].zoom_maximo) {
+                    nivel = niveis[i];
+                    break;
+                }
+            }
+            if (figura.data[0].geojson === nivel.url) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            var trace = Object.assign({}, figura.data[0], {geojson: nivel.url});
+            return Object.assign({}, figura, {data: [trace].concat(figura.data.slice(1))});
+        },
+
+        // Ajusta o slider aos anos da métrica, mantendo o ano escolhido ou indo para o mais próximo que ela tem
+        configurar_anos: function(opcao, valores_mapa, ano) {
+            if (!opcao || !valores_mapa) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            var valores = valores_mapa[opcao];
+            var anos = valores.anos;
+            // O ano escolhido só é mantido se a nova métrica o tem; senão o slider volta para o ano padrão dela,
+            // para que ir e voltar entre métricas não vá deslocando o ano
+            var ano_metrica = anos.indexOf(ano) !== -1 ? ano : valores.ano_padrao;
+            return [anos[0], anos[anos.length - 1], valores.passo, valores.marcas, ano_metrica];
+        },
+
+        // O botão inicia (do primeiro ano, se o slider está no último) ou pausa a animação. A cada disparo do
+        // intervalo o slider avança um ano, e a animação para no último
+        animar: function(n_clicks, n_intervals, opcao, ano, valores_mapa, parado) {
+            var no_update = window.dash_clientside.no_update;
+            if (!opcao || !valores_mapa) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            var anos = valores_mapa[opcao].anos;
+            var indice = indice_quadro(valores_mapa[opcao], ano);
+            var ultimo = anos.length - 1;
+            var disparos = window.dash_clientside.callback_context.triggered.map(function(disparo) { return disparo.prop_id; });
+
+            if (disparos.indexOf('animar-mapa.n_clicks') !== -1) {
+                if (parado) {
+                    return [indice >= ultimo ? anos[0] : no_update, false, '❚❚'];
+                }
+                return [no_update, true, '▶'];
+            }
+            if (parado) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            if (indice >= ultimo) {
+                return [no_update, true, '▶'];
+            }
+            var fim = indice + 1 >= ultimo;
+            return [anos[indice + 1], fim ? true : no_update, fim ? '▶' : no_update];
+        }
+    }
+});
@@ -1,18 +1,13 @@
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
-import os
 
-def busca_pais_pelo_iso3(df, sigla_pais):
-    pais = df[df['ISO3'] == sigla_pais]
-    nome_pais = pais['Country'].values[0]
-    return nome_pais
+import bandeiras
+import figuras
+import metricas
 
-def buscar_pais_pelo_nome(df, nome_pais):
-    pais = df[df['Country'] == nome_pais]
-    iso3_pais = pais['ISO3'].values[0]
-    return iso3_pais
+def busca_pais_pelo_iso3(registro, sigla_pais):
+    return registro.por_iso3[sigla_pais].nome
 
 def padronizar_grafico(fig):
     fig.update_layout(
@@ -58,170 +53,90 @@ def padronizar_grafico_pais(fig, metrica, nome_pais):
     )
     return fig
 
-# Função para extração do ANO das colunas, relevante para IDH, Expectativa de Vida e outras.
-def extrair_ano(coluna):
-    # Extrai o ano da coluna
-    ano = coluna.split('(')[1].split(')')[0]
-    return int(ano)
-
-def plot_idh_pais(recorte_idh, nome_pais):
-    # Filtra o DataFrame apenas para o país especificado
-    df_pais = recorte_idh[recorte_idh['Country'] == nome_pais]
-
-    # Criar uma lista de anos e uma lista de valores de IDH
-    anos = []
-    idh_valores = []
-
-    # Percorrer as colunas do dataframe
-    for coluna in df_pais.columns:
-        if coluna.startswith('Human Development Index'):
-            # Extrair o ano da coluna
-            ano = extrair_ano(coluna)
-            # Obter o valor de IDH para o ano correspondente
-            idh = df_pais[coluna].values[0]
-            # Adicionar o ano e o valor de IDH às listas
-            anos.append(ano)
-            idh_valores.append(idh)
-
-    # Criar o dataframe com os dados de IDH
-    df_idh = pd.DataFrame({'Ano': anos, 'Valor': idh_valores})
-
-    # Cria o line plot
-    fig = px.line(df_idh, x='Ano', y='Valor', title=f'Evolução do IDH: {nome_pais}', color_discrete_sequence=['#258c03'])
-    fig.update_yaxes(title = 'IDH')
-    fig = padronizar_grafico_pais(fig, 'do IDH',nome_pais)
-    return fig
-
-def plot_expectativa_vida_pais(recorte_expectativa_vida, nome_pais):
-    # Filtra o DataFrame apenas para o país especificado
-    df_pais = recorte_expectativa_vida[recorte_expectativa_vida['Country'] == nome_pais]
-
-    # Criar uma lista de anos e uma lista de valores de IDH
-    anos = []
-    expectativa_valores = []
-
-    # Percorrer as colunas do dataframe
-    for coluna in df_pais.columns:
-        if coluna.startswith('Life Expectancy at Birth'):
-            # Extrair o ano da coluna
-            ano = extrair_ano(coluna)
-            # Obter o valor de IDH para o ano correspondente
-            expectativa = df_pais[coluna].values[0]
-            # Adicionar o ano e o valor de IDH às listas
-            anos.append(ano)
-            expectativa_valores.append(expectativa)
-
-    # Criar o dataframe com os dados de IDH
-    df_expectativa = pd.DataFrame({'Ano': anos, 'Valor': expectativa_valores})
-
-    # Cria o line plot
-    fig = px.line(df_expectativa, x='Ano', y='Valor', title=f'Expectativa de vida: {nome_pais}', color_discrete_sequence=['#258c03'])
-    fig.update_yaxes(title = 'Expectativa de Vida')
-    fig = padronizar_grafico_pais(fig, 'da Expectativa de Vida',nome_pais)
-    return fig
-
-def obter_caminho_bandeira(sigla_pais):
-    # Diretório onde as bandeiras estão localizadas
-    pasta_bandeira = "bandeiras/"
-
-    # Caminho completo para o arquivo da bandeira
-    caminho_bandeira = os.path.join(pasta_bandeira, f"{sigla_pais}.png")
-
-    return caminho_bandeira
-
-
-def obter_paises_vizinhos(df, nome_pais):
-    # Obter a região do país
-    regiao = df.loc[df['Country'] == nome_pais, 'UN Region'].values[0]
-
-    # Filtrar os países da mesma região
-    df_regiao = df[df['UN Region'] == regiao]
-
-    return df_regiao
-
-def plot_idh_por_regiao(df_regiao, nome_regiao, nome_pais):
-    fig = px.line(title=f'Evolução do IDH na região: {nome_regiao}')
-    scatter_obj = 0
-
-    for _, linha in df_regiao.iterrows():
-        pais = linha['Country']
-        valores_idh = []
-        anos = []
-
-        for coluna in linha.index:
-            if coluna.startswith('Human Development Index'):
-                # Extrair o ano da coluna
-                ano = extrair_ano(coluna)
-                # Obter o valor de IDH para o ano correspondente
-                idh = linha[coluna]
-                # Adicionar o ano e o valor de IDH às listas
-                anos.append(ano)
-                valores_idh.append(idh)
-
-        if pais == nome_pais:
-            # Destacar a linha do país selecionado
-            scatter_obj =  go.Scatter(x=anos, y=valores_idh, name=pais, line=dict(width=3, color='green'),  hovertemplate=f"{pais}: %{{y:.2f}}")
-        else:
-            fig.add_scatter(x=anos, y=valores_idh, mode='lines', line=dict(color='lightgray'), hovertemplate=f"{pais}: %{{y:.2f}}", showlegend=False)
-
-    if scatter_obj is not None:
-        fig.update_layout(legend=dict(x=0, y=1, xanchor='left', yanchor='top'), xaxis_title='Ano', yaxis_title='IDH')  # Posicionar a legenda no canto superior esquerdo
-    fig.add_trace(scatter_obj)
-    fig = padronizar_grafico_pais(fig, 'do IDH {}'.format(nome_regiao), nome_pais)
-    return fig
-
-def evolucao_populacao(df, nome_pais):
+def plot_serie_pais(cubo, indicador, nome_pais, titulo_eixo, metrica):
+    # Série do indicador obtida direto do cubo, sem percorrer as colunas do dataset. A figura é montada
+    # direto como dict (figuras.py), no mesmo formato do px.line + padronizar_grafico_pais
+    anos, valores = cubo.serie(indicador, nome_pais)
+    trace = {
+        'hovertemplate': 'Ano=%{x}<br>Valor=%{y}<extra></extra>', 'legendgroup': '',
+        'line': {'color': figuras.cor_serie, 'dash': 'solid'}, 'marker': {'symbol': 'circle'}, 'mode': 'lines',
+        'name': '', 'orientation': 'v', 'showlegend': False,
+        'x': anos, 'xaxis': 'x', 'y': valores, 'yaxis': 'y', 'type': 'scatter',
+    }
+    return figuras.figura([trace], figuras.layout_pais(metrica, nome_pais, 'Ano', titulo_eixo))
+
+@metricas.instrumentar
+def plot_idh_pais(cubo, nome_pais):
+    return plot_serie_pais(cubo, 'Human Development Index', nome_pais, 'IDH', 'do IDH')
+
+@metricas.instrumentar
+def plot_expectativa_vida_pais(cubo, nome_pais):
+    return plot_serie_pais(cubo, 'Life Expectancy at Birth', nome_pais, 'Expectativa de Vida', 'da Expectativa de Vida')
+
+
+def obter_paises_vizinhos(registro, nome_pais, agrupamento='UN Region'):
+    # Países do mesmo grupo (região da ONU por padrão, ou qualquer outra coluna de agrupamento, como o grupo de renda)
+    return registro.paises_do_grupo(nome_pais, agrupamento)
+
+@metricas.instrumentar
+def plot_idh_por_regiao(cubo, paises_regiao, nome_regiao, nome_pais, webgl=False):
+    tipo_trace = 'scattergl' if webgl else 'scatter'
+
+    paises_regiao = list(paises_regiao)
+    if nome_pais not in paises_regiao:
+        paises_regiao.append(nome_pais)
+
+    anos, valores_regiao = cubo.series('Human Development Index', paises_regiao)
+    posicao_pais = paises_regiao.index(nome_pais)
+
+    # Todos os outros países da região em um único trace, com as linhas separadas por um NaN no eixo y
+    # (o x do separador repete o último ano para continuar inteiro e deixar o JSON menor)
+    valores_fundo = np.delete(valores_regiao, posicao_pais, axis=0)
+    nomes_fundo = np.delete(np.array(paises_regiao, dtype=object), posicao_pais)
+    x_fundo = np.tile(np.append(anos, anos[-1]), len(valores_fundo))
+    y_fundo = np.hstack([valores_fundo, np.full((len(valores_fundo), 1), np.nan)]).ravel()
+    fundo = {
+        'customdata': np.repeat(nomes_fundo, len(anos) + 1), 'hovertemplate': '%{customdata}: %{y:.2f}',
+        'line': {'color': 'lightgray'}, 'mode': 'lines', 'name': '', 'showlegend': False,
+        'x': x_fundo, 'y': y_fundo, 'type': tipo_trace,
+    }
+
+    # Destacar a linha do país selecionado, por cima das demais
+    destaque = {
+        'hovertemplate': f"{nome_pais}: %{{y:.2f}}", 'line': {'color': 'green', 'width': 3}, 'name': nome_pais,
+        'x': anos, 'y': valores_regiao[posicao_pais], 'type': tipo_trace,
+    }
+
+    # Legenda no canto superior esquerdo
+    legenda = {'tracegroupgap': 0, 'x': 0, 'y': 1, 'xanchor': 'left', 'yanchor': 'top'}
+    return figuras.figura([fundo, destaque], figuras.layout_pais('do IDH {}'.format(nome_regiao), nome_pais, 'Ano', 'IDH', legenda))
+
+@metricas.instrumentar
+def evolucao_populacao(df, registro, nome_pais):
     anos = ['1970', '1980', '1990', '2000', '2010', '2015', '2020', '2022']
 
-    df_pais = df[df['Country'] == nome_pais]
-
-    # Cria um dataframe com as informações de população por ano
-    df_grafico = df_pais[['ISO3'] + [ano + ' Population' for ano in anos]].copy()
-
-    # Renomeia as colunas para mostrar apenas o ano
-    df_grafico.columns = ['ISO3'] + [ano[:4] for ano in anos]
-
-    # Melt do dataframe para transformar as colunas de população em uma única coluna
-    df_grafico = df_grafico.melt(id_vars='ISO3', var_name='Ano', value_name='População')
+    # Populações do país, lidas pela posição dele no registro, sem filtrar o DataFrame
+    pais = registro.por_nome[nome_pais]
+    populacao = df[[ano + ' Population' for ano in anos]].to_numpy()[pais.posicao]
 
-    fig = px.bar(df_grafico, x='Ano', y='População', color='ISO3', title='População por Ano', color_discrete_sequence=['#258c03'])
+    trace = {
+        'alignmentgroup': 'True', 'hovertemplate': f'ISO3={pais.iso3}<br>Ano=%{{x}}<br>População=%{{y}}<extra></extra>',
+        'legendgroup': pais.iso3, 'marker': {'color': figuras.cor_serie, 'pattern': {'shape': ''}}, 'name': pais.iso3,
+        'offsetgroup': pais.iso3, 'orientation': 'v', 'showlegend': True, 'textposition': 'auto',
+        'x': anos, 'xaxis': 'x', 'y': populacao, 'yaxis': 'y', 'type': 'bar',
+    }
+    legenda = {'title': {'text': 'ISO3'}, 'tracegroupgap': 0}
+    return figuras.figura([trace], figuras.layout_pais('da População', nome_pais, 'Ano', 'População', legenda, barmode='relative'))
 
-    fig = padronizar_grafico_pais(fig, 'da População', nome_pais)
-
-    return fig
-
-def evolucao_renda(df, nome_pais):
-    # Filtra o DataFrame apenas para o país especificado
-    df_pais = df[df['Country'] == nome_pais]
-
-    # Criar uma lista de anos e uma lista de valores com a renda
-    anos = []
-    renda_valores = []
-
-    # Percorrer as colunas do dataframe
-    for coluna in df_pais.columns:
-        if coluna.startswith('Gross National Income Per Capita '):
-            # Extrair o ano da coluna
-            ano = extrair_ano(coluna)
-            # Obter o valor da renda no país para o ano correspondente
-            renda = df_pais[coluna].values[0]
-            # Adicionar o ano e o valor da renda às listas
-            anos.append(ano)
-            renda_valores.append(renda)
-
-    # Criar o dataframe com os dados das rendas
-    df_renda = pd.DataFrame({'Ano': anos, 'Valor': renda_valores})
-
-    # Cria o line plot
-    fig = px.line(df_renda, x='Ano', y='Valor', title=f'Evolução da Renda: {nome_pais}', color_discrete_sequence=['#258c03'])
-
-    fig.update_yaxes(title = 'Renda Per Capita')
-    fig = padronizar_grafico_pais(fig, 'da Renda', nome_pais)
-
-    return fig
+@metricas.instrumentar
+def evolucao_renda(cubo, nome_pais):
+    return plot_serie_pais(cubo, 'Gross National Income Per Capita', nome_pais, 'Renda Per Capita', 'da Renda')
 
+@metricas.instrumentar
 def distribuicao_populacao_mundo(df):
-    # Hong Kong é o único país sem uma definição de UN Region no dataset
+    # Hong Kong é o único país sem uma definição de UN Region no dataset. O ajuste é feito em uma cópia
+    # das colunas usadas, para não alterar o DataFrame compartilhado entre as requisições
+    df = df[['UN Region', 'Country', '2022 Population']].copy()
     pais_sem_regiao = df.loc[(df['Country'] == 'Hong Kong') & (df['UN Region'].isnull())]
 
     # Atualizar o valor de 'UN Region' para 'Asia'
@@ -236,26 +151,178 @@ def distribuicao_populacao_mundo(df):
 
     return fig
 
+# Até este número de países cada um ganha a sua linha em SVG e a legenda. Acima dele as linhas são desenhadas
+# com WebGL, que o plotly.js agrupa em um único desenho, e o nome do país aparece apenas no hover
+limite_paises_svg = 10
+
+# Título do eixo y e formato do hover de cada medida do ranking no gráfico de comparação
+titulos_medidas_ranking = {'posicao': 'Posição no ranking', 'percentil': 'Percentil'}
+formatos_medidas_ranking = {'posicao': '%{y}º', 'percentil': '%{y:.1f}'}
+
+@metricas.instrumentar
+def plot_comparacao_paises(cubo, indicador, paises, ano_inicio=None, ano_fim=None, ranking=None, medida='valor'):
+    # As séries de todos os países saem de uma única indexação no cubo, ou nas tabelas do ranking quando a
+    # medida é a posição ou o percentil
+    if medida == 'valor':
+        anos, valores = cubo.series(indicador, paises, ano_inicio, ano_fim)
+        titulo_y, formato = indicador, '%{y}'
+    else:
+        anos, valores = ranking.series(indicador, paises, ano_inicio, ano_fim, medida)
+        titulo_y, formato = titulos_medidas_ranking[medida], formatos_medidas_ranking[medida]
+    muitos_paises = len(paises) > limite_paises_svg
+
+    data = []
+    for i, (pais, valores_pais) in enumerate(zip(paises, valores)):
+        data.append({
+            'hovertemplate': f'{pais}: {formato}<extra></extra>', 'line': {'color': figuras.cores[i % len(figuras.cores)]},
+            'mode': 'lines', 'name': pais, 'legendgroup': 'comparacao', 'showlegend': not muitos_paises,
+            'x': anos, 'y': valores_pais, 'type': 'scattergl' if muitos_paises else 'scatter',
+        })
+
+    periodo = f'{anos[0]}–{anos[-1]}' if len(anos) else 'sem dados no período'
+    titulo = figuras.titulo(f'{indicador} ({periodo})', font={'size': 20})
+    layout = figuras.layout(titulo, 'Ano', titulo_y, {'tracegroupgap': 0}, destaque=True)
+    if medida == 'posicao':
+        # O primeiro colocado fica no alto do gráfico
+        layout['yaxis']['autorange'] = 'reversed'
+    return figuras.figura(data, layout)
+
+@metricas.instrumentar
+def plot_ranking_pais(ranking, indicador, nome_pais, nome_grupo, metrica):
+    # Posição do país no mundo e no grupo (região) em cada ano, das tabelas calculadas na preparação dos dados
+    anos, posicoes = ranking.series(indicador, [nome_pais])
+    _, posicoes_grupo = ranking.series(indicador, [nome_pais], grupo=True)
+    intervalo = ranking.cubo.intervalo(indicador)
+    linha = ranking.cubo.posicao_pais(nome_pais)
+    indice = ranking.cubo.indice_indicador[indicador]
+    series = [('Mundo', posicoes[0], ranking.total[indice, intervalo], figuras.cor_serie)]
+    if nome_grupo is not None:
+        series.append((nome_grupo, posicoes_grupo[0], ranking.total_grupo[indice, linha, intervalo], figuras.cores[0]))
+
+    data = []
+    for nome, valores, totais, cor in series:
+        data.append({
+            'customdata': totais, 'hovertemplate': f'{nome}: %{{y}}º de %{{customdata}}<extra></extra>',
+            'line': {'color': cor}, 'mode': 'lines+markers', 'name': nome, 'x': anos, 'y': valores, 'type': 'scatter',
+        })
+
+    legenda = {'tracegroupgap': 0, 'x': 0, 'y': 1, 'xanchor': 'left', 'yanchor': 'top'}
+    layout = figuras.layout_pais(metrica, nome_pais, 'Ano', 'Posição no ranking', legenda)
+    layout['yaxis']['autorange'] = 'reversed'
+    return figuras.figura(data, layout)
+
+def plot_correlacao(df, coluna_x, coluna_y, titulo_grafico, titulo_x, titulo_y, autosize=True):
+    # Um trace por região, na ordem em que as regiões aparecem no dataset, como no px.scatter com color='UN Region'
+    regioes = df['UN Region'].to_numpy()
+    x = df[coluna_x].to_numpy()
+    y = df[coluna_y].to_numpy()
+    paises = df['Country'].to_numpy()
+
+    data = []
+    for i, regiao in enumerate(pd.unique(regioes[pd.notna(regioes)])):
+        linhas = regioes == regiao
+        data.append({
+            'customdata': paises[linhas].reshape(-1, 1),
+            'hovertemplate': f'UN Region={regiao}<br>{coluna_x}=%{{x}}<br>{coluna_y}=%{{y}}<br>Country=%{{customdata[0]}}<extra></extra>',
+            'legendgroup': regiao, 'marker': {'color': figuras.cores[i % len(figuras.cores)], 'symbol': 'circle'},
+            'mode': 'markers', 'name': regiao, 'orientation': 'v', 'showlegend': True,
+            'x': x[linhas], 'xaxis': 'x', 'y': y[linhas], 'yaxis': 'y', 'type': 'scatter',
+        })
+
+    legenda = {'title': {'text': 'UN Region'}, 'tracegroupgap': 0}
+    return figuras.figura(data, figuras.layout(figuras.titulo(titulo_grafico), titulo_x, titulo_y, legenda, autosize=autosize))
+
+@metricas.instrumentar
 def correlacao_idh_expectativa(df):
+    return plot_correlacao(df, 'Human Development Index (2021)', 'Life Expectancy at Birth (2021)',
+                           'Correlação entre o IDH e Expectativa de Vida', 'IDH', 'Expectativa de Vida')
 
-    fig = px.scatter(df, x='Human Development Index (2021)', y='Life Expectancy at Birth (2021)', title='Correlação entre o IDH e Expectativa de Vida', color='UN Region', hover_data=['Life Expectancy at Birth (2021)', 'Country'])
-    fig = padronizar_grafico(fig)
-    fig.update_xaxes(title = 'IDH')
-    fig.update_yaxes(title = 'Expectativa de Vida')
-    # fig.update_layout(autosize=False, width=800, height=500)
-
-    return fig
-
+@metricas.instrumentar
 def correlacao_renda_expectativa(df):
-
-    fig = px.scatter(df, x='Gross National Income Per Capita (2021)', y='Life Expectancy at Birth (2021)', title='Correlação entre a Renda Per Capita e Expectativa de Vida', color='UN Region', hover_data=['Life Expectancy at Birth (2021)', 'Country'])
-
-    fig = padronizar_grafico(fig)
-    fig.update_layout(autosize=False, width=900, height=500)
-    fig.update_xaxes(title = 'Renda Per Capita')
-    fig.update_yaxes(title = 'Expectativa de Vida')
-
-    return fig
+    return plot_correlacao(df, 'Gross National Income Per Capita (2021)', 'Life Expectancy at Birth (2021)',
+                           'Correlação entre a Renda Per Capita e Expectativa de Vida', 'Renda Per Capita', 'Expectativa de Vida',
+                           autosize=False)
+
+def marcas_anos(anos, intervalo=5):
+    # Primeiro e último ano e os múltiplos do intervalo entre eles, sem encostar no último
+    marcas = [anos[0]] + [ano for ano in anos[1:-1] if ano % intervalo == 0 and anos[-1] - ano >= intervalo / 2] + [anos[-1]]
+    return {ano: str(ano) for ano in marcas}
+
+def valores_metrica_mapa(titulos, anos, quadros, ano_padrao, colunas_customdata, colunas_hover, casas_decimais=None):
+    """Valores necessários para recolorir o mapa com a métrica e o ano escolhidos, sem reconstruir a figura.
+
+    quadros tem um array de valores (na ordem dos países da figura) para cada ano. A escala de cores é a mesma em
+    todos os anos, para que as cores continuem comparáveis na animação. As colunas do hover além da primeira (o país)
+    são do ano padrão e só aparecem nele."""
+    quadros = np.asarray(quadros, dtype=float)
+    if casas_decimais is not None:
+        quadros = np.round(quadros, casas_decimais)
+    anos = [int(ano) for ano in anos]
+
+    hovertemplates = []
+    for ano, titulo in zip(anos, titulos):
+        nomes = colunas_hover if ano == ano_padrao else colunas_hover[:1]
+        hover = ''.join(f'<br>{nome}=%{{customdata[{colunas_customdata.index(nome)}]}}' for nome in nomes)
+        hovertemplates.append(f'ISO3=%{{location}}{hover}<br>{titulo}=%{{z}}<extra></extra>')
+
+    # Anos seguidos andam de 1 em 1 no slider; anos esparsos (a população) só param nas marcas
+    seguidos = all(proximo - ano == 1 for ano, proximo in zip(anos, anos[1:]))
+    return {
+        'anos': anos,
+        'ano_padrao': ano_padrao,
+        'quadros': [[None if np.isnan(valor) else (int(valor) if casas_decimais == 0 else valor) for valor in quadro]
+                    for quadro in quadros.tolist()],
+        'cmin': float(np.nanmin(quadros)),
+        'cmax': float(np.nanmax(quadros)),
+        'titulos': list(titulos),
+        'hovertemplates': hovertemplates,
+        'passo': 1 if seguidos else None,
+        'marcas': marcas_anos(anos) if seguidos else {ano: str(ano) for ano in anos},
+    }
+
+def indice_quadro(valores, ano):
+    # Quadro do ano pedido ou, se a métrica não tem esse ano, do mais próximo; no empate, o mais recente
+    anos = valores['anos']
+    return min(range(len(anos)), key=lambda i: (abs(anos[i] - ano), -anos[i]))
+
+def dados_cards(df, registro, url_asset):
+    # Textos de todos os cards para cada país e para o mundo, calculados uma única vez e enviados ao navegador,
+    # que atualiza os cards sem ir ao servidor (static/clientside.js)
+    cards = {}
+
+    populacao_total = df['2022 Population'].sum()
+    renda_valor = df['Gross National Income Per Capita (2021)'].sum()/len(df)
+    expectativa_vida_valor = df['Life Expectancy at Birth (2021)'].sum()/len(df)
+    cards['Mundo'] = {
+        'populacao': '{:,}'.format(populacao_total).replace(',', '.'),
+        'porcentagem_populacao': '100%',
+        'idh_rank': ' ',
+        'idh': ' ',
+        'bandeira': bandeiras.urls_bandeira('world', url_asset),
+        'capital': '',
+        'renda': "${:,.2f} USD".format(renda_valor),
+        'expectativa_vida': "{} anos".format(int(expectativa_vida_valor)),
+        'area': formatar_area(510100000),
+    }
+
+    for pais in registro.paises:
+        linha = df.iloc[pais.posicao]
+        renda_valor = linha['Gross National Income Per Capita (2021)']
+        expectativa_vida_valor = linha['Life Expectancy at Birth (2021)']
+        cards[pais.nome] = {
+            'populacao': f'{linha["2022 Population"]:,}'.replace(",", "."),
+            'porcentagem_populacao': f'{linha["World Population Percentage"]:.2f}%',
+            # Países sem ranking ou renda no dataset (ex.: Mônaco, Coreia do Norte) mostram um traço
+            'idh_rank': '-' if pd.isna(linha['HDI Rank (2021)']) else int(linha['HDI Rank (2021)']),
+            'idh': '-' if pd.isna(linha['Human Development Index (2021)']) else float(linha['Human Development Index (2021)']),
+            'bandeira': bandeiras.urls_bandeira(pais.sigla, url_asset),
+            'capital': linha['Capital'],
+            'renda': '-' if pd.isna(renda_valor) else "${:,.2f} USD".format(renda_valor),
+            'expectativa_vida': '-' if pd.isna(expectativa_vida_valor) else "{} anos".format(int(expectativa_vida_valor)),
+            'area': formatar_area(linha['Area (km²)']),
+        }
+
+    return cards
 
 def formatar_area(area_valor):
     if area_valor < 1000:
@@ -0,0 +1,117 @@
+import numpy as np
+
+RAIO_TERRA_KM = 6371.0
+
+# Países usados na comparação com os vizinhos quando o país tem poucas fronteiras terrestres (ilhas, por exemplo):
+# os que faltam são completados com os mais próximos
+MINIMO_VIZINHOS = 5
+
+
+def _distancia_km(lat1, lon1, lat2, lon2):
+    # Distância sobre a esfera (fórmula de haversine), com os ângulos em graus
+    lat1, lon1, lat2, lon2 = (np.radians(valor) for valor in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def _fronteiras(indice_paises):
+    """Pares de países (índices em indice_paises.ids) com fronteira terrestre e a extensão dela em km.
+
+    No GeoJSON, uma fronteira entre dois países é formada pelas mesmas arestas nos anéis dos dois, em sentidos
+    opostos; as arestas são normalizadas (primeiro o ponto menor) para que as duas cópias fiquem iguais."""
+    arestas, paises = indice_paises.arestas, indice_paises.pais_aresta
+    invertidas = (arestas[:, 0] > arestas[:, 2]) | ((arestas[:, 0] == arestas[:, 2]) & (arestas[:, 1] > arestas[:, 3]))
+    normalizadas = np.where(invertidas[:, None], arestas[:, [2, 3, 0, 1]], arestas)
+    _, aresta_unica = np.unique(normalizadas, axis=0, return_inverse=True)
+
+    ordem = np.lexsort((paises, aresta_unica))
+    aresta_unica, paises, normalizadas = aresta_unica[ordem], paises[ordem], normalizadas[ordem]
+    compartilhadas = (aresta_unica[1:] == aresta_unica[:-1]) & (paises[1:] != paises[:-1])
+    x1, y1, x2, y2 = normalizadas[1:][compartilhadas].T
+    extensoes = _distancia_km(y1, x1, y2, x2)
+
+    fronteiras = {}
+    for pais_a, pais_b, extensao in zip(paises[:-1][compartilhadas].tolist(), paises[1:][compartilhadas].tolist(), extensoes.tolist()):
+        fronteiras[pais_a, pais_b] = fronteiras.get((pais_a, pais_b), 0) + extensao
+    return fronteiras
+
+
+class GrafoVizinhos:
+    """Vizinhança geográfica dos países do registro: fronteiras terrestres e distâncias entre os centros.
+
+    As fronteiras saem das arestas compartilhadas no GeoJSON original e as distâncias, das coordenadas de
+    longitude-latitude.csv. Para cada país fica guardada a lista de todos os outros ordenados pela distância,
+    então os k mais próximos e os que estão dentro de um raio são obtidos por fatiamento, sem calcular
+    distâncias nas requisições."""
+
+    def __init__(self, registro, df_coordenadas, indice_paises):
+        self.nomes = [pais.nome for pais in registro.paises]
+        self.posicao = {nome: posicao for posicao, nome in enumerate(self.nomes)}
+
+        coordenadas = df_coordenadas.drop_duplicates('ISO-ALPHA-3').set_index('ISO-ALPHA-3')
+        coordenadas = coordenadas.reindex([pais.iso3 for pais in registro.paises])
+        self.lats = coordenadas['Latitude'].to_numpy(dtype=float)
+        self.lons = coordenadas['Longitude'].to_numpy(dtype=float)
+
+        # Distâncias de cada país a todos os outros, em ordem crescente. Os países sem coordenadas ficam
+        # no fim da ordem (NaN) e são cortados das respostas
+        distancias = _distancia_km(self.lats[:, None], self.lons[:, None], self.lats[None, :], self.lons[None, :])
+        np.fill_diagonal(distancias, np.nan)
+        self.ordem_proximos = np.argsort(distancias, axis=1, kind='stable')[:, :-1].astype(np.int16)
+        self.distancias_ordenadas = np.take_along_axis(distancias, self.ordem_proximos, axis=1).astype(np.float32)
+        self.quantidade_proximos = np.count_nonzero(~np.isnan(self.distancias_ordenadas), axis=1)
+
+        # Fronteiras no formato CSR: as do país i estão em vizinhos_fronteira[inicio_fronteiras[i]:inicio_fronteiras[i + 1]],
+        # da mais extensa para a menor
+        # Posição no registro de cada feature do GeoJSON, -1 para os territórios que não estão no dataset
+        posicao_feature = [registro.por_iso3[iso3].posicao if iso3 in registro.por_iso3 else -1 for iso3 in indice_paises.ids]
+        listas = [[] for _ in self.nomes]
+        for (feature_a, feature_b), extensao in _fronteiras(indice_paises).items():
+            pais_a, pais_b = posicao_feature[feature_a], posicao_feature[feature_b]
+            if pais_a >= 0 and pais_b >= 0 and pais_a != pais_b:
+                listas[pais_a].append((extensao, pais_b))
+                listas[pais_b].append((extensao, pais_a))
+        self.inicio_fronteiras = np.zeros(len(self.nomes) + 1, dtype=np.int32)
+        vizinhos_fronteira, extensoes = [], []
+        for posicao, lista in enumerate(listas):
+            # Um país com mais de uma feature (ou de um trecho) com o mesmo vizinho soma as extensões
+            somadas = {}
+            for extensao, vizinho in lista:
+                somadas[vizinho] = somadas.get(vizinho, 0) + extensao
+            for vizinho, extensao in sorted(somadas.items(), key=lambda item: -item[1]):
+                vizinhos_fronteira.append(vizinho)
+                extensoes.append(extensao)
+            self.inicio_fronteiras[posicao + 1] = len(vizinhos_fronteira)
+        self.vizinhos_fronteira = np.array(vizinhos_fronteira, dtype=np.int16)
+        self.extensao_fronteira = np.array(extensoes, dtype=np.float32)
+
+    def fronteiras(self, nome_pais):
+        """Países com fronteira terrestre com o país, com a extensão da fronteira em km, da mais extensa para a menor."""
+        posicao = self.posicao[nome_pais]
+        inicio, fim = self.inicio_fronteiras[posicao], self.inicio_fronteiras[posicao + 1]
+        return [(self.nomes[vizinho], extensao) for vizinho, extensao in
+                zip(self.vizinhos_fronteira[inicio:fim].tolist(), self.extensao_fronteira[inicio:fim].tolist())]
+
+    def proximos(self, nome_pais, k=MINIMO_VIZINHOS, raio_km=None):
+        """Os k países mais próximos, com a distância entre os centros em km. Com raio_km, todos os que
+        estão dentro do raio (limitados a k, se k não for None)."""
+        posicao = self.posicao[nome_pais]
+        fim = self.quantidade_proximos[posicao]
+        if raio_km is not None:
+            fim = min(fim, np.searchsorted(self.distancias_ordenadas[posicao, :fim], raio_km, side='right'))
+        if k is not None:
+            fim = min(fim, k)
+        return [(self.nomes[vizinho], distancia) for vizinho, distancia in
+                zip(self.ordem_proximos[posicao, :fim].tolist(), self.distancias_ordenadas[posicao, :fim].tolist())]
+
+    def vizinhos(self, nome_pais, minimo=MINIMO_VIZINHOS):
+        """Países que fazem fronteira com o país, completados com os mais próximos até o mínimo."""
+        paises = [vizinho for vizinho, _ in self.fronteiras(nome_pais)]
+        if len(paises) < minimo:
+            incluidos = set(paises)
+            # Entre os minimo + len(paises) mais próximos há pelo menos minimo países que ainda não estão na lista
+            for vizinho, _ in self.proximos(nome_pais, k=minimo + len(paises)):
+                if len(paises) >= minimo:
+                    break
+                if vizinho not in incluidos:
+                    paises.append(vizinho)
+        return paises